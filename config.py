@@ -1,7 +1,88 @@
+import os
+
 DB_CONFIG = {
     'host': 'localhost',
     'database': 'inventario_usm',
     'user': 'postgres',
-    'password': 'tu_contraseña',
+    'password': os.environ.get('INVENTARIO_DB_PASSWORD', 'tu_contraseña'),
     'port': '5432'
 }
+
+# Pool de conexiones compartido por todos los modelos
+DB_POOL = {
+    'minconn': 1,
+    'maxconn': 10,
+    'timeout': 10  # segundos de espera por una conexión libre
+}
+
+# Instrumentación de consultas (ventana de diagnóstico y log de lentas)
+QUERY_STATS = {
+    'enabled': True,
+    'slow_query_ms': 200,  # umbral para registrar una consulta como lenta
+    'history_size': 256    # duraciones recientes guardadas por consulta
+}
+
+# Lectura por bloques con cursores de servidor
+STREAMING = {
+    'itersize': 2000  # filas por viaje al servidor
+}
+
+# Hilos que ejecutan consultas fuera del hilo de Tk (menos que DB_POOL['maxconn'])
+DB_EXECUTOR = {
+    'max_workers': 4,
+    'poll_ms': 30  # cada cuánto se revisan resultados terminados
+}
+
+# Particiones mensuales del historial de movimientos (migración 0010)
+MOVEMENT_PARTITIONS = {
+    'months_ahead': 3,   # meses futuros que se crean al iniciar la aplicación
+    'keep_months': 24    # meses recientes que no se pueden archivar
+}
+
+# Migraciones del esquema (carpeta migrations/)
+MIGRATIONS = {
+    # Aplicar las pendientes al iniciar la aplicación (en segundo plano). Por
+    # defecto no: algunas copian o bloquean tablas grandes y conviene
+    # aplicarlas con python -m migrations.runner fuera del horario de uso
+    'auto_apply': False
+}
+
+# Escrituras masivas (execute_values / COPY)
+BULK = {
+    'page_size': 1000,      # filas por sentencia INSERT/UPDATE
+    'copy_threshold': 5000  # desde cuántas filas un INSERT sin RETURNING usa COPY
+}
+
+# Umbrales para el estado de stock de los productos. Se publican al iniciar
+# en parametros_inventario, de donde los lee el trigger de inventario.
+STOCK_THRESHOLDS = {
+    'stock_bajo': 10  # stock igual o menor se marca como 'stock bajo'
+}
+
+# Tamaño de página de los listados con carga al hacer scroll
+PAGINATION = {
+    'products_page_size': 200,
+    'movements_page_size': 200
+}
+
+# Búsqueda de productos mientras se escribe
+SEARCH = {
+    'limit': 100,       # resultados como máximo
+    'debounce_ms': 250  # espera tras la última tecla antes de buscar
+}
+
+# Catálogo de productos en memoria (models/catalog.py)
+CATALOG = {
+    'check_interval_s': 30  # cada cuánto se revisa si otra terminal cambió productos
+}
+
+# Miniaturas de productos (models/thumbnails.py). Requieren Pillow; sin él
+# las tablas se muestran sin imágenes.
+THUMBNAILS = {
+    'size': 40,            # lado máximo en píxeles
+    'workers': 2,          # hilos que decodifican y achican imágenes
+    'memory_items': 300,   # miniaturas en memoria (las menos usadas se descartan)
+    'max_upload_mb': 5,    # tamaño máximo de la imagen original
+    'debounce_ms': 120,    # espera tras un scroll antes de pedir las filas visibles
+    'cache_dir': os.path.join(os.path.expanduser("~"), ".inventario_usm", "miniaturas")
+}
@@ -4,11 +4,12 @@ from datetime import datetime
 from models.compras_models import PurchaseModel
 from views.compras_views import PurchaseView
 from models.export_manager import ExportManager
+from db_executor import run_async
 
 
 class PurchaseController:
     def __init__(self, frame, app):
-        self.model = PurchaseModel()
+        self.model = app.track_model(PurchaseModel())
         self.view = PurchaseView(frame, app)
         self.view.set_controller(self)
         self.app = app
@@ -21,11 +22,13 @@ class PurchaseController:
 
     def refresh_requests_table(self, status_filter="Todos", priority_filter="Todos"):
         """Actualiza la tabla de solicitudes"""
-        try:
-            data = self.model.get_all_requests(status_filter, priority_filter)
-            self.view.refresh_table(data)
-        except Exception as e:
-            self.view.show_message("Error", f"Error al cargar solicitudes: {e}", "error")
+        run_async(
+            self.app,
+            lambda: PurchaseModel.call(PurchaseModel.get_all_requests, status_filter, priority_filter),
+            on_success=self.view.refresh_table,
+            on_error=lambda e: self.view.show_message(
+                "Error", f"Error al cargar solicitudes: {e}", "error"),
+            channel="compras")
 
     def apply_requests_filters(self, status, priority):
         """Aplica los filtros seleccionados"""
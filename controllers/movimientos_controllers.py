@@ -1,5 +1,8 @@
-from models.movimientos_models import MovementModel
+from models.movimientos_models import MovementModel, parse_timestamp
+from models.catalog import product_catalog
 from models.export_manager import ExportManager
+from db_executor import run_async
+from config import PAGINATION
 
 
 class MovementController:
@@ -13,8 +16,17 @@ class MovementController:
         """
         self.model = MovementModel()
         self.app = app
+        if app is not None:
+            app.track_model(self.model)
         self.view = None
 
+        # Estado del historial: filtros vigentes, cursor de la última página
+        # pintada y si ya no quedan más
+        self._filters = {}
+        self._after = None
+        self._exhausted = False
+        self._loading_page = False
+
         if create_ui and frame:
             self._setup_view(frame)
 
@@ -28,16 +40,52 @@ class MovementController:
 
     def refresh_movements_table(self, movement_type="Todos", date_from=None, date_to=None):
         """Actualiza la tabla de movimientos con los filtros aplicados"""
-        try:
-            data = self.model.get_all_movements(
-                movement_type, date_from, date_to)
-            if self.view:
-                self.view.refresh_table(data)
-            return data
-        except Exception as e:
-            if self.view:
-                self.view.show_error(f"No se pudieron cargar los movimientos: {e}")
-            raise e
+        if not self.view:
+            return
+
+        self._filters = {
+            'movement_type': movement_type,
+            'date_from': date_from,
+            'date_to': date_to
+        }
+        self._after = None
+        self._exhausted = False
+        self._load_page(self.view.refresh_table)
+
+        run_async(
+            self.app,
+            lambda: MovementModel.call(MovementModel.get_movement_statistics,
+                                       movement_type, date_from, date_to),
+            on_success=self.view.show_summary,
+            on_error=lambda e: print(f"Error al calcular estadísticas: {e}"),
+            channel="movimientos_resumen")
+
+    def load_next_page(self):
+        """Pintar la página siguiente (la vista lo pide al acercarse al final)"""
+        if self.view and not self._loading_page and not self._exhausted:
+            self._load_page(self.view.append_rows)
+
+    def _load_page(self, show):
+        """Leer en segundo plano la página que sigue al cursor y pasarla a show"""
+        self._loading_page = True
+        after, filters = self._after, dict(self._filters)
+        limit = PAGINATION['movements_page_size']
+
+        def on_page(rows):
+            self._loading_page = False
+            self._exhausted = len(rows) < limit
+            if rows:
+                self._after = (rows[-1][1], rows[-1][0])
+            show(rows)
+
+        def on_error(e):
+            self._loading_page = False
+            self.view.show_error(f"No se pudieron cargar los movimientos: {e}")
+
+        run_async(
+            self.app,
+            lambda: MovementModel.call(MovementModel.get_movements_page, after, limit, **filters),
+            on_success=on_page, on_error=on_error, channel="movimientos")
 
     def register_movement(self, id_producto, tipo, cantidad, id_ubicacion=None, id_responsable=None, referencia=None):
         """Registra un movimiento en la base de datos"""
@@ -54,6 +102,81 @@ class MovementController:
                 self.view.show_error(f"No se pudo registrar el movimiento: {e}")
             return False
 
+    def show_stock_at(self):
+        """Ventana para consultar el stock a una fecha (todo el catálogo o un producto)"""
+        window, widgets = self.view.show_stock_at_window()
+
+        def consultar():
+            try:
+                instante = parse_timestamp(widgets['fecha'].get())
+            except ValueError as e:
+                self.view.show_error(str(e))
+                return
+
+            product_id = None
+            codigo = widgets['codigo'].get().strip()
+            if codigo:
+                producto = product_catalog.by_code(codigo)
+                if producto is None:
+                    self.view.show_error(f"No existe el producto con código {codigo}")
+                    return
+                product_id = producto.id_producto
+
+            run_async(
+                self.app, lambda: MovementModel.call(MovementModel.get_stock_at, instante, product_id),
+                on_success=lambda rows: self.view.fill_stock_at_table(widgets['tree'], rows),
+                on_error=lambda e: self.view.show_error(f"No se pudo calcular el stock: {e}"),
+                channel="stock_a_fecha")
+
+        widgets['consultar'].configure(command=consultar)
+        for entry in (widgets['fecha'], widgets['codigo']):
+            entry.bind("<Return>", lambda e: consultar())
+
+    def show_archive(self):
+        """Ventana de meses del historial para archivar o volver a adjuntar"""
+        window, widgets = self.view.show_archive_window()
+
+        def cargar():
+            run_async(
+                self.app, lambda: MovementModel.call(MovementModel.get_partitions),
+                on_success=lambda rows: self.view.fill_archive_table(widgets['tree'], rows),
+                on_error=lambda e: self.view.show_error(f"No se pudieron leer los meses: {e}"),
+                channel="archivo_movimientos")
+
+        def ejecutar(archivar):
+            mes = self.view.get_selected_month(widgets['tree'])
+            if mes is None:
+                self.view.show_info("Seleccione un mes")
+                return
+            if archivar and not self.view.confirm(
+                    f"Los movimientos de {mes:%m/%Y} dejarán de verse hasta restaurarlos. ¿Continuar?"):
+                return
+
+            def on_success(_):
+                for button in (widgets['archivar'], widgets['restaurar']):
+                    button.configure(state="normal")
+                self.view.show_success(
+                    f"Mes {mes:%m/%Y} {'archivado' if archivar else 'restaurado'} correctamente")
+                cargar()
+                self.refresh_movements_table(**self.view.get_filter_values())
+
+            def on_error(e):
+                for button in (widgets['archivar'], widgets['restaurar']):
+                    button.configure(state="normal")
+                self.view.show_error(f"No se pudo {'archivar' if archivar else 'restaurar'} el mes: {e}")
+
+            for button in (widgets['archivar'], widgets['restaurar']):
+                button.configure(state="disabled")
+            run_async(
+                self.app,
+                lambda: MovementModel.call(MovementModel.archive_partition if archivar
+                                           else MovementModel.restore_partition, mes),
+                on_success=on_success, on_error=on_error, channel="archivo_movimientos_accion")
+
+        widgets['archivar'].configure(command=lambda: ejecutar(True))
+        widgets['restaurar'].configure(command=lambda: ejecutar(False))
+        cargar()
+
     def get_product_name(self, product_id):
         """Obtiene el nombre de un producto por ID"""
         return self.model.get_product_name(product_id)
@@ -63,41 +186,21 @@ class MovementController:
         if not self.view:
             return None, "No hay vista disponible para exportar"
 
-        try:
-            # Obtener datos actuales de la vista
-            filtered_data = self.view.get_table_data()
-            
-            # Usar ExportManager para exportar
-            filename, error = ExportManager.export_movements(filtered_data)
+        # Leer los movimientos filtrados por bloques y escribir el archivo en
+        # segundo plano; el resultado llega a la vista al terminar
+        filters = self.view.get_filter_values()
 
+        def on_success(result):
+            filename, error = result
             if error:
                 self.view.show_error(f"Error al exportar: {error}")
             else:
                 self.view.show_success(f"Movimientos exportados en {filename}")
 
-            return filename, error
-
-        except Exception as e:
-            error_msg = f"Error al exportar movimientos: {str(e)}"
-            if self.view:
-                self.view.show_error(error_msg)
-            return None, error_msg
-
-    def get_movement_statistics(self, movement_type="Todos", date_from=None, date_to=None):
-        """Obtiene estadísticas de movimientos (ejemplo de lógica de negocio pura)"""
-        try:
-            data = self.model.get_all_movements(movement_type, date_from, date_to)
-            # Calcular estadísticas
-            total_entradas = sum(row[4] for row in data if row[2] == "Entrada")
-            total_salidas = sum(row[4] for row in data if row[2] == "Salida")
-            
-            return {
-                'total_movimientos': len(data),
-                'total_entradas': total_entradas,
-                'total_salidas': total_salidas,
-                'balance': total_entradas - total_salidas
-            }
-        except Exception as e:
-            if self.view:
-                self.view.show_error(f"Error al calcular estadísticas: {e}")
-            return None
\ No newline at end of file
+        run_async(
+            self.app,
+            lambda: ExportManager.export_movements_chunks(self.model.stream_movements(**filters)),
+            on_success=on_success,
+            on_error=lambda e: self.view.show_error(f"Error al exportar movimientos: {e}"),
+            channel="exportar_movimientos")
+        return None, None
\ No newline at end of file
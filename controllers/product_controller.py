@@ -1,17 +1,47 @@
+import os
 import tkinter as tk
 from tkinter import messagebox
 from models.product_model import ProductModel
 from views.product_view import ProductView
-from controllers.movimientos_controllers import MovementController
 from models.export_manager import ExportManager
+from models.import_manager import ImportManager
+from models.catalog import product_catalog
+from models.inventory_snapshot import InventorySnapshot
+from models.thumbnails import ThumbnailCache
+from db_executor import run_async
+from config import PAGINATION, THUMBNAILS
 
 class ProductController:
+    # Columnas que se pueden editar en la tabla y su campo en productos
+    EDITABLE_COLUMNS = {
+        "Producto": "nombre",
+        "Código": "codigo",
+        "Marca": "id_marca",
+        "Categoría": "id_categoria"
+    }
+
     def __init__(self, app):
         self.app = app
-        self.model = ProductModel()
+        self.model = app.track_model(ProductModel())
         self.view = ProductView(frame=None, app=app)
         self.view.set_controller(self)  # Conectar vista con controlador
 
+        # Estado del listado: el inventario filtrado y ordenado en memoria
+        # (posiciones dentro del snapshot) y cuántas filas se pintaron
+        self._page_filter = ("", ())  # mismo filtro en SQL, para exportar
+        self._snapshot = None
+        self._positions = None  # None = se muestran resultados de búsqueda
+        self._shown = 0
+        self._search_rows = []
+        self._sort = (None, False)
+        self._loading_page = False
+
+        # Ediciones en la tabla pendientes de guardar: id -> {columna: valor},
+        # y el producto tal como se leyó (para detectar conflictos al guardar)
+        self._edits = {}
+        self._edit_base = {}
+        self.view.pending_edits = self._edits
+
     def show_inventory(self):
         """Mostrar gestión de inventario"""
         from helpers import clear_frame
@@ -47,16 +77,118 @@ class ProductController:
 
     def refresh_table(self):
         """Refrescar tabla de productos"""
-        try:
-            inventario_data = self.model.update_product_stock_status()
-            formatted_data = self._format_table_data(inventario_data)
-            self.view.refresh_table(formatted_data)
-
+        def on_loaded():
             if hasattr(self.app, 'notification_manager'):
                 self.app.notification_manager.check_low_stock()
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar datos: {e}")
+        self._load_snapshot(on_loaded)
+
+    def _load_snapshot(self, on_loaded=None):
+        """Leer el inventario (solo si cambió su versión) y pintarlo con los filtros actuales.
+
+        Mientras se arma el inventario en memoria, la primera página sale de
+        la base por keyset (get_products_page), que cuesta lo mismo sin
+        importar el tamaño del inventario; al llegar el inventario se sigue
+        en memoria sin volver a pintar esas filas.
+        """
+        self._loading_page = True
+        first_page = {'ids': None}
+
+        def on_first_page(rows):
+            # Si el inventario en memoria llegó antes, esta página sobra
+            if first_page['ids'] is None and self._loading_page:
+                self._positions = ()
+                self.view.refresh_table(self._format_table_data(rows))
+                first_page['ids'] = [row[0] for row in rows]
+
+        def on_snapshot(snapshot):
+            self._snapshot = snapshot
+            self._loading_page = False
+            if self.view.get_search_term():
+                self.search_products()
+            else:
+                self._show_snapshot(first_page['ids'])
+            first_page['ids'] = ()
+            if on_loaded:
+                on_loaded()
+
+        if (self._sort[0] is None and not self.view.get_search_term()
+                and product_catalog.fresh_columns() is None):
+            extra, params = self._filter_clause(self.view.get_filters())
+            run_async(
+                self.app,
+                lambda: ProductModel.call(ProductModel.get_products_page, None, None, extra, params),
+                on_success=on_first_page,
+                on_error=lambda e: print(f"Error al cargar la primera página: {e}"),
+                channel="inventario_pagina")
+
+        run_async(
+            self.app, product_catalog.columns,
+            on_success=on_snapshot,
+            on_error=lambda e: self._on_page_error(f"Error al cargar datos: {e}"),
+            channel="inventario")
+
+    def _show_snapshot(self, painted_ids=None):
+        """Filtrar y ordenar en memoria y pintar la primera página.
+
+        painted_ids son los productos que ya se pintaron desde la base: si
+        coinciden con el comienzo del listado en memoria no se repintan.
+        """
+        filters = self.view.get_filters()
+        self._page_filter = self._filter_clause(filters)
+
+        positions = self._snapshot.filter(
+            categoria=None if filters['categoria'] == "Todas" else filters['categoria'],
+            marca=None if filters['marca'] == "Todas" else filters['marca'],
+            estado=None if filters['estado'] == "Todos" else self._estado_value(filters['estado']))
+        column, descending = self._sort
+        self._positions = self._snapshot.sort(positions, column, descending)
+
+        if painted_ids:
+            head = self._snapshot.ids[self._positions[:len(painted_ids)]].tolist()
+            if head == painted_ids:
+                self._shown = len(painted_ids)
+                return
+        self._shown = 0
+        self.view.refresh_table(self._next_rows())
+
+    def _next_rows(self):
+        """Filas de la página siguiente del listado en memoria"""
+        page = self._positions[self._shown:self._shown + PAGINATION['products_page_size']]
+        self._shown += len(page)
+        return self._snapshot.take(page)
+
+    def load_next_page(self):
+        """Pintar la página siguiente (la vista lo pide al acercarse al final)"""
+        if self._loading_page or self._positions is None or self._shown >= len(self._positions):
+            return
+        self.view.append_rows(self._next_rows())
+
+    def sort_by(self, column):
+        """Ordenar el listado por una columna (un segundo clic invierte el orden)"""
+        current, descending = self._sort
+        descending = not descending if current == column else False
+        self._sort = (column, descending)
+
+        if self._loading_page:
+            # Se aplica al llegar el inventario en memoria
+            return
+        if self._positions is not None:
+            self._positions = self._snapshot.sort(self._positions, column, descending)
+            self._shown = 0
+            self.view.refresh_table(self._next_rows())
+        else:
+            index = InventorySnapshot.COLUMNS.index(column)
+            if column in ("Nro", "Stock"):
+                key = lambda r: r[index]
+            else:
+                key = lambda r: str(r[index]).casefold()
+            self.view.refresh_table(sorted(self._search_rows, key=key, reverse=descending))
+
+    def _on_page_error(self, message):
+        """Mostrar un error de carga del listado"""
+        self._loading_page = False
+        messagebox.showerror("Error", message)
 
     def _format_table_data(self, inventario_data):
         """Formatear datos para la tabla"""
@@ -78,48 +210,80 @@ class ProductController:
         """Buscar productos"""
         try:
             search_term = self.view.get_search_term()
-            filters = self.view.get_filters()
-
-            extra = " AND (p.nombre ILIKE %s OR p.codigo ILIKE %s)"
-            params = [f"%{search_term}%", f"%{search_term}%"]
-
-            if filters['categoria'] != "Todas":
-                extra += " AND c.nombre = %s"
-                params.append(filters['categoria'])
-
-            if filters['estado'] != "Todos":
-                extra += " AND i.estado_stock = %s"
-                params.append(filters['estado'].lower() if filters['estado'] != "Stock bajo" else "stock bajo")
+            if not search_term:
+                self.apply_filters()
+                return
 
-            inventario_data = self.model.get_products(extra, tuple(params))
-            formatted_data = self._format_table_data(inventario_data)
-            self.view.refresh_table(formatted_data)
+            extra, params = self._filter_clause(self.view.get_filters())
+            # Sin paginación: la búsqueda trae los más relevantes primero
+            # (la exportación usa el mismo criterio sin el orden por relevancia)
+            pattern = ProductModel.like_pattern(search_term)
+            self._page_filter = (
+                extra + " AND (lower(f_unaccent(p.nombre)) LIKE f_unaccent(%s) OR lower(p.codigo) LIKE %s)",
+                params + (pattern, pattern))
+            self._loading_page = True
+
+            run_async(
+                self.app, self._fetch_search, search_term, extra, params,
+                on_success=self._on_search_loaded,
+                on_error=lambda e: self._on_page_error(f"Error al buscar productos: {e}"),
+                channel="inventario")
 
         except Exception as e:
             messagebox.showerror("Error", f"Error al buscar productos: {e}")
 
+    def _fetch_search(self, term, extra, params):
+        """Buscar productos por relevancia (en segundo plano)"""
+        return ProductModel.call(ProductModel.search_products, term, extra, params)
+
+    def _on_search_loaded(self, rows):
+        """Pintar los resultados de búsqueda (sin paginación, por relevancia)"""
+        self._loading_page = False
+        self._positions = None
+        self._search_rows = self._format_table_data(rows)
+        self.view.refresh_table(self._search_rows)
+
     def apply_filters(self):
         """Aplicar filtros a la tabla"""
         try:
-            filters = self.view.get_filters()
+            if self.view.get_search_term():
+                self.search_products()
+                return
 
-            extra = ""
-            params = []
+            # Con el inventario en memoria y vigente no se consulta la base
+            snapshot = product_catalog.fresh_columns()
+            if snapshot is None:
+                self._load_snapshot()
+                return
+            self._snapshot = snapshot
+            self._show_snapshot()
 
-            if filters['categoria'] != "Todas":
-                extra += " AND c.nombre = %s"
-                params.append(filters['categoria'])
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al aplicar filtros: {e}")
 
-            if filters['estado'] != "Todos":
-                extra += " AND i.estado_stock = %s"
-                params.append(filters['estado'].lower() if filters['estado'] != "Stock bajo" else "stock bajo")
+    def _filter_clause(self, filters):
+        """Armar la condición SQL y sus parámetros para los filtros de la vista"""
+        extra = ""
+        params = []
 
-            inventario_data = self.model.get_products(extra, tuple(params))
-            formatted_data = self._format_table_data(inventario_data)
-            self.view.refresh_table(formatted_data)
+        if filters['categoria'] != "Todas":
+            extra += " AND c.nombre = %s"
+            params.append(filters['categoria'])
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al aplicar filtros: {e}")
+        if filters['marca'] != "Todas":
+            extra += " AND m.nombre = %s"
+            params.append(filters['marca'])
+
+        if filters['estado'] != "Todos":
+            extra += " AND i.estado_stock = %s"
+            params.append(self._estado_value(filters['estado']))
+
+        return extra, tuple(params)
+
+    @staticmethod
+    def _estado_value(estado):
+        """Valor de estado_stock para la opción del combo de estado"""
+        return estado.lower() if estado != "Stock bajo" else "stock bajo"
 
     def new_product(self):
         """Crear nuevo producto"""
@@ -128,35 +292,22 @@ class ProductController:
     def show_product_form(self, product_id=None):
         """Mostrar formulario de producto"""
         try:
-            # Obtener datos activos
-            marcas = self.model.get_combobox_data("marcas")
-            categorias = self.model.get_combobox_data("categorias")
-            ubicaciones = self.model.get_combobox_data("ubicaciones")
-
-            # Si es edición, obtener también la relación actual aunque esté inactiva
+            # Si es edición, incluir la relación actual aunque esté inactiva
+            producto_data = None
+            marca_ids = categoria_ids = ubicacion_ids = ()
             if product_id:
-                producto_data = self.model.get_product_data(product_id)
+                producto_data = self.model.get_product_form_data(product_id)
+                if not producto_data:
+                    raise Exception("Producto no encontrado")
                 # producto_data: (id_producto, codigo, nombre, id_marca, id_categoria, stock, id_ubicacion, estado_stock)
-                id_marca = producto_data[3]
-                id_categoria = producto_data[4]
-                id_ubicacion = producto_data[6]
-
-                # Buscar si la relación actual está en los activos, si no, agregarla
-                if id_marca and not any(m[0] == id_marca for m in marcas):
-                    self.model.cursor.execute("SELECT id_marca, nombre FROM marcas WHERE id_marca = %s", (id_marca,))
-                    inactiva = self.model.cursor.fetchone()
-                    if inactiva:
-                        marcas.append(inactiva)
-                if id_categoria and not any(c[0] == id_categoria for c in categorias):
-                    self.model.cursor.execute("SELECT id_categoria, nombre FROM categorias WHERE id_categoria = %s", (id_categoria,))
-                    inactiva = self.model.cursor.fetchone()
-                    if inactiva:
-                        categorias.append(inactiva)
-                if id_ubicacion and not any(u[0] == id_ubicacion for u in ubicaciones):
-                    self.model.cursor.execute("SELECT id_ubicacion, nombre FROM ubicaciones WHERE id_ubicacion = %s", (id_ubicacion,))
-                    inactiva = self.model.cursor.fetchone()
-                    if inactiva:
-                        ubicaciones.append(inactiva)
+                marca_ids = (producto_data[3],)
+                categoria_ids = (producto_data[4],)
+                ubicacion_ids = (producto_data[6],)
+
+            # Opciones desde el registro en memoria (sin consultar la base)
+            marcas = self.model.get_combobox_data("marcas", marca_ids)
+            categorias = self.model.get_combobox_data("categorias", categoria_ids)
+            ubicaciones = self.model.get_combobox_data("ubicaciones", ubicacion_ids)
 
             form_window, entries, buttons, save_btn = self.view.show_product_form(product_id)
 
@@ -172,19 +323,15 @@ class ProductController:
             save_btn.configure(command=lambda: self.save_product(
                 entries, product_id, marcas, categorias, ubicaciones, form_window))
 
-            if product_id:
-                self.load_product_data(product_id, entries, marcas, categorias, ubicaciones)
+            if producto_data:
+                self.load_product_data(producto_data, entries, marcas, categorias, ubicaciones)
 
         except Exception as e:
             messagebox.showerror("Error", f"Error al cargar formulario: {e}")
 
-    def load_product_data(self, product_id, entries, marcas, categorias, ubicaciones):
+    def load_product_data(self, producto_data, entries, marcas, categorias, ubicaciones):
         """Cargar datos de producto en formulario"""
         try:
-            producto_data = self.model.get_product_data(product_id)
-            if not producto_data:
-                raise Exception("Producto no encontrado")
-
             entries["Código:"].insert(0, producto_data[1])
             entries["Producto:"].insert(0, producto_data[2])
 
@@ -258,11 +405,9 @@ class ProductController:
                 'estado': estado
             }
 
-            # Guardar producto
-            saved_id = self.model.save_product(product_data, product_id)
-
-            # Registrar movimiento
-            self._register_product_movement(product_id, saved_id, int(stock_txt), ubicacion_id)
+            # Guardar producto (el movimiento de stock va en la misma transacción)
+            current_user = getattr(self.app, 'current_user', None)
+            self.model.save_product(product_data, product_id, getattr(current_user, 'id', None))
 
             messagebox.showinfo("Éxito", "Producto guardado correctamente")
             window.destroy()
@@ -291,41 +436,6 @@ class ProductController:
 
         return True
 
-    def _register_product_movement(self, product_id, saved_id, stock, ubicacion_id):
-        """Registrar movimiento de producto"""
-        movement_controller = MovementController(None, self.app, create_ui=False)
-        current_user = getattr(self.app, 'current_user', None)
-        current_user_id = getattr(current_user, 'id', None)
-
-        if product_id:  # Edición
-            old_stock = self.model.get_old_stock(product_id)
-            # Si old_stock es None, tratarlo como 0
-            old_stock = old_stock if old_stock is not None else 0
-            stock_diff = stock - old_stock
-            
-            if stock_diff != 0:
-                movement_type = "Entrada" if stock_diff > 0 else "Salida"
-                movement_controller.register_movement(
-                    id_producto=product_id,
-                    tipo=movement_type,
-                    cantidad=abs(stock_diff),
-                    id_ubicacion=ubicacion_id,
-                    id_responsable=current_user_id,
-                    referencia="Edición de stock inicial"  # Corregido - sin tilde
-                )
-        else:  # Nuevo producto
-            try:
-                movement_controller.register_movement(
-                    id_producto=saved_id,
-                    tipo="Entrada",
-                    cantidad=stock,
-                    id_ubicacion=ubicacion_id,
-                    id_responsable=current_user_id,
-                    referencia="Producto nuevo"
-                )
-            except Exception as e:
-                messagebox.showwarning("Advertencia", f"Producto creado pero no se pudo registrar el movimiento: {e}")
-
     def edit_selected_product(self):
         """Editar producto seleccionado"""
         selected = self.view.get_selected_product()
@@ -336,6 +446,165 @@ class ProductController:
         product_id = selected['tags'][0]
         self.show_product_form(product_id)
 
+    # ===== EDICIÓN EN LA TABLA =====
+
+    def toggle_edit_mode(self):
+        """Entrar o salir del modo de edición en la tabla"""
+        if self.view.edit_mode and self._edits:
+            if not messagebox.askyesno("Confirmar", "Hay cambios sin guardar. ¿Desea descartarlos?"):
+                return
+            self.discard_edits()
+        self.view.set_edit_mode(not self.view.edit_mode)
+
+    def edit_options(self, column):
+        """Valores de una celda editable: None si no se edita, () si es texto libre"""
+        if column not in self.EDITABLE_COLUMNS:
+            return None
+        if column == "Marca":
+            return [nombre for _, nombre in self.model.get_combobox_data("marcas")]
+        if column == "Categoría":
+            return [nombre for _, nombre in self.model.get_combobox_data("categorias")]
+        return ()
+
+    def edit_cell(self, product_id, column, value):
+        """Anotar la edición de una celda en el conjunto de cambios (False si no es válida)"""
+        product_id = int(product_id)
+        value = value.strip()
+
+        base = self._edit_base.get(product_id)
+        if base is None:
+            base = ((self._snapshot.product(product_id) if self._snapshot else None)
+                    or product_catalog.get(product_id))
+        if base is None:
+            messagebox.showerror("Error", "El producto ya no existe")
+            return False
+        if not self._validate_cell(product_id, column, value):
+            return False
+
+        edits = self._edits.setdefault(product_id, {})
+        self._edit_base[product_id] = base
+        if value == (self._base_value(base, column) or ""):
+            edits.pop(column, None)
+        else:
+            edits[column] = value
+        if not edits:
+            del self._edits[product_id]
+            del self._edit_base[product_id]
+
+        self.view.set_pending_count(len(self._edits))
+        return True
+
+    @staticmethod
+    def _base_value(product, column):
+        return {
+            "Producto": product.nombre,
+            "Código": product.codigo,
+            "Marca": product.marca,
+            "Categoría": product.categoria
+        }[column]
+
+    def _validate_cell(self, product_id, column, value):
+        """Mismas reglas que el formulario, para una sola celda"""
+        if not value:
+            messagebox.showwarning("Campo requerido", f"El campo {column} no puede quedar vacío.")
+            return False
+
+        if column == "Código":
+            if not value.replace("-", "").isalnum():
+                messagebox.showerror("Código inválido", "El código solo debe contener letras, números y guiones.")
+                return False
+            other = product_catalog.by_code(value)
+            taken = other is not None and other.id_producto != product_id
+            taken = taken or any(
+                edits.get("Código", "").lower() == value.lower()
+                for other_id, edits in self._edits.items() if other_id != product_id)
+            if taken:
+                messagebox.showerror("Código repetido", f"El código {value} ya está en uso.")
+                return False
+
+        elif column == "Producto":
+            if not all(c.isalnum() or c.isspace() for c in value):
+                messagebox.showerror("Nombre inválido", "El nombre del producto solo debe contener letras, números y espacios.")
+                return False
+
+        elif value not in self.edit_options(column):
+            messagebox.showerror("Valor inválido", f"Seleccione una {column.lower()} de la lista.")
+            return False
+
+        return True
+
+    def save_edits(self):
+        """Guardar todas las ediciones de la tabla en una sola transacción"""
+        if not self._edits:
+            messagebox.showinfo("Información", "No hay cambios para guardar")
+            return
+
+        changes = []
+        for product_id, edits in self._edits.items():
+            base = self._edit_base[product_id]
+            antes, despues = {}, {}
+            for column, value in edits.items():
+                field = self.EDITABLE_COLUMNS[column]
+                if column == "Marca":
+                    antes[field] = base.id_marca
+                    despues[field] = self.model.get_id_by_name("marcas", value)
+                elif column == "Categoría":
+                    antes[field] = base.id_categoria
+                    despues[field] = self.model.get_id_by_name("categorias", value)
+                else:
+                    antes[field] = self._base_value(base, column)
+                    despues[field] = value
+            changes.append((product_id, antes, despues))
+
+        names = {product_id: base.nombre for product_id, base in self._edit_base.items()}
+        self.view.set_saving(True)
+
+        def listado(items):
+            text = "\n".join(f"• {item}" for item in items[:15])
+            if len(items) > 15:
+                text += f"\n... y {len(items) - 15} más"
+            return text
+
+        def on_success(result):
+            updated, conflicts, rejected = result
+            self.view.set_saving(False)
+            # Los conflictos y rechazos se descartan: hay que volver a editarlos
+            self._edits.clear()
+            self._edit_base.clear()
+            self.view.set_pending_count(0)
+
+            message = f"Se guardaron los cambios de {len(updated)} productos"
+            if conflicts:
+                message += (f"\n\n{len(conflicts)} productos se modificaron en otra terminal "
+                            f"y sus cambios no se guardaron:\n"
+                            f"{listado([names[product_id] for product_id in conflicts])}")
+            if rejected:
+                message += (f"\n\n{len(rejected)} productos se rechazaron:\n"
+                            f"{listado([f'{names[product_id]}: {motivo}' for product_id, motivo in rejected])}")
+            if conflicts or rejected:
+                messagebox.showwarning("Cambios no guardados", message)
+            else:
+                messagebox.showinfo("Éxito", message)
+            self.refresh_table()
+
+        def on_error(e):
+            self.view.set_saving(False)
+            messagebox.showerror("Error", f"No se pudieron guardar los cambios: {e}")
+
+        run_async(
+            self.app, lambda: ProductModel.call(ProductModel.update_products_batch, changes),
+            on_success=on_success, on_error=on_error, channel="edicion_tabla")
+
+    def discard_edits(self):
+        """Descartar las ediciones pendientes y volver a pintar el listado"""
+        self._edits.clear()
+        self._edit_base.clear()
+        self.view.set_pending_count(0)
+        if self.view.get_search_term():
+            self.search_products()
+        elif self._snapshot is not None:
+            self._show_snapshot()
+
     def delete_selected_product(self):
         """Eliminar producto seleccionado"""
         selected = self.view.get_selected_product()
@@ -375,21 +644,9 @@ class ProductController:
                 messagebox.showerror("Error", "Ingrese una cantidad válida (número positivo)")
                 return
 
-            self.model.add_stock(product_id, quantity)
-
-            # Registrar movimiento
-            ubicacion_id = self.model.get_ubicacion_id(product_id)
-            movement_controller = MovementController(None, self.app, create_ui=False)
+            # Stock y movimiento en una sola transacción
             current_user = getattr(self.app, 'current_user', None)
-            current_user_id = getattr(current_user, 'id', None)
-            movement_controller.register_movement(
-                id_producto=product_id,
-                tipo="Entrada",
-                cantidad=int(quantity),
-                id_ubicacion=ubicacion_id,
-                id_responsable=current_user_id,
-                referencia="Entrada de stock"
-            )
+            self.model.add_stock_batch([(product_id, quantity)], getattr(current_user, 'id', None))
 
             messagebox.showinfo("Éxito", "Stock actualizado correctamente")
             window.destroy()
@@ -398,6 +655,236 @@ class ProductController:
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo actualizar el stock: {e}")
 
+    def image_hash(self, product_id):
+        """Hash de la imagen de un producto (o None), sin consultar la base"""
+        product = product_catalog.get(int(product_id), fresh=False)
+        return product.imagen if product else None
+
+    def set_product_image(self):
+        """Asignar una imagen al producto seleccionado"""
+        selected = self.view.get_selected_product()
+        if not selected:
+            messagebox.showwarning("Advertencia", "Seleccione un producto primero")
+            return
+
+        product_id = selected['tags'][0]
+        path = self.view.ask_image_file()
+        if not path:
+            return
+
+        try:
+            if os.path.getsize(path) > THUMBNAILS['max_upload_mb'] * 1024 * 1024:
+                messagebox.showerror(
+                    "Error", f"La imagen no puede superar {THUMBNAILS['max_upload_mb']} MB")
+                return
+            with open(path, "rb") as f:
+                data = f.read()
+            ThumbnailCache.check_image(data)
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo leer la imagen: {e}")
+            return
+
+        image_hash = ThumbnailCache.content_hash(data)
+
+        def on_success(_):
+            messagebox.showinfo("Éxito", "Imagen del producto actualizada")
+            self.refresh_table()
+
+        run_async(
+            self.app, lambda: ProductModel.call(ProductModel.set_product_image,
+                                              product_id, data, image_hash),
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Error", f"No se pudo guardar la imagen: {e}"),
+            channel="imagen_producto")
+
+    def show_transfer_form(self):
+        """Mostrar formulario para mover stock entre ubicaciones"""
+        selected = self.view.get_selected_product()
+        if not selected:
+            messagebox.showwarning("Advertencia", "Seleccione un producto primero")
+            return
+
+        product_id = selected['tags'][0]
+        product_name = selected['values'][1]
+        origenes = self.model.get_product_locations(product_id)
+        destinos = self.model.get_combobox_data('ubicaciones')
+
+        form_window, widgets = self.view.show_transfer_form(product_name, origenes, destinos)
+        widgets['transferir'].configure(command=lambda: self.transfer_stock(
+            product_id, origenes, destinos, widgets, form_window))
+
+    def transfer_stock(self, product_id, origenes, destinos, widgets, window):
+        """Transferir stock de una ubicación a otra"""
+        origen = widgets['origen'].current()
+        destino = widgets['destino'].current()
+        quantity = widgets['cantidad'].get().strip()
+
+        if origen < 0 or destino < 0:
+            messagebox.showerror("Error", "Seleccione la ubicación de origen y la de destino")
+            return
+        if not quantity.isdigit() or int(quantity) <= 0:
+            messagebox.showerror("Error", "Ingrese una cantidad válida (número positivo)")
+            return
+
+        desde, _, disponible = origenes[origen]
+        hacia = destinos[destino][0]
+        if int(quantity) > disponible:
+            messagebox.showerror("Error", f"Solo hay {disponible} unidades en el origen")
+            return
+
+        try:
+            current_user = getattr(self.app, 'current_user', None)
+            self.model.transfer_stock(product_id, desde, hacia, quantity,
+                                      getattr(current_user, 'id', None))
+            messagebox.showinfo("Éxito", "Stock transferido correctamente")
+            window.destroy()
+            self.refresh_table()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo transferir el stock: {e}")
+
+    def show_stock_intake(self):
+        """Mostrar la pantalla de entrada de stock de varios productos"""
+        try:
+            productos = product_catalog.products()
+        except Exception as e:
+            messagebox.showerror("Error", f"Error al cargar productos: {e}")
+            return
+
+        opciones = {f"{p.codigo} - {p.nombre}": p for p in productos}
+        form_window, widgets = self.view.show_stock_intake_form(list(opciones))
+        pendientes = {}  # id_producto -> [producto, cantidad]
+
+        def agregar():
+            producto = opciones.get(widgets['producto'].get())
+            cantidad = widgets['cantidad'].get().strip()
+            if not producto:
+                messagebox.showwarning("Advertencia", "Seleccione un producto", parent=form_window)
+                return
+            if not cantidad.isdigit() or int(cantidad) <= 0:
+                messagebox.showerror("Error", "Ingrese una cantidad válida (número positivo)",
+                                     parent=form_window)
+                return
+            item = pendientes.setdefault(producto.id_producto, [producto, 0])
+            item[1] += int(cantidad)
+            self.view.set_intake_row(widgets['tabla'], producto.id_producto,
+                                     (producto.codigo, producto.nombre, producto.stock, item[1]))
+            widgets['cantidad'].delete(0, "end")
+            widgets['producto'].focus_set()
+
+        def quitar():
+            for iid in widgets['tabla'].selection():
+                pendientes.pop(int(iid), None)
+                widgets['tabla'].delete(iid)
+
+        def registrar():
+            if not pendientes:
+                messagebox.showwarning("Advertencia", "No hay productos en la entrada",
+                                       parent=form_window)
+                return
+            items = [(product_id, item[1]) for product_id, item in pendientes.items()]
+            self._apply_stock_batch(items, form_window, widgets['registrar'])
+
+        widgets['agregar'].configure(command=agregar)
+        widgets['quitar'].configure(command=quitar)
+        widgets['registrar'].configure(command=registrar)
+        widgets['cantidad'].bind("<Return>", lambda e: agregar())
+
+    def show_scan_mode(self):
+        """Mostrar el modo escáner: cada lectura suma una unidad a la entrada pendiente"""
+        # Dejar el índice de códigos cargado antes de la primera lectura
+        run_async(self.app, product_catalog.warm, channel="catalogo", replace=False)
+
+        form_window, widgets = self.view.show_scan_form()
+        pendientes = {}  # id_producto -> [producto, cantidad]
+
+        def on_scan(event=None):
+            code = widgets['codigo'].get().strip()
+            widgets['codigo'].delete(0, "end")
+            if not code:
+                return "break"
+
+            # Búsqueda O(1) en el índice de códigos, sin consultar la base
+            producto = product_catalog.by_code(code, fresh=False)
+            if producto is None or not producto.activo:
+                self.app.bell()
+                self.view.set_scan_status(widgets['estado'], f"Código no encontrado: {code}", error=True)
+                return "break"
+
+            cantidad = widgets['cantidad'].get().strip()
+            cantidad = int(cantidad) if cantidad.isdigit() and int(cantidad) > 0 else 1
+            item = pendientes.setdefault(producto.id_producto, [producto, 0])
+            item[1] += cantidad
+            self.view.set_intake_row(widgets['tabla'], producto.id_producto,
+                                     (producto.codigo, producto.nombre, producto.stock, item[1]))
+            total = sum(i[1] for i in pendientes.values())
+            self.view.set_scan_status(
+                widgets['estado'],
+                f"{producto.nombre}: {item[1]}  |  {total} unidades en {len(pendientes)} productos")
+            return "break"
+
+        def quitar():
+            for iid in widgets['tabla'].selection():
+                pendientes.pop(int(iid), None)
+                widgets['tabla'].delete(iid)
+            widgets['codigo'].focus_set()
+
+        def limpiar(updated):
+            pendientes.clear()
+            widgets['tabla'].delete(*widgets['tabla'].get_children())
+            self.view.set_scan_status(widgets['estado'], "Entrada registrada. Escanee el siguiente código")
+            widgets['codigo'].focus_set()
+
+        def registrar():
+            if not pendientes:
+                messagebox.showwarning("Advertencia", "No hay lecturas pendientes", parent=form_window)
+                return
+            items = [(product_id, item[1]) for product_id, item in pendientes.items()]
+            self._apply_stock_batch(items, form_window, widgets['registrar'],
+                                    referencia="Entrada por escáner", on_done=limpiar)
+
+        def cerrar():
+            if pendientes and not messagebox.askyesno(
+                    "Confirmar", "Hay lecturas sin registrar. ¿Cerrar de todos modos?",
+                    parent=form_window):
+                return
+            form_window.destroy()
+
+        widgets['codigo'].bind("<Return>", on_scan)
+        widgets['codigo'].bind("<KP_Enter>", on_scan)
+        widgets['quitar'].configure(command=quitar)
+        widgets['registrar'].configure(command=registrar)
+        widgets['cerrar'].configure(command=cerrar)
+        form_window.protocol("WM_DELETE_WINDOW", cerrar)
+
+    def _apply_stock_batch(self, items, window, button, referencia="Entrada de stock",
+                           on_done=None):
+        """Registrar en segundo plano una entrada de varios productos"""
+        current_user = getattr(self.app, 'current_user', None)
+        current_user_id = getattr(current_user, 'id', None)
+        button.configure(state="disabled")
+
+        def on_success(updated):
+            button.configure(state="normal")
+            missing = len(items) - len(updated)
+            message = f"Stock actualizado en {len(updated)} productos"
+            if missing:
+                message += f"\n{missing} productos no tienen registro de inventario y no se actualizaron"
+            messagebox.showinfo("Éxito", message, parent=window)
+            if on_done:
+                on_done(updated)
+            else:
+                window.destroy()
+            self.refresh_table()
+
+        def on_error(e):
+            button.configure(state="normal")
+            messagebox.showerror("Error", f"No se pudo actualizar el stock: {e}", parent=window)
+
+        run_async(
+            self.app,
+            lambda: ProductModel.call(ProductModel.add_stock_batch, items, current_user_id, referencia),
+            on_success=on_success, on_error=on_error, channel="entrada_stock")
+
     def add_new_value(self, table):
         """Agregar nuevo valor a tabla relacionada"""
         form_window, entry, save_btn = self.view.show_new_value_form(table)
@@ -430,23 +917,76 @@ class ProductController:
 
     def export_inventory(self):
         """Exportar inventario a CSV"""
-        try:
-            # Obtener datos actuales de la tabla
-            filtered_data = []
-            for item in self.view.tree.get_children():
-                row_data = self.view.tree.item(item)['values']
-                filtered_data.append(row_data)
-
-            filename, error = ExportManager.export_inventory(filtered_data)
+        # La tabla solo tiene las páginas vistas: leer todo el filtro actual.
+        # La lectura y el archivo se hacen en segundo plano.
+        extra, params = self._page_filter
 
+        def on_success(result):
+            filename, error = result
             if error:
                 messagebox.showerror("Error", f"Error al exportar: {error}")
             else:
                 messagebox.showinfo("Éxito", f"Inventario exportado en {filename}")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al exportar inventario: {str(e)}")
+        run_async(
+            self.app,
+            lambda: ExportManager.export_inventory_chunks(
+                self._numbered_chunks(self.model.stream_products(extra, params))),
+            on_success=on_success,
+            on_error=lambda e: messagebox.showerror("Error", f"Error al exportar inventario: {e}"),
+            channel="exportar_inventario")
             
+    def import_products(self):
+        """Importar productos desde un archivo Excel/CSV"""
+        path = self.view.ask_import_file()
+        if not path:
+            return
+
+        current_user = getattr(self.app, 'current_user', None)
+        current_user_id = getattr(current_user, 'id', None)
+
+        run_async(
+            self.app, self._run_import, path, current_user_id,
+            on_success=self._on_import_done,
+            on_error=lambda e: messagebox.showerror("Error", f"No se pudo importar: {e}"),
+            channel="importacion")
+
+    def _run_import(self, path, current_user_id):
+        """Leer, validar y cargar el archivo (en segundo plano)"""
+        df = ImportManager.read_products_file(path)
+        valid, rejected = ImportManager.validate_products(df)
+
+        rows = [(fila,) + tuple(row) for fila, row in zip(valid.index, valid.itertuples(index=False))]
+        imported, db_rejected = ProductModel.call(ProductModel.import_products, rows, current_user_id)
+
+        rejected = ImportManager.merge_rejected(df, rejected, db_rejected)
+        report = None
+        if len(rejected):
+            report, error = ImportManager.export_rejected_products(rejected)
+            if error:
+                print(f"Error al exportar filas rechazadas: {error}")
+        return imported, len(rejected), report
+
+    def _on_import_done(self, result):
+        """Informar el resultado de la importación"""
+        imported, rejected, report = result
+        message = f"Productos importados: {imported}\nFilas rechazadas: {rejected}"
+        if report:
+            message += f"\n\nDetalle de rechazos en {report}"
+        messagebox.showinfo("Importación", message)
+        self.refresh_table()
+        self.refresh_comboboxes()
+
+    def _numbered_chunks(self, chunks):
+        """Formatear bloques de productos como filas de la tabla (con Nro)"""
+        nro = 0
+        for rows in chunks:
+            formatted = []
+            for item in self._format_table_data(rows):
+                nro += 1
+                formatted.append((nro,) + tuple(item[1:]))
+            yield formatted
+
     def refresh_comboboxes(self):
         """Refrescar todos los combobox con datos actualizados"""
         try:
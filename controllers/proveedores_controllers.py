@@ -3,11 +3,12 @@ from tkinter import ttk, messagebox
 from models.proveedores_models import SupplierModel
 from views.proveedores_views import SupplierView
 from models.export_manager import ExportManager
+from db_executor import run_async
 
 
 class SupplierController:
     def __init__(self, frame, app):
-        self.model = SupplierModel()
+        self.model = app.track_model(SupplierModel())
         self.view = SupplierView(frame, app)
         self.view.set_controller(self)
         self.app = app
@@ -20,12 +21,13 @@ class SupplierController:
 
     def refresh_suppliers_table(self, category_filter="Todas", rating_filter="Todas", price_filter="Todos"):
         """Actualiza la tabla de proveedores"""
-        try:
-            data = self.model.get_all_suppliers(
-                category_filter, rating_filter, price_filter)
-            self.view.refresh_table(data)
-        except Exception as e:
-            messagebox.showerror("Error", f"Error al cargar proveedores: {e}")
+        run_async(
+            self.app,
+            lambda: SupplierModel.call(SupplierModel.get_all_suppliers,
+                                       category_filter, rating_filter, price_filter),
+            on_success=self.view.refresh_table,
+            on_error=lambda e: messagebox.showerror("Error", f"Error al cargar proveedores: {e}"),
+            channel="proveedores")
 
     def apply_suppliers_filters(self, category, rating, price):
         """Aplica los filtros seleccionados"""
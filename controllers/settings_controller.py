@@ -8,7 +8,7 @@ from views.settings_views import SettingsView
 class SettingsController:
     def __init__(self, app):
         self.app = app
-        self.model = SettingsModel()
+        self.model = app.track_model(SettingsModel())
         self.view = SettingsView(app)
         self.trees = {}  # <--- Agrega esto
 
@@ -146,9 +146,12 @@ class SettingsController:
         """Refresca los datos de una pestaña"""
         try:
             config = self.tabs_config[tab_key]
-            data = self.model.get_all_data(config["table_name"])
+            chunks = self.model.stream_all_data(config["table_name"])
             tree = self.trees.get(tab_key)  # <--- Usa el tree correcto
-            self.view.load_table_data(tree, data)
+            self.view.load_table_chunks(
+                tree, chunks,
+                on_error=lambda e: self.view.show_message(
+                    "Error", f"Error al cargar datos: {str(e)}", "error"))
         except Exception as e:
             self.view.show_message(
                 "Error", f"Error al cargar datos: {str(e)}", "error")
@@ -187,6 +190,7 @@ class SettingsController:
                 self.view.show_message("Éxito", "Ítem agregado correctamente", "info")
                 dialog.destroy()
                 self.refresh_tab(tab_key)
+                self._notify_product_controller()
                 
             except Exception as e:
                 self.view.show_message("Error", str(e), "error")
@@ -248,6 +252,7 @@ class SettingsController:
                     self.view.show_message("Éxito", "Ítem actualizado correctamente", "info")
                     dialog.destroy()
                     self.refresh_tab(tab_key)
+                    self._notify_product_controller()
                     
                 except Exception as e:
                     self.view.show_message("Error", str(e), "error")
@@ -1,14 +1,14 @@
 from tkinter import messagebox
 from models.solicitudes_model import SolicitudesModel
 from views.solicitudes_view import SolicitudesView
-from controllers.movimientos_controllers import MovementController
+from models.movimientos_models import MovementModel
 from models.export_manager import ExportManager
+from models.catalog import product_catalog
+from db_executor import run_async
 
 
 class SolicitudesController:
     def __init__(self, content_frame, *args):
-        self.model = SolicitudesModel()
-
         # Manejar diferentes firmas del constructor
         if len(args) == 1:
             app = args[0]
@@ -19,6 +19,7 @@ class SolicitudesController:
                 "Invalid constructor arguments for SolicitudesController")
 
         self.app = app
+        self.model = app.track_model(SolicitudesModel())
         self.view = SolicitudesView(content_frame, app)
         self.view.set_controller(self)
         self.current_user = getattr(app, 'current_user', None)
@@ -41,8 +42,10 @@ class SolicitudesController:
     def cargar_solicitudes(self):
         """Cargar solicitudes en la tabla"""
         filtros = self.view.obtener_filtros()
-        solicitudes = self.model.obtener_solicitudes(filtros)
-        self.view.actualizar_tabla_solicitudes(solicitudes)
+        run_async(
+            self.app, lambda: SolicitudesModel.call(SolicitudesModel.obtener_solicitudes, filtros),
+            on_success=self.view.actualizar_tabla_solicitudes,
+            channel="solicitudes")
 
     def buscar_solicitudes(self):
         """Buscar solicitudes según los filtros"""
@@ -131,6 +134,10 @@ class SolicitudesController:
                 ubicacion_label=self.current_form_data['ubicacion_label']
             )
 
+            producto = product_catalog.get(producto_id, fresh=False)
+            self.view.mostrar_miniatura(self.current_form_data['imagen_label'],
+                                        producto.imagen if producto else None)
+
     def agregar_producto_form(self, producto_nombre, cantidad, output_tree, stock_label, ubicacion_label, qty_entry):
         """Agregar producto a la lista de entrega desde el formulario"""
         if not producto_nombre:
@@ -267,29 +274,21 @@ class SolicitudesController:
 
     def _registrar_productos_entrega(self, solicitud_id, output_tree, id_responsable_entrega, memo_text):
         """Registrar productos de la entrega"""
-        movement_controller = MovementController(
-            None, self.app, create_ui=False)
-
+        items = []
         for item in output_tree.get_children():
             producto_nombre, cantidad, _ = output_tree.item(item)["values"]
-            cantidad = int(cantidad)
-            producto_id = self.producto_info[producto_nombre]['id']
-
-            # Registrar detalle
-            detalle_data = (solicitud_id, producto_id, cantidad)
-            self.model.registrar_detalle_solicitud(detalle_data)
-
-            # Actualizar inventario
-            self.model.actualizar_inventario(producto_id, cantidad)
-
-            # Registrar movimiento
-            movement_controller.register_movement(
-                id_producto=producto_id,
-                tipo="Salida",
-                cantidad=cantidad,
-                id_responsable=id_responsable_entrega,
-                referencia=f"Solicitud #{memo_text}"
-            )
+            items.append((self.producto_info[producto_nombre]['id'], int(cantidad)))
+
+        # Detalles e inventario en un solo viaje cada uno
+        self.model.registrar_detalles_solicitud(
+            [(solicitud_id, producto_id, cantidad) for producto_id, cantidad in items])
+        self.model.actualizar_inventario_lote(items)
+
+        # Movimientos en la misma transacción: el commit lo hace registrar_entrega_form
+        with MovementModel(self.model.conn) as movimientos:
+            movimientos.register_movements([
+                (producto_id, "Salida", cantidad, None, id_responsable_entrega, f"Solicitud #{memo_text}")
+                for producto_id, cantidad in items])
 
     def mostrar_detalles_solicitud(self):
         """Mostrar detalles de la solicitud seleccionada"""
@@ -1,21 +1,522 @@
+import io
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
 import psycopg2
 from psycopg2 import OperationalError
+from psycopg2.extensions import cursor as _pg_cursor
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from tkinter import messagebox
-import threading
+
+from config import DB_CONFIG, DB_POOL, QUERY_STATS, STREAMING, BULK
+
+logger = logging.getLogger("inventario.sql")
+
+
+class QueryStats:
+    """Estadísticas de tiempo por consulta, agrupadas por huella (fingerprint).
+
+    Cada huella guarda contadores acumulados y un buffer circular con las
+    últimas duraciones para calcular percentiles sin crecer sin límite.
+    """
+
+    _literal_re = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+    _space_re = re.compile(r"\s+")
+
+    def __init__(self, history_size=256, slow_query_ms=200):
+        self.history_size = history_size
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @classmethod
+    def fingerprint(cls, query):
+        """Normaliza una consulta: sin literales y con espacios colapsados"""
+        if isinstance(query, bytes):
+            query = query.decode("utf-8", "replace")
+        elif not isinstance(query, str):
+            query = str(query)
+        query = cls._literal_re.sub("?", query)
+        return cls._space_re.sub(" ", query).strip()
+
+    def record(self, query, elapsed, rows, callsite):
+        """Registra una ejecución (elapsed en segundos)"""
+        key = self.fingerprint(query)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'rows': 0,
+                    'history': deque(maxlen=self.history_size),
+                    'callsites': set(),
+                    'last_callsite': None,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += max(rows or 0, 0)
+            entry['history'].append(elapsed_ms)
+            entry['callsites'].add(callsite)
+            entry['last_callsite'] = callsite
+
+        if elapsed_ms >= self.slow_query_ms:
+            logger.warning("Consulta lenta (%.1f ms, %s filas) en %s: %s",
+                           elapsed_ms, rows, callsite, key[:300])
+
+    def add_rows(self, query, rows):
+        """Suma filas leídas con fetch* a la huella de la consulta"""
+        key = self.fingerprint(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['rows'] += rows
+
+    def snapshot(self):
+        """Lista de estadísticas por huella, ordenada por tiempo total"""
+        with self._lock:
+            items = [(key, dict(entry, history=list(entry['history']),
+                                callsites=sorted(entry['callsites'])))
+                     for key, entry in self._entries.items()]
+
+        stats = []
+        for key, entry in items:
+            history = sorted(entry['history'])
+            stats.append({
+                'query': key,
+                'count': entry['count'],
+                'total_ms': entry['total_ms'],
+                'avg_ms': entry['total_ms'] / entry['count'],
+                'p50_ms': _percentile(history, 0.50),
+                'p95_ms': _percentile(history, 0.95),
+                'max_ms': entry['max_ms'],
+                'rows': entry['rows'],
+                'callsites': entry['callsites'],
+                'last_callsite': entry['last_callsite'],
+            })
+        stats.sort(key=lambda s: s['total_ms'], reverse=True)
+        return stats
+
+    def reset(self):
+        """Borra todas las estadísticas"""
+        with self._lock:
+            self._entries.clear()
+
+
+def _percentile(sorted_values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+query_stats = QueryStats(QUERY_STATS['history_size'], QUERY_STATS['slow_query_ms'])
+
+_internal_files = (os.path.normcase(os.path.abspath(__file__)),
+                   os.path.normcase(os.path.dirname(psycopg2.__file__)))
+
+
+def _callsite():
+    """Primer frame fuera de database.py y psycopg2 (archivo:línea función)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        if not filename.startswith(_internal_files[1]) and filename != _internal_files[0]:
+            try:
+                short = os.path.relpath(frame.f_code.co_filename)
+            except ValueError:  # otra unidad en Windows
+                short = frame.f_code.co_filename
+            return f"{short}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class InstrumentedCursor(_pg_cursor):
+    """Cursor que mide tiempo, filas y origen de cada consulta"""
+
+    _last_query = ""
+
+    def execute(self, query, vars=None):
+        self._last_query = query
+        if not QUERY_STATS['enabled']:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            query_stats.record(query, time.perf_counter() - start,
+                               self.rowcount, _callsite())
+
+    def executemany(self, query, vars_list):
+        self._last_query = query
+        if not QUERY_STATS['enabled']:
+            return super().executemany(query, vars_list)
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            query_stats.record(query, time.perf_counter() - start,
+                               self.rowcount, _callsite())
+
+    def copy_expert(self, sql, file, size=8192):
+        self._last_query = sql
+        if not QUERY_STATS['enabled']:
+            return super().copy_expert(sql, file, size)
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            query_stats.record(sql, time.perf_counter() - start,
+                               self.rowcount, _callsite())
+
+    def fetchall(self):
+        rows = super().fetchall()
+        # En cursores con nombre las filas llegan recién en el fetch
+        if self.name and QUERY_STATS['enabled']:
+            query_stats.add_rows(self._last_query, len(rows))
+        return rows
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(size) if size is not None else super().fetchmany()
+        if self.name and QUERY_STATS['enabled']:
+            query_stats.add_rows(self._last_query, len(rows))
+        return rows
+
+
+def get_query_stats():
+    """Estadísticas de consultas del proceso (ver QueryStats.snapshot)"""
+    return query_stats.snapshot()
+
+
+def reset_query_stats():
+    """Reinicia las estadísticas de consultas"""
+    query_stats.reset()
+
+
+class PoolTimeoutError(Exception):
+    """No hay conexiones libres en el pool dentro del tiempo de espera"""
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones a PostgreSQL.
+
+    A diferencia de ThreadedConnectionPool, que lanza un error cuando se
+    agota, este pool deja esperando al que pide una conexión hasta que otra
+    sea devuelta (o hasta que vence el tiempo de espera).
+    """
+
+    def __init__(self, minconn, maxconn, timeout=None, **connect_params):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **connect_params)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        self.maxconn = maxconn
+
+    def getconn(self, timeout=None):
+        """Saca una conexión del pool (checkout)"""
+        wait = self.timeout if timeout is None else timeout
+        if not self._slots.acquire(timeout=wait):
+            raise PoolTimeoutError(
+                f"No hay conexiones disponibles ({self.maxconn} en uso)")
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                # La conexión murió (reinicio del servidor, red): descartarla
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn):
+        """Devuelve una conexión al pool (checkin)"""
+        try:
+            # putconn hace rollback de cualquier transacción que quedó abierta
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Conexión prestada durante el bloque with.
+
+        Hace commit al salir sin errores y rollback si hubo una excepción.
+        """
+        conn = self.getconn(timeout)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        """Cierra todas las conexiones del pool"""
+        self._pool.closeall()
+
+
+class PooledConnection:
+    """Conexión prestada por el pool con la misma interfaz que la de psycopg2.
+
+    close() la devuelve al pool en lugar de cerrar el socket. El dueño (un
+    modelo, ver BaseModel) debe cerrarla: si se destruye sin hacerlo, la
+    conexión se devuelve igual pero se registra una advertencia, porque con
+    referencias cíclicas eso puede tardar hasta la próxima recolección.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    @property
+    def raw(self):
+        """Conexión psycopg2 subyacente"""
+        return self._conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise psycopg2.InterfaceError("La conexión ya fue devuelta al pool")
+        return getattr(conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self):
+        """Devuelve la conexión al pool"""
+        conn, self._conn = self.__dict__.get("_conn"), None
+        if conn is not None:
+            self._pool.putconn(conn)
+
+    def __del__(self):
+        try:
+            if self.__dict__.get("_conn") is not None:
+                logger.warning("Conexión devuelta al pool sin close() (fuga en un modelo)")
+                self.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Retorna el pool de conexiones del proceso (lo crea la primera vez)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_POOL['minconn'],
+                    DB_POOL['maxconn'],
+                    timeout=DB_POOL['timeout'],
+                    cursor_factory=InstrumentedCursor,
+                    **DB_CONFIG
+                )
+    return _pool
+
+
+@contextmanager
+def get_connection():
+    """Conexión del pool para un bloque with (commit/rollback automático)"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def bulk_insert(cursor, table, columns, rows, returning=None, template=None, page_size=None):
+    """Inserta muchas filas con un solo INSERT ... VALUES por página.
+
+    Args:
+        cursor: cursor de la transacción del llamador (no se hace commit)
+        table: tabla destino
+        columns: columnas a insertar, en el orden de cada fila
+        rows: lista de tuplas
+        returning: expresión RETURNING (por ejemplo "id_producto")
+        template: plantilla de fila para execute_values, ej. "(%s, %s::int)"
+        page_size: filas por sentencia (por defecto BULK['page_size'])
+
+    Returns:
+        list: filas devueltas por RETURNING, en el mismo orden que rows
+
+    Sin RETURNING y con muchas filas se usa COPY (ver copy_rows).
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    if returning is None and template is None and len(rows) >= BULK['copy_threshold']:
+        copy_rows(cursor, table, columns, rows)
+        return []
+
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+    if returning:
+        query += f" RETURNING {returning}"
+    result = execute_values(cursor, query, rows, template=template,
+                            page_size=page_size or BULK['page_size'],
+                            fetch=bool(returning))
+    return result or []
+
+
+def bulk_update(cursor, table, key_column, columns, rows, types=None,
+                set_clause=None, page_size=None):
+    """Actualiza muchas filas con un UPDATE ... FROM (VALUES ...) por página.
+
+    Cada fila de rows es (clave, valor1, valor2, ...) en el orden de
+    key_column + columns. Por defecto cada columna se asigna desde v.<columna>;
+    set_clause permite otra expresión (ej. "stock = inventario.stock - v.cantidad").
+    types da el tipo SQL de cada valor cuando hay NULLs o literales ambiguos.
+
+    Returns:
+        list: claves de las filas actualizadas
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    names = [key_column] + list(columns)
+    if types:
+        template = "(" + ", ".join(f"%s::{t}" for t in types) + ")"
+    else:
+        template = None
+    if set_clause is None:
+        set_clause = ", ".join(f"{col} = v.{col}" for col in columns)
+
+    query = (f"UPDATE {table} SET {set_clause} "
+             f"FROM (VALUES %s) AS v ({', '.join(names)}) "
+             f"WHERE {table}.{key_column} = v.{key_column} "
+             f"RETURNING {table}.{key_column}")
+    result = execute_values(cursor, query, rows, template=template,
+                            page_size=page_size or BULK['page_size'], fetch=True)
+    return [row[0] for row in result]
+
+
+def _copy_value(value):
+    """Valor en el formato de texto de COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """Carga filas con COPY FROM STDIN (la vía más rápida para volúmenes grandes)"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return cursor.rowcount
+
+
+def stream_query(query, params=None, itersize=None):
+    """Genera las filas de una consulta en bloques usando un cursor de servidor.
+
+    El cursor con nombre mantiene el resultado en PostgreSQL y se trae de a
+    `itersize` filas, así el consumidor empieza a trabajar con el primer
+    bloque y la memoria no crece con el tamaño de la tabla. La conexión queda
+    prestada hasta que el generador se agota o se cierra.
+    """
+    itersize = itersize or STREAMING['itersize']
+    with get_connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(itersize)
+                if not rows:
+                    break
+                yield rows
+
+
+class NotificationListener:
+    """Escucha un canal de NOTIFY con una conexión propia (fuera del pool).
+
+    changed() no espera a la base: lee los avisos que ya llegaron al socket.
+    Si la conexión se pierde se vuelve a abrir y se informa como cambio,
+    porque los avisos enviados mientras tanto se perdieron.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._conn = None
+
+    def changed(self):
+        """True si hubo avisos desde la última llamada (o no se sabe)"""
+        if self._conn is None:
+            self._connect()
+            return True
+        try:
+            self._conn.poll()
+        except (OperationalError, psycopg2.InterfaceError) as e:
+            print(f"Se perdió la conexión de avisos '{self.channel}': {e}")
+            self.close()
+            return True
+        notified = bool(self._conn.notifies)
+        self._conn.notifies.clear()
+        return notified
+
+    def _connect(self):
+        try:
+            conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self._conn = conn
+        except OperationalError as e:
+            # Sin avisos, changed() sigue informando cambios en cada llamada
+            print(f"No se pudo escuchar el canal '{self.channel}': {e}")
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def close_pool():
+    """Cierra todas las conexiones del pool (al salir de la aplicación)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
 
 
 def create_connection():
-    """Crea y retorna una conexión a PostgreSQL"""
+    """Retorna una conexión a PostgreSQL prestada por el pool.
+
+    Si no se puede conectar lanza la excepción. En el hilo de Tk además se
+    avisa con un mensaje; en los hilos de trabajo (DBExecutor, miniaturas)
+    no se toca Tk y el error llega al on_error de la tarea.
+    """
     try:
-        conn = psycopg2.connect(
-            host="localhost",
-            database="inventario_usm",  # Nombre de tu BD
-            user="postgres",            # Tu usuario
-            password="123456789",   # Tu contraseña
-            port="5432"
-        )
-        return conn
-    except OperationalError as e:
-        messagebox.showerror("Error de conexión",
-                             f"No se pudo conectar a PostgreSQL: {e}")
-        return None
+        pool = get_pool()
+        return PooledConnection(pool, pool.getconn())
+    except (OperationalError, PoolTimeoutError) as e:
+        if threading.current_thread() is threading.main_thread():
+            messagebox.showerror("Error de conexión",
+                                 f"No se pudo conectar a PostgreSQL: {e}")
+        raise
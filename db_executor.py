@@ -0,0 +1,219 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_EXECUTOR
+
+
+class DBExecutor:
+    """Ejecuta consultas en un pool de hilos y entrega los resultados en Tk.
+
+    Los controladores envían funciones con submit(); el resultado vuelve al
+    hilo principal de Tk (vía after()) y se pasa a on_success u on_error.
+    Cada envío pertenece a un canal (normalmente la pantalla): un envío nuevo
+    en el mismo canal, o cancel(), descarta los resultados pendientes, así
+    una respuesta vieja nunca pisa a la pantalla actual.
+
+    Las funciones enviadas corren en otro hilo: deben usar su propio modelo
+    o conexión del pool, nunca el cursor de un modelo del hilo de Tk.
+    """
+
+    def __init__(self, app, max_workers=None, poll_ms=None, show_busy=True):
+        self.app = app
+        self.poll_ms = poll_ms or DB_EXECUTOR['poll_ms']
+        # Si las tareas muestran el indicador de ocupado de la app
+        self.show_busy = show_busy
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or DB_EXECUTOR['max_workers'],
+            thread_name_prefix="db")
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._futures = {}
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn, *args, on_success=None, on_error=None, channel="default",
+               replace=True, **kwargs):
+        """Ejecuta fn(*args, **kwargs) en segundo plano.
+
+        Args:
+            on_success: callback(resultado) en el hilo de Tk
+            on_error: callback(excepción) en el hilo de Tk
+            channel: grupo de tareas que se cancelan juntas
+            replace: si True, descarta lo pendiente del mismo canal
+        """
+        if replace:
+            self.cancel(channel)
+
+        with self._lock:
+            generation = self._generations.get(channel, 0)
+            self._pending += 1
+
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._futures.setdefault(channel, set()).add(future)
+        future.add_done_callback(
+            lambda f: self._results.put((channel, generation, f, on_success, on_error)))
+
+        self._set_busy(True)
+        self._schedule_poll()
+        return future
+
+    def submit_stream(self, fn, *args, on_chunk=None, on_success=None, on_error=None,
+                      channel="default", replace=True, **kwargs):
+        """Como submit(), para una fn que devuelve un generador de bloques de filas.
+
+        El generador (y su cursor de servidor) se recorre en el hilo de
+        trabajo; cada bloque llega en orden a on_chunk(filas) en el hilo de
+        Tk y al final on_success(total de filas). Si se cancela el canal se
+        deja de leer y se cierra el generador.
+        """
+        if replace:
+            self.cancel(channel)
+        with self._lock:
+            generation = self._generations.get(channel, 0)
+
+        def run():
+            total = 0
+            chunks = fn(*args, **kwargs)
+            try:
+                for rows in chunks:
+                    with self._lock:
+                        if generation != self._generations.get(channel, 0):
+                            break
+                    # Misma cola que los resultados: los bloques llegan antes que el final
+                    self._results.put((channel, generation, None, on_chunk, rows))
+                    total += len(rows)
+            finally:
+                close = getattr(chunks, "close", None)
+                if close:
+                    close()
+            return total
+
+        return self.submit(run, on_success=on_success, on_error=on_error,
+                           channel=channel, replace=False)
+
+    def cancel(self, channel=None, keep=()):
+        """Descarta los resultados pendientes de un canal (o de todos salvo `keep`)"""
+        if channel is not None:
+            channels = [channel]
+        else:
+            channels = [name for name in self._futures if name not in keep]
+        with self._lock:
+            for name in channels:
+                self._generations[name] = self._generations.get(name, 0) + 1
+        for name in channels:
+            for future in self._futures.get(name, ()):
+                # Las que aún no empezaron ni siquiera se ejecutan
+                future.cancel()
+
+    def shutdown(self):
+        """Cancela lo pendiente y detiene los hilos"""
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.app.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        """Entrega en el hilo de Tk los resultados terminados"""
+        while True:
+            try:
+                channel, generation, future, on_success, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if future is None:
+                # Bloque de filas de submit_stream (on_success = on_chunk, on_error = filas)
+                with self._lock:
+                    stale = generation != self._generations.get(channel, 0)
+                if not stale and on_success:
+                    try:
+                        on_success(on_error)
+                    except Exception as e:
+                        print(f"Error al procesar bloque de filas: {e}")
+                continue
+
+            self._futures.get(channel, set()).discard(future)
+            with self._lock:
+                self._pending -= 1
+                stale = generation != self._generations.get(channel, 0)
+
+            if stale or future.cancelled():
+                continue
+
+            error = future.exception()
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        print(f"Error en tarea de base de datos: {error}")
+                elif on_success:
+                    on_success(future.result())
+            except Exception as e:
+                print(f"Error al procesar resultado de base de datos: {e}")
+
+        with self._lock:
+            pending = self._pending
+
+        if pending > 0:
+            self.app.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+            self._set_busy(False)
+
+    def _set_busy(self, busy):
+        if not self.show_busy:
+            return
+        set_busy = getattr(self.app, 'set_busy', None)
+        if set_busy:
+            set_busy(busy)
+
+
+def run_stream(app, fn, *args, on_chunk=None, on_success=None, on_error=None,
+               channel="default", replace=True, **kwargs):
+    """Envía un generador de bloques al DBExecutor de la app (ver submit_stream),
+    o lo recorre en línea si no hay uno"""
+    executor = getattr(app, 'db_executor', None)
+    if executor is not None:
+        return executor.submit_stream(fn, *args, on_chunk=on_chunk, on_success=on_success,
+                                      on_error=on_error, channel=channel, replace=replace,
+                                      **kwargs)
+
+    total = 0
+    try:
+        for rows in fn(*args, **kwargs):
+            if on_chunk:
+                on_chunk(rows)
+            total += len(rows)
+    except Exception as e:
+        if on_error:
+            on_error(e)
+            return None
+        raise
+    if on_success:
+        on_success(total)
+    return total
+
+
+def run_async(app, fn, *args, on_success=None, on_error=None, channel="default",
+              replace=True, **kwargs):
+    """Envía fn al DBExecutor de la app, o la ejecuta en línea si no hay uno"""
+    executor = getattr(app, 'db_executor', None)
+    if executor is not None:
+        return executor.submit(fn, *args, on_success=on_success, on_error=on_error,
+                               channel=channel, replace=replace, **kwargs)
+
+    try:
+        result = fn(*args, **kwargs)
+    except Exception as e:
+        if on_error:
+            on_error(e)
+            return None
+        raise
+    if on_success:
+        on_success(result)
+    return result
@@ -8,12 +8,26 @@ from menu.pedidos import show_requests
 from menu.compras import show_purchases
 from menu.movimientos import show_movements
 from models.notificaciones import NotificationManager
+from database import close_pool
+from db_executor import DBExecutor
+from migrations.runner import check_schema
+from config import MIGRATIONS
+from models.product_model import ProductModel
+from models.movimientos_models import MovementModel
+from models.catalog import product_catalog
+from models.lookups import lookups
+from models.thumbnails import ThumbnailCache
 from menu.ajustes import show_settings
 
 # Importar la nueva estructura MVC del login
 from views.login_view import LoginView
+from views.diagnostics_view import DiagnosticsView
 from controllers.login_controller import LoginController
 
+# Canales del DBExecutor que pertenecen a la aplicación y sobreviven a la
+# navegación entre pantallas
+APP_CHANNELS = ("esquema", "catalogo")
+
 
 class ModernInventoryApp(tk.Tk):
     def __init__(self):
@@ -49,9 +63,49 @@ class ModernInventoryApp(tk.Tk):
         # Configurar el administrador de notificaciones
         self.notification_manager = NotificationManager(self)
 
+        # Consultas en segundo plano para no bloquear la interfaz
+        self.db_executor = DBExecutor(self)
+        # Miniaturas de productos (pool de hilos propio)
+        self.thumbnails = ThumbnailCache(self)
+        self.busy_label = None
+        # Modelos de la pantalla actual: navigate() devuelve sus conexiones al pool
+        self.screen_models = []
+
+        # Migraciones pendientes e índices faltantes, sin congelar la ventana
+        self.db_executor.submit(
+            self.verify_schema, on_success=self.on_schema_checked,
+            on_error=lambda e: messagebox.showerror(
+                "Esquema", f"No se pudo verificar el esquema de la base de datos: {e}"),
+            channel="esquema")
+
         # Mostrar login primero
         self.show_login()
 
+    @staticmethod
+    def verify_schema():
+        """Verificación de arranque (en segundo plano, ver migrations.runner)"""
+        result = check_schema(MIGRATIONS['auto_apply'])
+        if result['pending']:
+            # Los pasos siguientes dependen de tablas y funciones de las
+            # migraciones: con el esquema incompleto solo se avisa
+            return result
+        ProductModel.call(ProductModel.sync_stock_threshold)
+        # Particiones de los próximos meses e instantáneas de stock atrasadas
+        MovementModel.call(MovementModel.ensure_partitions)
+        MovementModel.call(MovementModel.ensure_stock_snapshots)
+        return result
+
+    def on_schema_checked(self, result):
+        """Avisa de las migraciones aplicadas o pendientes"""
+        if result['applied']:
+            messagebox.showinfo(
+                "Esquema", "Migraciones aplicadas: " + ", ".join(result['applied']))
+        elif result['pending']:
+            messagebox.showwarning(
+                "Esquema",
+                "Hay migraciones pendientes: " + ", ".join(result['pending'])
+                + "\nAplíquelas con: python -m migrations.runner")
+
     def show_login(self):
         """Muestra la pantalla de login usando la nueva estructura MVC"""
         # Limpiar ventana si ya hay widgets
@@ -74,6 +128,12 @@ class ModernInventoryApp(tk.Tk):
         self.create_main_menu()
         self.create_status_bar()
 
+        # Cargar el catálogo de productos y las tablas maestras sin bloquear la interfaz
+        self.db_executor.submit(product_catalog.warm, channel="catalogo",
+                                on_error=lambda e: print(f"No se pudo cargar el catálogo: {e}"))
+        self.db_executor.submit(lookups.refresh, channel="catalogo", replace=False,
+                                on_error=lambda e: print(f"No se pudieron cargar las tablas maestras: {e}"))
+
         # Verificar notificaciones
         self.notification_manager.check_low_stock()
 
@@ -150,6 +210,8 @@ class ModernInventoryApp(tk.Tk):
                                 activeforeground=self.colors["primary"])
         user_dropdown.add_command(
             label="👤 Mi perfil", command=self.show_profile)
+        user_dropdown.add_command(
+            label="📈 Diagnóstico SQL", command=self.show_diagnostics)
         user_dropdown.add_separator()
         user_dropdown.add_command(label="🚪 Cerrar sesión",
                                   command=self.logout)
@@ -185,7 +247,7 @@ class ModernInventoryApp(tk.Tk):
                             bg="white", fg=self.colors["text"], bd=0,
                             activebackground=self.colors["hover"],
                             activeforeground=self.colors["primary"],
-                            command=lambda cmd=command: cmd(self),
+                            command=lambda cmd=command: self.navigate(cmd),
                             padx=20, anchor="w")
             btn.pack(fill="x", ipady=10)
 
@@ -199,6 +261,28 @@ class ModernInventoryApp(tk.Tk):
         self.content_frame.grid(
             row=0, column=1, sticky="nsew", padx=10, pady=10)
 
+    def navigate(self, show_screen):
+        """Cambia de pantalla descartando las consultas pendientes de la anterior"""
+        # La verificación del esquema y la carga del catálogo son de la
+        # aplicación, no de la pantalla: sus resultados se siguen entregando
+        self.db_executor.cancel(keep=APP_CHANNELS)
+        self.close_screen_models()
+        show_screen(self)
+
+    def track_model(self, model):
+        """Asocia un modelo a la pantalla actual para cerrarlo al salir de ella"""
+        self.screen_models.append(model)
+        return model
+
+    def close_screen_models(self):
+        """Devuelve al pool las conexiones de los modelos de la pantalla actual"""
+        models, self.screen_models = self.screen_models, []
+        for model in models:
+            try:
+                model.close()
+            except Exception as e:
+                print(f"Error al cerrar la conexión del modelo: {e}")
+
     def create_status_bar(self):
         """Crea la barra de estado inferior"""
         status_frame = tk.Frame(self, bg="white", height=30)
@@ -207,9 +291,22 @@ class ModernInventoryApp(tk.Tk):
         tk.Label(status_frame, text="Sistema de Inventario v2.0",
                  bg="white", fg=self.colors["text_light"], padx=10).pack(side="left")
 
+        self.busy_label = tk.Label(status_frame, text="",
+                                   bg="white", fg=self.colors["primary"], padx=10)
+        self.busy_label.pack(side="left")
+
         tk.Label(status_frame, text="© 2025 Universidad - Todos los derechos reservados",
                  bg="white", fg=self.colors["text_light"], padx=10).pack(side="right")
 
+    def set_busy(self, busy):
+        """Muestra u oculta el indicador de consultas en curso"""
+        try:
+            if self.busy_label is not None:
+                self.busy_label.config(text="⏳ Cargando..." if busy else "")
+            self.config(cursor="watch" if busy else "")
+        except tk.TclError:
+            pass
+
     def show_profile(self):
         """Muestra el perfil del usuario"""
         clear_frame(self.content_frame)
@@ -230,7 +327,15 @@ Rol: {self.current_user.rol}
             tk.Label(self.content_frame, text="No hay información del usuario disponible",
                      bg=self.colors["background"]).pack()
 
+    def show_diagnostics(self):
+        """Muestra las estadísticas de tiempo de las consultas SQL"""
+        DiagnosticsView(self).show()
+
     def logout(self):
         """Cierra la sesión del usuario usando el controlador"""
         self.login_controller.logout()
+        self.close_screen_models()
+        self.db_executor.shutdown()
+        self.thumbnails.shutdown()
         self.destroy()  # <-- Esto cierra la ventana principal
+        close_pool()
@@ -0,0 +1,47 @@
+-- Índices para los filtros y ordenamientos de las pantallas principales
+
+-- Movimientos: listado por fecha y filtro por tipo
+CREATE INDEX IF NOT EXISTS idx_movimientos_fecha
+    ON movimientos (fecha DESC);
+CREATE INDEX IF NOT EXISTS idx_movimientos_tipo_fecha
+    ON movimientos (tipo, fecha DESC);
+CREATE INDEX IF NOT EXISTS idx_movimientos_producto
+    ON movimientos (id_producto);
+
+-- Inventario: join por producto y alertas de stock bajo
+CREATE INDEX IF NOT EXISTS idx_inventario_producto
+    ON inventario (id_producto);
+CREATE INDEX IF NOT EXISTS idx_inventario_stock_bajo
+    ON inventario (stock)
+    WHERE estado_stock = 'stock bajo';
+
+-- Productos: listado de activos ordenado por nombre y filtro por categoría
+CREATE INDEX IF NOT EXISTS idx_productos_activos_nombre
+    ON productos (nombre)
+    WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_productos_activos_categoria
+    ON productos (id_categoria)
+    WHERE activo = TRUE;
+
+-- Solicitudes: listado por fecha y detalle por solicitud
+CREATE INDEX IF NOT EXISTS idx_solicitudes_fecha
+    ON solicitudes (fecha_solicitud DESC);
+CREATE INDEX IF NOT EXISTS idx_detalle_solicitud_solicitud
+    ON detalle_solicitud (id_solicitud);
+
+-- Proveedores: productos y categorías de cada proveedor
+CREATE INDEX IF NOT EXISTS idx_proveedor_producto_proveedor
+    ON proveedor_producto (id_proveedor, id_producto);
+CREATE INDEX IF NOT EXISTS idx_proveedor_categoria_proveedor
+    ON proveedor_categoria (id_proveedor);
+
+-- Tablas maestras: búsqueda de ID por nombre entre los activos
+CREATE INDEX IF NOT EXISTS idx_marcas_activas_nombre
+    ON marcas (nombre)
+    WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_categorias_activas_nombre
+    ON categorias (nombre)
+    WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_ubicaciones_activas_nombre
+    ON ubicaciones (nombre)
+    WHERE activo = TRUE;
@@ -0,0 +1,71 @@
+-- Estado de stock mantenido por la base de datos cuando cambia inventario.stock
+
+CREATE TABLE IF NOT EXISTS parametros_inventario (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+
+INSERT INTO parametros_inventario (clave, valor)
+VALUES ('umbral_stock_bajo', 10)
+ON CONFLICT (clave) DO NOTHING;
+
+-- Estado que corresponde a un stock. Los estados manuales (ej. 'reservado')
+-- se conservan mientras el stock esté por encima del umbral.
+CREATE OR REPLACE FUNCTION calcular_estado_stock(p_stock INTEGER, p_estado_actual TEXT)
+RETURNS TEXT
+LANGUAGE plpgsql STABLE AS $$
+DECLARE
+    v_umbral INTEGER;
+BEGIN
+    SELECT valor INTO v_umbral
+    FROM parametros_inventario
+    WHERE clave = 'umbral_stock_bajo';
+
+    IF COALESCE(p_stock, 0) <= 0 THEN
+        RETURN 'agotado';
+    ELSIF p_stock <= COALESCE(v_umbral, 10) THEN
+        RETURN 'stock bajo';
+    ELSIF p_estado_actual IS NULL OR p_estado_actual IN ('agotado', 'stock bajo') THEN
+        RETURN 'disponible';
+    END IF;
+    RETURN p_estado_actual;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION inventario_estado_stock()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.estado_stock := calcular_estado_stock(NEW.stock, NEW.estado_stock);
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_inventario_estado_stock ON inventario;
+CREATE TRIGGER trg_inventario_estado_stock
+    BEFORE INSERT OR UPDATE OF stock, estado_stock ON inventario
+    FOR EACH ROW EXECUTE PROCEDURE inventario_estado_stock();
+
+-- Al cambiar el umbral se recalculan solo las filas cuyo estado cambia
+CREATE OR REPLACE FUNCTION parametros_recalcular_estado_stock()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.clave = 'umbral_stock_bajo' THEN
+        UPDATE inventario
+        SET estado_stock = calcular_estado_stock(stock, estado_stock)
+        WHERE estado_stock IS DISTINCT FROM calcular_estado_stock(stock, estado_stock);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_parametros_estado_stock ON parametros_inventario;
+CREATE TRIGGER trg_parametros_estado_stock
+    AFTER INSERT OR UPDATE OF valor ON parametros_inventario
+    FOR EACH ROW EXECUTE PROCEDURE parametros_recalcular_estado_stock();
+
+-- Dejar consistentes las filas existentes
+UPDATE inventario
+SET estado_stock = calcular_estado_stock(stock, estado_stock)
+WHERE estado_stock IS DISTINCT FROM calcular_estado_stock(stock, estado_stock);
@@ -0,0 +1,8 @@
+-- Paginación por cursor (nombre, id_producto) del listado de productos activos
+
+CREATE INDEX IF NOT EXISTS idx_productos_activos_nombre_id
+    ON productos (nombre, id_producto)
+    WHERE activo = TRUE;
+
+-- El índice anterior solo por nombre queda cubierto por el nuevo
+DROP INDEX IF EXISTS idx_productos_activos_nombre;
@@ -0,0 +1,20 @@
+-- Búsqueda de productos por nombre/código con índices de trigramas,
+-- sin distinguir acentos ni mayúsculas
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() no es IMMUTABLE; este envoltorio con diccionario fijo sí lo es
+-- y puede usarse en índices de expresión
+CREATE OR REPLACE FUNCTION f_unaccent(text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_trgm
+    ON productos USING gin (lower(f_unaccent(nombre)) gin_trgm_ops)
+    WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_productos_codigo_trgm
+    ON productos USING gin (lower(codigo) gin_trgm_ops)
+    WHERE activo = TRUE;
@@ -0,0 +1,43 @@
+-- Sello de versión del catálogo de productos en memoria.
+-- Cada sentencia que modifica productos, inventario o sus tablas maestras
+-- avanza una secuencia; la aplicación compara su valor con el de la última
+-- carga. Una secuencia no bloquea filas, así que no serializa escrituras
+-- concurrentes.
+
+CREATE SEQUENCE IF NOT EXISTS version_catalogo_productos;
+
+-- Genérica: avanza la secuencia pasada como argumento del trigger
+CREATE OR REPLACE FUNCTION avanzar_version_catalogo()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM nextval(TG_ARGV[0]::regclass);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_productos_version_catalogo ON productos;
+CREATE TRIGGER trg_productos_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON productos
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
+
+DROP TRIGGER IF EXISTS trg_inventario_version_catalogo ON inventario;
+CREATE TRIGGER trg_inventario_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON inventario
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
+
+-- El catálogo también guarda los nombres de categoría, marca y ubicación
+DROP TRIGGER IF EXISTS trg_categorias_version_catalogo ON categorias;
+CREATE TRIGGER trg_categorias_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON categorias
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
+
+DROP TRIGGER IF EXISTS trg_marcas_version_catalogo ON marcas;
+CREATE TRIGGER trg_marcas_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON marcas
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
+
+DROP TRIGGER IF EXISTS trg_ubicaciones_version_catalogo ON ubicaciones;
+CREATE TRIGGER trg_ubicaciones_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON ubicaciones
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
@@ -0,0 +1,10 @@
+-- Una fila de inventario por producto: permite guardar productos con
+-- INSERT ... ON CONFLICT (id_producto) en una sola sentencia.
+-- Si hay productos con más de una fila de inventario la migración falla y
+-- hay que unificarlas antes de aplicarla.
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_inventario_producto
+    ON inventario (id_producto);
+
+-- El índice único ya cubre los joins por producto
+DROP INDEX IF EXISTS idx_inventario_producto;
@@ -0,0 +1,29 @@
+-- Inventario por (producto, ubicación): un producto puede tener stock en
+-- varias ubicaciones, una fila por cada una. La ubicación NULL cuenta como
+-- una ubicación más (stock sin ubicar).
+
+DROP INDEX IF EXISTS uq_inventario_producto;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_inventario_producto_ubicacion
+    ON inventario (id_producto, COALESCE(id_ubicacion, 0));
+
+-- Consultas por ubicación (existencias de una sala) sin recorrer todo el inventario
+CREATE INDEX IF NOT EXISTS idx_inventario_ubicacion_producto
+    ON inventario (id_ubicacion, id_producto);
+
+-- Totales por producto sumando todas sus ubicaciones. El estado se calcula
+-- sobre el total; un estado manual (ej. 'reservado') de alguna fila se conserva.
+CREATE OR REPLACE VIEW inventario_producto AS
+SELECT i.id_producto,
+       SUM(i.stock)::INTEGER AS stock,
+       calcular_estado_stock(
+           SUM(i.stock)::INTEGER,
+           MIN(i.estado_stock) FILTER (
+               WHERE i.estado_stock NOT IN ('agotado', 'stock bajo', 'disponible'))
+       ) AS estado_stock,
+       CASE WHEN COUNT(*) = 1 THEN MIN(i.id_ubicacion) END AS id_ubicacion,
+       CASE WHEN COUNT(*) = 1 THEN MIN(u.nombre)
+            ELSE 'Varias (' || COUNT(*) || ')' END AS ubicacion,
+       COUNT(*)::INTEGER AS ubicaciones
+FROM inventario i
+LEFT JOIN ubicaciones u ON u.id_ubicacion = i.id_ubicacion
+GROUP BY i.id_producto;
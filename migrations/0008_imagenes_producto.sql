@@ -0,0 +1,26 @@
+-- Imágenes de productos fuera de la fila de productos: el catálogo solo lee
+-- el hash y los bytes se piden al generar una miniatura que no está en el
+-- caché en disco. Las imágenes se guardan por contenido (sha256), así dos
+-- productos con la misma foto comparten una fila.
+CREATE TABLE IF NOT EXISTS imagenes (
+    hash CHAR(64) PRIMARY KEY,
+    datos BYTEA NOT NULL
+);
+
+-- JPEG/PNG ya vienen comprimidos: guardarlos fuera de línea sin recomprimir
+ALTER TABLE imagenes ALTER COLUMN datos SET STORAGE EXTERNAL;
+
+CREATE TABLE IF NOT EXISTS imagenes_producto (
+    id_producto INTEGER PRIMARY KEY REFERENCES productos(id_producto) ON DELETE CASCADE,
+    hash CHAR(64) NOT NULL REFERENCES imagenes(hash)
+);
+
+-- Para saber si una imagen reemplazada quedó sin productos
+CREATE INDEX IF NOT EXISTS idx_imagenes_producto_hash
+    ON imagenes_producto (hash);
+
+-- El catálogo de productos guarda el hash de la imagen
+DROP TRIGGER IF EXISTS trg_imagenes_producto_version_catalogo ON imagenes_producto;
+CREATE TRIGGER trg_imagenes_producto_version_catalogo
+    AFTER INSERT OR UPDATE OR DELETE ON imagenes_producto
+    FOR EACH STATEMENT EXECUTE PROCEDURE avanzar_version_catalogo('version_catalogo_productos');
@@ -0,0 +1,11 @@
+-- Paginación por cursor (fecha, id_movimiento) del historial de movimientos,
+-- del más reciente al más antiguo, con y sin filtro por tipo
+
+CREATE INDEX IF NOT EXISTS idx_movimientos_fecha_id
+    ON movimientos (fecha DESC, id_movimiento DESC);
+CREATE INDEX IF NOT EXISTS idx_movimientos_tipo_fecha_id
+    ON movimientos (tipo, fecha DESC, id_movimiento DESC);
+
+-- Los índices anteriores solo por fecha quedan cubiertos por los nuevos
+DROP INDEX IF EXISTS idx_movimientos_fecha;
+DROP INDEX IF EXISTS idx_movimientos_tipo_fecha;
@@ -0,0 +1,144 @@
+-- Historial de movimientos particionado por mes sobre fecha. Las consultas
+-- con filtro de fecha solo leen los meses que tocan, y los meses viejos se
+-- pueden desprender y archivar en un archivo comprimido (ver
+-- MovementModel.archive_partition) y volver a adjuntar cuando se necesiten.
+
+-- Partición movimientos_AAAA_MM de un mes (si no existe)
+CREATE OR REPLACE FUNCTION crear_particion_movimientos(mes DATE)
+RETURNS TEXT AS $$
+DECLARE
+    desde DATE := date_trunc('month', mes)::DATE;
+    nombre TEXT := 'movimientos_' || to_char(desde, 'YYYY_MM');
+BEGIN
+    IF to_regclass(nombre) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF movimientos FOR VALUES FROM (%L) TO (%L)',
+                       nombre, desde, (desde + INTERVAL '1 month')::DATE);
+    END IF;
+    RETURN nombre;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Particiones del mes actual y de los próximos; la aplicación la llama al iniciar
+CREATE OR REPLACE FUNCTION crear_particiones_movimientos(meses_adelante INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    mes DATE;
+BEGIN
+    FOR mes IN
+        SELECT g::DATE FROM generate_series(
+            date_trunc('month', NOW()),
+            date_trunc('month', NOW()) + make_interval(months => meses_adelante),
+            INTERVAL '1 month') AS g
+    LOOP
+        PERFORM crear_particion_movimientos(mes);
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- La tabla se reconstruye (se renombra, se copia y se borra la vieja): si
+-- hay vistas sobre movimientos, el DROP fallaría al final de la copia, así
+-- que se avisa antes de empezar
+DO $$
+DECLARE
+    vistas TEXT;
+BEGIN
+    SELECT string_agg(DISTINCT v.oid::regclass::TEXT, ', ')
+    INTO vistas
+    FROM pg_depend d
+    JOIN pg_rewrite r ON r.oid = d.objid
+    JOIN pg_class v ON v.oid = r.ev_class
+    WHERE d.classid = 'pg_rewrite'::regclass
+      AND d.refobjid = 'movimientos'::regclass
+      AND v.oid <> 'movimientos'::regclass;
+    IF vistas IS NOT NULL THEN
+        RAISE EXCEPTION 'Las vistas % dependen de movimientos: bórrelas antes de aplicar esta migración y créelas de nuevo después', vistas;
+    END IF;
+END $$;
+
+-- La clave de partición no puede ser NULL: los movimientos sin fecha (solo
+-- posibles en datos muy antiguos) quedan en 1970
+UPDATE movimientos SET fecha = TIMESTAMP '1970-01-01' WHERE fecha IS NULL;
+
+ALTER TABLE movimientos RENAME TO movimientos_sin_particion;
+CREATE TABLE movimientos (
+    LIKE movimientos_sin_particion INCLUDING DEFAULTS INCLUDING CONSTRAINTS
+) PARTITION BY RANGE (fecha);
+ALTER TABLE movimientos ALTER COLUMN fecha SET NOT NULL;
+
+-- Un mes por cada mes con datos, más los próximos
+DO $$
+DECLARE
+    mes DATE;
+BEGIN
+    FOR mes IN
+        SELECT g::DATE FROM generate_series(
+            (SELECT date_trunc('month', COALESCE(MIN(fecha), NOW())) FROM movimientos_sin_particion),
+            date_trunc('month', NOW()),
+            INTERVAL '1 month') AS g
+    LOOP
+        PERFORM crear_particion_movimientos(mes);
+    END LOOP;
+    PERFORM crear_particiones_movimientos(3);
+END $$;
+
+-- Sin partición DEFAULT: un movimiento con fecha de un mes archivado o sin
+-- partición se rechaza, en lugar de quedar donde después impediría volver
+-- a adjuntar ese mes (ver restore_partition)
+
+INSERT INTO movimientos SELECT * FROM movimientos_sin_particion;
+
+-- La secuencia de id_movimiento pasa a la tabla nueva antes de borrar la vieja
+DO $$
+DECLARE
+    identidad BOOLEAN;
+    secuencia TEXT;
+BEGIN
+    SELECT attidentity <> '' INTO identidad
+    FROM pg_attribute
+    WHERE attrelid = 'movimientos_sin_particion'::regclass AND attname = 'id_movimiento';
+
+    IF identidad THEN
+        -- Una secuencia IDENTITY no se puede pasar a otra tabla (ni usar en
+        -- una particionada antes de PostgreSQL 17): se reemplaza por una
+        -- secuencia común que sigue desde el último id
+        ALTER TABLE movimientos_sin_particion ALTER COLUMN id_movimiento DROP IDENTITY;
+        CREATE SEQUENCE movimientos_id_movimiento_seq OWNED BY movimientos.id_movimiento;
+        PERFORM setval('movimientos_id_movimiento_seq',
+                       COALESCE((SELECT MAX(id_movimiento) FROM movimientos), 0) + 1, FALSE);
+        ALTER TABLE movimientos
+            ALTER COLUMN id_movimiento SET DEFAULT nextval('movimientos_id_movimiento_seq');
+    ELSE
+        secuencia := pg_get_serial_sequence('movimientos_sin_particion', 'id_movimiento');
+        IF secuencia IS NOT NULL THEN
+            EXECUTE format('ALTER SEQUENCE %s OWNED BY movimientos.id_movimiento', secuencia);
+        END IF;
+    END IF;
+END $$;
+
+DROP TABLE movimientos_sin_particion;
+
+-- La clave primaria de una tabla particionada incluye la clave de partición;
+-- id_movimiento sigue siendo único porque sale de la secuencia
+ALTER TABLE movimientos ADD CONSTRAINT movimientos_pkey PRIMARY KEY (id_movimiento, fecha);
+ALTER TABLE movimientos ADD CONSTRAINT movimientos_id_producto_fkey
+    FOREIGN KEY (id_producto) REFERENCES productos (id_producto);
+ALTER TABLE movimientos ADD CONSTRAINT movimientos_id_ubicacion_fkey
+    FOREIGN KEY (id_ubicacion) REFERENCES ubicaciones (id_ubicacion);
+ALTER TABLE movimientos ADD CONSTRAINT movimientos_id_responsable_fkey
+    FOREIGN KEY (id_responsable) REFERENCES usuarios (id);
+
+-- Los mismos índices de antes, ahora particionados (uno por mes)
+CREATE INDEX IF NOT EXISTS idx_movimientos_producto
+    ON movimientos (id_producto);
+CREATE INDEX IF NOT EXISTS idx_movimientos_fecha_id
+    ON movimientos (fecha DESC, id_movimiento DESC);
+CREATE INDEX IF NOT EXISTS idx_movimientos_tipo_fecha_id
+    ON movimientos (tipo, fecha DESC, id_movimiento DESC);
+
+-- Meses desprendidos y guardados en archivos comprimidos
+CREATE TABLE IF NOT EXISTS movimientos_archivados (
+    mes DATE PRIMARY KEY,
+    archivo TEXT NOT NULL,
+    filas INTEGER NOT NULL,
+    archivado_en TIMESTAMP NOT NULL DEFAULT NOW()
+);
@@ -0,0 +1,85 @@
+-- Resumen diario de movimientos por (día, producto, tipo, ubicación), al día
+-- con cada INSERT/UPDATE/DELETE sobre movimientos. Las estadísticas suman
+-- días en lugar de recorrer movimientos. Archivar un mes (DETACH + DROP) no
+-- dispara los triggers: sus días siguen contando en las estadísticas.
+
+-- Sin escrituras en movimientos mientras se carga el resumen y se crean los triggers
+LOCK TABLE movimientos IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS movimientos_diarios (
+    dia DATE NOT NULL,
+    id_producto INTEGER NOT NULL,
+    tipo VARCHAR(10) NOT NULL,
+    id_ubicacion INTEGER,
+    movimientos INTEGER NOT NULL,
+    cantidad BIGINT NOT NULL
+);
+
+-- La ubicación NULL cuenta como una ubicación más, como en inventario
+CREATE UNIQUE INDEX IF NOT EXISTS uq_movimientos_diarios
+    ON movimientos_diarios (dia, id_producto, tipo, COALESCE(id_ubicacion, 0));
+
+-- Estadísticas de un producto en un rango de días
+CREATE INDEX IF NOT EXISTS idx_movimientos_diarios_producto_dia
+    ON movimientos_diarios (id_producto, dia);
+
+INSERT INTO movimientos_diarios (dia, id_producto, tipo, id_ubicacion, movimientos, cantidad)
+SELECT fecha::DATE, id_producto, tipo, id_ubicacion, COUNT(*), SUM(cantidad)
+FROM movimientos
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (dia, id_producto, tipo, COALESCE(id_ubicacion, 0)) DO NOTHING;
+
+-- Un trigger por sentencia: una carga de miles de movimientos hace un solo
+-- upsert agrupado. Las tablas de transición existen según la operación.
+CREATE OR REPLACE FUNCTION acumular_movimientos_diarios()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE movimientos_diarios d
+        SET movimientos = d.movimientos - v.movimientos,
+            cantidad = d.cantidad - v.cantidad
+        FROM (
+            SELECT fecha::DATE AS dia, id_producto, tipo, id_ubicacion,
+                   COUNT(*) AS movimientos, SUM(cantidad) AS cantidad
+            FROM viejos
+            GROUP BY 1, 2, 3, 4
+        ) v
+        WHERE d.dia = v.dia AND d.id_producto = v.id_producto AND d.tipo = v.tipo
+          AND COALESCE(d.id_ubicacion, 0) = COALESCE(v.id_ubicacion, 0);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO movimientos_diarios (dia, id_producto, tipo, id_ubicacion, movimientos, cantidad)
+        SELECT fecha::DATE, id_producto, tipo, id_ubicacion, COUNT(*), SUM(cantidad)
+        FROM nuevos
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (dia, id_producto, tipo, COALESCE(id_ubicacion, 0)) DO UPDATE
+        SET movimientos = movimientos_diarios.movimientos + EXCLUDED.movimientos,
+            cantidad = movimientos_diarios.cantidad + EXCLUDED.cantidad;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM movimientos_diarios WHERE movimientos <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición no admiten varios eventos en un mismo trigger
+DROP TRIGGER IF EXISTS trg_movimientos_diarios_insert ON movimientos;
+CREATE TRIGGER trg_movimientos_diarios_insert
+    AFTER INSERT ON movimientos
+    REFERENCING NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE PROCEDURE acumular_movimientos_diarios();
+
+DROP TRIGGER IF EXISTS trg_movimientos_diarios_update ON movimientos;
+CREATE TRIGGER trg_movimientos_diarios_update
+    AFTER UPDATE ON movimientos
+    REFERENCING OLD TABLE AS viejos NEW TABLE AS nuevos
+    FOR EACH STATEMENT EXECUTE PROCEDURE acumular_movimientos_diarios();
+
+DROP TRIGGER IF EXISTS trg_movimientos_diarios_delete ON movimientos;
+CREATE TRIGGER trg_movimientos_diarios_delete
+    AFTER DELETE ON movimientos
+    REFERENCING OLD TABLE AS viejos
+    FOR EACH STATEMENT EXECUTE PROCEDURE acumular_movimientos_diarios();
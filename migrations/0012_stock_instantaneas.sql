@@ -0,0 +1,107 @@
+-- Stock de cada producto a fin de mes, calculado desde el libro de
+-- movimientos. El stock a cualquier fecha es la foto anterior más el resumen
+-- diario (movimientos_diarios) de los días siguientes y los movimientos del
+-- último día: a lo sumo un mes de días, sin importar la antigüedad.
+
+-- Sin escrituras de stock mientras se calcula el saldo inicial
+LOCK TABLE inventario, movimientos IN SHARE MODE;
+
+CREATE TABLE IF NOT EXISTS stock_instantaneas (
+    dia DATE NOT NULL,          -- stock al terminar este día
+    id_producto INTEGER NOT NULL,
+    stock INTEGER NOT NULL,
+    PRIMARY KEY (dia, id_producto)
+);
+
+-- Saldo inicial ('-infinity'): lo que el libro no explica del stock actual
+-- (productos cargados antes de que existieran los movimientos)
+INSERT INTO stock_instantaneas (dia, id_producto, stock)
+SELECT '-infinity'::DATE, id_producto, SUM(stock)::INTEGER
+FROM (
+    SELECT id_producto, stock FROM inventario
+    UNION ALL
+    SELECT id_producto,
+           -SUM(CASE tipo WHEN 'Entrada' THEN cantidad WHEN 'Salida' THEN -cantidad ELSE 0 END)
+    FROM movimientos_diarios
+    GROUP BY id_producto
+) t
+GROUP BY id_producto
+HAVING SUM(stock) <> 0
+ON CONFLICT (dia, id_producto) DO NOTHING;
+
+-- Foto del stock al terminar el día "hasta", desde la foto anterior
+CREATE OR REPLACE FUNCTION crear_instantanea_stock(hasta DATE)
+RETURNS VOID AS $$
+DECLARE
+    base DATE;
+BEGIN
+    SELECT COALESCE(MAX(dia), '-infinity'::DATE) INTO base
+    FROM stock_instantaneas WHERE dia < hasta;
+
+    INSERT INTO stock_instantaneas (dia, id_producto, stock)
+    SELECT hasta, COALESCE(s.id_producto, d.id_producto),
+           COALESCE(s.stock, 0) + COALESCE(d.neto, 0)
+    FROM (
+        SELECT id_producto, stock FROM stock_instantaneas WHERE dia = base
+    ) s
+    FULL JOIN (
+        SELECT id_producto,
+               SUM(CASE tipo WHEN 'Entrada' THEN cantidad WHEN 'Salida' THEN -cantidad ELSE 0 END) AS neto
+        FROM movimientos_diarios
+        WHERE dia > base AND dia <= hasta
+        GROUP BY id_producto
+    ) d ON d.id_producto = s.id_producto
+    ON CONFLICT (dia, id_producto) DO UPDATE SET stock = EXCLUDED.stock;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fotos de fin de mes que falten, hasta el último mes terminado; la
+-- aplicación la llama al iniciar
+CREATE OR REPLACE FUNCTION crear_instantaneas_stock()
+RETURNS INTEGER AS $$
+DECLARE
+    desde DATE;
+    mes DATE;
+    creadas INTEGER := 0;
+BEGIN
+    SELECT MAX(dia) INTO desde FROM stock_instantaneas WHERE dia > '-infinity'::DATE;
+    IF desde IS NULL THEN
+        SELECT MIN(dia) INTO desde FROM movimientos_diarios;
+    END IF;
+    IF desde IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    FOR mes IN
+        SELECT (g + INTERVAL '1 month' - INTERVAL '1 day')::DATE
+        FROM generate_series(date_trunc('month', desde),
+                             date_trunc('month', CURRENT_DATE) - INTERVAL '1 month',
+                             INTERVAL '1 month') AS g
+    LOOP
+        IF NOT EXISTS (SELECT 1 FROM stock_instantaneas WHERE dia = mes) THEN
+            PERFORM crear_instantanea_stock(mes);
+            creadas := creadas + 1;
+        END IF;
+    END LOOP;
+    RETURN creadas;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Un movimiento con fecha ya cubierta por una foto (cargado tarde o con
+-- fecha pasada) la deja vieja: se borran esa y las siguientes, y se vuelven
+-- a crear en el próximo inicio
+CREATE OR REPLACE FUNCTION invalidar_instantaneas_stock()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM stock_instantaneas
+    WHERE dia >= (CASE WHEN TG_OP = 'DELETE' THEN OLD.dia ELSE NEW.dia END);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_invalidar_instantaneas_stock ON movimientos_diarios;
+CREATE TRIGGER trg_invalidar_instantaneas_stock
+    AFTER INSERT OR UPDATE OR DELETE ON movimientos_diarios
+    FOR EACH ROW EXECUTE PROCEDURE invalidar_instantaneas_stock();
+
+SELECT crear_instantaneas_stock();
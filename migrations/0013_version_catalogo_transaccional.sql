@@ -0,0 +1,31 @@
+-- Sello de versión del catálogo transaccional (reemplaza la secuencia de 0005).
+-- nextval no es transaccional: otra terminal veía la versión nueva antes del
+-- commit del que escribía, recargaba los datos viejos y los guardaba con esa
+-- versión, y el catálogo quedaba desactualizado hasta el próximo cambio. El
+-- UPDATE de una fila recién se ve cuando se confirma la transacción que lo
+-- hizo. A cambio, las escrituras concurrentes sobre el catálogo esperan en
+-- esa fila hasta el commit de la anterior.
+
+CREATE TABLE IF NOT EXISTS version_catalogo (
+    -- Mismo argumento que reciben los triggers de avanzar_version_catalogo
+    nombre TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO version_catalogo (nombre, version)
+SELECT 'version_catalogo_productos', last_value
+FROM version_catalogo_productos
+ON CONFLICT (nombre) DO NOTHING;
+
+-- Los triggers de 0005 y 0008 siguen llamando a esta función
+CREATE OR REPLACE FUNCTION avanzar_version_catalogo()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    UPDATE version_catalogo SET version = version + 1
+    WHERE nombre = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$;
+
+DROP SEQUENCE IF EXISTS version_catalogo_productos;
@@ -0,0 +1,39 @@
+-- Quita la partición DEFAULT de movimientos (creada por versiones anteriores
+-- de 0010). Recibía los movimientos con fecha de un mes archivado, y con
+-- esas filas ya no se podía volver a adjuntar el mes. Ahora esos
+-- movimientos se rechazan.
+--
+-- Las filas se mueven directo de tabla a tabla, sin pasar por movimientos,
+-- para que los triggers del resumen diario no las cuenten dos veces.
+DO $$
+DECLARE
+    mes_datos DATE;
+    nombre TEXT;
+BEGIN
+    IF to_regclass('movimientos_default') IS NULL THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE movimientos DETACH PARTITION movimientos_default;
+
+    -- Meses no archivados: a su partición (se crea si falta)
+    FOR mes_datos IN
+        SELECT DISTINCT date_trunc('month', fecha)::DATE
+        FROM movimientos_default
+        WHERE date_trunc('month', fecha)::DATE NOT IN (SELECT mes FROM movimientos_archivados)
+    LOOP
+        nombre := crear_particion_movimientos(mes_datos);
+        EXECUTE format(
+            'WITH movidos AS (DELETE FROM movimientos_default WHERE fecha >= %L AND fecha < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM movidos',
+            mes_datos, (mes_datos + INTERVAL '1 month')::DATE, nombre);
+    END LOOP;
+
+    IF EXISTS (SELECT 1 FROM movimientos_default) THEN
+        -- Solo quedan movimientos de meses archivados: restore_partition los
+        -- suma a su mes al volver a adjuntarlo
+        ALTER TABLE movimientos_default RENAME TO movimientos_fuera_de_particion;
+    ELSE
+        DROP TABLE movimientos_default;
+    END IF;
+END $$;
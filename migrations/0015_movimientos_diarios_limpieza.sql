@@ -0,0 +1,44 @@
+-- El trigger del resumen diario borraba las filas en cero recorriendo toda
+-- movimientos_diarios en cada UPDATE/DELETE sobre movimientos. Ahora solo
+-- revisa los (día, producto, tipo, ubicación) de las filas modificadas.
+CREATE OR REPLACE FUNCTION acumular_movimientos_diarios()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE movimientos_diarios d
+        SET movimientos = d.movimientos - v.movimientos,
+            cantidad = d.cantidad - v.cantidad
+        FROM (
+            SELECT fecha::DATE AS dia, id_producto, tipo, id_ubicacion,
+                   COUNT(*) AS movimientos, SUM(cantidad) AS cantidad
+            FROM viejos
+            GROUP BY 1, 2, 3, 4
+        ) v
+        WHERE d.dia = v.dia AND d.id_producto = v.id_producto AND d.tipo = v.tipo
+          AND COALESCE(d.id_ubicacion, 0) = COALESCE(v.id_ubicacion, 0);
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO movimientos_diarios (dia, id_producto, tipo, id_ubicacion, movimientos, cantidad)
+        SELECT fecha::DATE, id_producto, tipo, id_ubicacion, COUNT(*), SUM(cantidad)
+        FROM nuevos
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (dia, id_producto, tipo, COALESCE(id_ubicacion, 0)) DO UPDATE
+        SET movimientos = movimientos_diarios.movimientos + EXCLUDED.movimientos,
+            cantidad = movimientos_diarios.cantidad + EXCLUDED.cantidad;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Solo las claves que tocó la sentencia (usa uq_movimientos_diarios)
+        DELETE FROM movimientos_diarios d
+        USING (
+            SELECT DISTINCT fecha::DATE AS dia, id_producto, tipo, id_ubicacion
+            FROM viejos
+        ) v
+        WHERE d.dia = v.dia AND d.id_producto = v.id_producto AND d.tipo = v.tipo
+          AND COALESCE(d.id_ubicacion, 0) = COALESCE(v.id_ubicacion, 0)
+          AND d.movimientos <= 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
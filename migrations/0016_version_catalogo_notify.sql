@@ -0,0 +1,20 @@
+-- Aviso de cambios del catálogo con NOTIFY (reemplaza la tabla de 0013).
+-- Con el UPDATE de la fila version_catalogo cada escritura en productos,
+-- inventario o sus tablas maestras esperaba en el bloqueo de esa fila hasta
+-- el commit de la anterior, y dos transacciones que tocaban tablas en orden
+-- distinto podían bloquearse entre sí. NOTIFY no bloquea filas y, como el
+-- UPDATE, solo se entrega cuando se confirma la transacción; los avisos
+-- iguales de una misma transacción llegan una sola vez.
+
+-- Los triggers de 0005 y 0008 siguen llamando a esta función; el argumento
+-- es el canal que escucha la aplicación (ver models/catalog.py)
+CREATE OR REPLACE FUNCTION avanzar_version_catalogo()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM pg_notify(TG_ARGV[0], '');
+    RETURN NULL;
+END;
+$$;
+
+DROP TABLE IF EXISTS version_catalogo;
@@ -0,0 +1,7 @@
+-- Los meses archivados se quedan en la base, en un esquema aparte, en lugar
+-- de copiarse a un archivo local y borrarse: la única copia quedaba en el
+-- equipo que archivó. archive_partition desprende la partición y la mueve a
+-- este esquema; restore_partition la devuelve y la vuelve a adjuntar.
+-- movimientos_archivados.archivo guarda ahora el nombre de esa tabla.
+
+CREATE SCHEMA IF NOT EXISTS archivo_movimientos;
@@ -0,0 +1,151 @@
+"""Migraciones versionadas del esquema.
+
+Cada archivo NNNN_descripcion.sql de esta carpeta es una migración; se
+aplican en orden, cada una en su propia transacción, y quedan registradas
+en la tabla schema_migrations. Uso manual: python -m migrations.runner
+"""
+import os
+import re
+
+from database import get_connection
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Bloqueo consultivo para que dos terminales no migren a la vez
+_LOCK_ID = 0x1A7E5C0DE
+
+_file_re = re.compile(r"^(\d{4})_(\w+)\.sql$")
+_create_index_re = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE)
+_drop_index_re = re.compile(
+    r"DROP\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+EXISTS\s+)?(\w+)", re.IGNORECASE)
+
+
+def available_migrations():
+    """Lista ordenada de (versión, nombre, ruta) de los archivos de migración"""
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = _file_re.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2),
+                               os.path.join(MIGRATIONS_DIR, filename)))
+    return sorted(migrations)
+
+
+def _read_sql(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def _ensure_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            aplicada_en TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+
+
+def applied_versions(cursor):
+    """Versiones ya aplicadas en la base de datos"""
+    _ensure_table(cursor)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations():
+    """Migraciones que faltan aplicar"""
+    with get_connection() as conn, conn.cursor() as cursor:
+        applied = applied_versions(cursor)
+    return [m for m in available_migrations() if m[0] not in applied]
+
+
+def run_migrations():
+    """Aplica en orden las migraciones pendientes.
+
+    Returns:
+        list: nombres de las migraciones aplicadas
+    """
+    applied_now = []
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_lock(%s)", (_LOCK_ID,))
+            try:
+                applied = applied_versions(cursor)
+                conn.commit()
+
+                for version, name, path in available_migrations():
+                    if version in applied:
+                        continue
+                    try:
+                        cursor.execute(_read_sql(path))
+                        cursor.execute(
+                            "INSERT INTO schema_migrations (version, nombre) VALUES (%s, %s)",
+                            (version, name))
+                        conn.commit()
+                    except Exception as e:
+                        conn.rollback()
+                        raise Exception(f"Falló la migración {version:04d}_{name}: {e}")
+                    applied_now.append(f"{version:04d}_{name}")
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_ID,))
+    return applied_now
+
+
+def expected_indexes():
+    """Índices que deberían existir según los archivos de migración"""
+    indexes = []
+    for _, _, path in available_migrations():
+        sql = _read_sql(path)
+        for match in _create_index_re.finditer(sql):
+            if match.group(1).lower() not in indexes:
+                indexes.append(match.group(1).lower())
+        for match in _drop_index_re.finditer(sql):
+            if match.group(1).lower() in indexes:
+                indexes.remove(match.group(1).lower())
+    return indexes
+
+
+def missing_indexes():
+    """Índices esperados que no existen en la base de datos"""
+    expected = expected_indexes()
+    with get_connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE indexname = ANY(%s)",
+            (expected,))
+        existing = {row[0] for row in cursor.fetchall()}
+    return [name for name in expected if name not in existing]
+
+
+def check_schema(auto_apply=False):
+    """Verificación de arranque: aplica lo pendiente (si se pide) y reporta
+    migraciones e índices faltantes.
+
+    Returns:
+        dict: applied (aplicadas ahora), pending (las que siguen pendientes)
+        y missing (índices que siguen faltando)
+    """
+    applied = []
+    if auto_apply:
+        applied = run_migrations()
+        if applied:
+            print(f"Migraciones aplicadas: {', '.join(applied)}")
+
+    pending = [f"{version:04d}_{name}" for version, name, _ in pending_migrations()]
+    if pending:
+        print(f"Advertencia: migraciones pendientes: {', '.join(pending)} "
+              "(aplicar con python -m migrations.runner)")
+
+    missing = missing_indexes()
+    if missing:
+        print(f"Advertencia: faltan índices en la base de datos: {', '.join(missing)}")
+    return {'applied': applied, 'pending': pending, 'missing': missing}
+
+
+if __name__ == "__main__":
+    applied = run_migrations()
+    print("Migraciones aplicadas: " + (", ".join(applied) if applied else "ninguna"))
+    missing = missing_indexes()
+    print("Índices faltantes: " + (", ".join(missing) if missing else "ninguno"))
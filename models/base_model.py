@@ -0,0 +1,44 @@
+# models/base_model.py
+from database import create_connection
+
+
+class BaseModel:
+    """Modelo con una conexión prestada por el pool.
+
+    La conexión queda tomada hasta close(). Los controladores registran su
+    modelo con app.track_model() para que navigate() lo cierre al salir de
+    la pantalla; las tareas en segundo plano lo usan en un bloque with.
+    """
+
+    def __init__(self, conn=None):
+        # Con conn, el modelo trabaja dentro de la conexión (y transacción)
+        # del llamador y no la devuelve al cerrar
+        self._owns_conn = conn is None
+        self.conn = conn or create_connection()
+        self.cursor = self.conn.cursor()
+
+    def close(self):
+        """Cierra el cursor y devuelve la conexión al pool"""
+        cursor, self.cursor = self.cursor, None
+        try:
+            if cursor is not None and not cursor.closed:
+                cursor.close()
+        finally:
+            if self._owns_conn:
+                self.conn.close()
+
+    @classmethod
+    def call(cls, method, *args, **kwargs):
+        """method(modelo, ...) con un modelo nuevo que se cierra al terminar.
+
+        Para las tareas en segundo plano, ej.
+        run_async(app, lambda: ProductModel.call(ProductModel.search_products, term))
+        """
+        with cls() as model:
+            return method(model, *args, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
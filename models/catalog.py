@@ -0,0 +1,213 @@
+# models/catalog.py
+import threading
+import time
+from collections import namedtuple
+
+from database import get_connection, NotificationListener
+from models.lookups import lookups
+from config import CATALOG
+
+CatalogProduct = namedtuple("CatalogProduct", (
+    "id_producto", "codigo", "nombre", "id_categoria", "categoria",
+    "id_marca", "marca", "stock", "id_ubicacion", "ubicacion", "estado_stock",
+    "activo", "ubicaciones", "imagen"))
+
+
+class ProductCatalog:
+    """Catálogo de productos en memoria, compartido por todo el proceso.
+
+    Lo usan los combos y búsquedas por id/código/nombre/categoría en lugar
+    de consultar la base cada vez. Se invalida con invalidate() cuando este
+    proceso escribe productos o inventario; los cambios de otras terminales
+    llegan como NOTIFY en el canal version_catalogo_productos (ver
+    migraciones 0005 y 0016) y se revisan cada CATALOG['check_interval_s']
+    segundos.
+
+    En el hilo de Tk no se consulta la base si ya hay una carga: se usa esa
+    y la revisión de avisos (o la recarga) corre en un hilo aparte.
+    """
+
+    # Canal de NOTIFY de los triggers de avanzar_version_catalogo
+    CHANNEL = "version_catalogo_productos"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._listener = NotificationListener(self.CHANNEL)
+        self._checked_at = 0.0
+        self._stale = True
+        self._refreshing = False
+
+    def warm(self):
+        """Carga el catálogo si hace falta (se llama tras el login)"""
+        self._ensure_fresh()
+
+    def invalidate(self):
+        """Marca el catálogo para recargarlo en el próximo acceso"""
+        self._stale = True
+
+    def check(self):
+        """Revisa si otra terminal cambió algo (lo usa LookupRegistry)"""
+        self._ensure_fresh()
+
+    # ===== CONSULTAS =====
+
+    def products(self, include_inactive=False):
+        """Productos ordenados por nombre"""
+        snapshot = self._ensure_fresh()
+        if include_inactive:
+            return list(snapshot['ordered'])
+        return [p for p in snapshot['ordered'] if p.activo]
+
+    def get(self, product_id, fresh=True):
+        """Producto por id (o None); fresh como en by_code()"""
+        snapshot = self._snapshot if not fresh and self._snapshot is not None else self._ensure_fresh()
+        return snapshot['by_id'].get(product_id)
+
+    def by_code(self, codigo, fresh=True):
+        """Producto por código, sin distinguir mayúsculas (o None).
+
+        Con fresh=False se usa la carga actual sin revisar la versión en la
+        base (para lecturas muy seguidas, como el escáner de códigos).
+        """
+        if not codigo:
+            return None
+        snapshot = self._snapshot if not fresh and self._snapshot is not None else self._ensure_fresh()
+        return snapshot['by_code'].get(codigo.strip().lower())
+
+    def by_name(self, nombre):
+        """Producto por nombre exacto, prefiriendo el activo (o None)"""
+        return self._ensure_fresh()['by_name'].get(nombre)
+
+    def id_by_name(self, nombre):
+        """Id de un producto por nombre exacto (o None)"""
+        product = self.by_name(nombre)
+        return product.id_producto if product else None
+
+    def by_category(self, id_categoria, include_inactive=False):
+        """Productos de una categoría, ordenados por nombre"""
+        products = self._ensure_fresh()['by_category'].get(id_categoria, ())
+        if include_inactive:
+            return list(products)
+        return [p for p in products if p.activo]
+
+    def columns(self):
+        """Productos activos en columnas NumPy (InventorySnapshot) de la versión vigente"""
+        snapshot = self._ensure_fresh()
+        return self._columns_of(snapshot)
+
+    def fresh_columns(self):
+        """Como columns(), pero sin ir a la base: None si hay que recargar"""
+        snapshot = self._snapshot
+        if (snapshot is None or self._stale
+                or time.monotonic() - self._checked_at >= CATALOG['check_interval_s']):
+            return None
+        return self._columns_of(snapshot)
+
+    @staticmethod
+    def _columns_of(snapshot):
+        columns = snapshot.get('columns')
+        if columns is None:
+            # Se arma una vez por versión; el import es perezoso para que los
+            # combos no dependan de NumPy
+            from models.inventory_snapshot import InventorySnapshot
+            columns = snapshot['columns'] = InventorySnapshot(snapshot['ordered'])
+        return columns
+
+    # ===== CARGA =====
+
+    def _ensure_fresh(self):
+        """Devuelve el índice vigente, recargándolo si cambió la versión"""
+        snapshot = self._snapshot
+        if (snapshot is not None and not self._stale
+                and time.monotonic() - self._checked_at < CATALOG['check_interval_s']):
+            return snapshot
+
+        if snapshot is not None and threading.current_thread() is threading.main_thread():
+            # El hilo de Tk no espera a la base: usa la carga actual y la
+            # verificación corre en segundo plano. Solo la primera carga
+            # (antes de que termine warm()) se hace en línea.
+            self._refresh_in_background()
+            return snapshot
+        return self._refresh()
+
+    def _refresh_in_background(self):
+        """Verifica la versión (y recarga) en un hilo aparte, uno a la vez"""
+        if self._refreshing:
+            return
+        self._refreshing = True
+
+        def refresh():
+            try:
+                self._refresh()
+            except Exception as e:
+                print(f"Error al actualizar el catálogo: {e}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=refresh, name="catalogo", daemon=True).start()
+
+    def _refresh(self):
+        """Revisa los avisos de la base y recarga si hubo cambios"""
+        with self._lock:
+            # Otro hilo pudo recargar mientras se esperaba el bloqueo
+            if (self._snapshot is not None and not self._stale
+                    and time.monotonic() - self._checked_at < CATALOG['check_interval_s']):
+                return self._snapshot
+
+            # Se escucha antes de leer: un cambio confirmado durante la carga
+            # queda como aviso pendiente y fuerza otra recarga
+            changed = self._listener.changed()
+            if changed and self._snapshot is not None:
+                # Los avisos también cubren marcas, categorías y ubicaciones
+                lookups.invalidate()
+            if self._snapshot is None or self._stale or changed:
+                # Se marca como vigente antes de leer: una invalidación
+                # que llegue durante la carga fuerza otra recarga
+                self._stale = False
+                try:
+                    with get_connection() as conn, conn.cursor() as cursor:
+                        self._snapshot = self._load(cursor)
+                except Exception:
+                    self._stale = True
+                    raise
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    @staticmethod
+    def _load(cursor):
+        cursor.execute("""
+            SELECT p.id_producto, p.codigo, p.nombre, p.id_categoria, c.nombre,
+                   p.id_marca, m.nombre, COALESCE(i.stock, 0), i.id_ubicacion, i.ubicacion,
+                   COALESCE(i.estado_stock, 'disponible'), p.activo, COALESCE(i.ubicaciones, 0),
+                   ip.hash
+            FROM productos p
+            LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
+            LEFT JOIN marcas m ON p.id_marca = m.id_marca
+            LEFT JOIN inventario_producto i ON p.id_producto = i.id_producto
+            LEFT JOIN imagenes_producto ip ON p.id_producto = ip.id_producto
+            ORDER BY p.nombre, p.id_producto
+        """)
+        ordered = [CatalogProduct(*row) for row in cursor.fetchall()]
+
+        by_id, by_code, by_name, by_category = {}, {}, {}, {}
+        for product in ordered:
+            by_id[product.id_producto] = product
+            if product.codigo:
+                code = product.codigo.strip().lower()
+                if code not in by_code or product.activo:
+                    by_code[code] = product
+            if product.nombre not in by_name or product.activo:
+                by_name[product.nombre] = product
+            by_category.setdefault(product.id_categoria, []).append(product)
+
+        return {
+            'ordered': ordered,
+            'by_id': by_id,
+            'by_code': by_code,
+            'by_name': by_name,
+            'by_category': by_category,
+        }
+
+
+product_catalog = ProductCatalog()
@@ -1,12 +1,9 @@
 from datetime import datetime
-from database import create_connection
+from models.base_model import BaseModel
+from models.catalog import product_catalog
 
 
-class PurchaseModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+class PurchaseModel(BaseModel):
     def get_all_requests(self, status_filter="Todos", priority_filter="Todos"):
         """Obtiene todas las solicitudes con filtros opcionales"""
         query = """
@@ -98,10 +95,4 @@ class PurchaseModel:
 
     def get_active_products(self):
         """Obtiene productos activos"""
-        self.cursor.execute("""
-            SELECT p.id_producto, p.nombre
-            FROM productos p
-            WHERE p.activo = TRUE
-            ORDER BY p.nombre
-        """)
-        return self.cursor.fetchall()
+        return [(p.id_producto, p.nombre) for p in product_catalog.products()]
@@ -1,5 +1,6 @@
 import pandas as pd
 from datetime import datetime
+import itertools
 import os
 
 
@@ -44,6 +45,83 @@ class ExportManager:
         except Exception as e:
             return None, str(e)
 
+    @staticmethod
+    def export_chunks_to_excel(chunks, headers, filename_prefix, sheet_name="Datos"):
+        """
+        Exporta a Excel bloques de filas sin cargarlos todos en memoria
+
+        Args:
+            chunks: Iterable de listas de tuplas (por ejemplo un cursor de servidor)
+            headers: Lista de nombres de columnas
+            filename_prefix: Prefijo para el nombre del archivo
+            sheet_name: Nombre de la hoja de Excel
+
+        Returns:
+            tuple: (nombre_archivo, error) - error es None si fue exitoso
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+        from openpyxl.utils import get_column_letter
+
+        try:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            filename = f"{filename_prefix}_{timestamp}.xlsx"
+
+            # Libro en modo solo escritura: las filas se vuelcan al disco al agregarlas
+            workbook = Workbook(write_only=True)
+            worksheet = workbook.create_sheet(sheet_name)
+
+            chunks = iter(chunks)
+            first_chunk = next(chunks, [])
+
+            # El ancho de columnas se fija antes de escribir: usar el primer bloque
+            widths = [len(str(header)) for header in headers]
+            for row in first_chunk:
+                for i, value in enumerate(row[:len(widths)]):
+                    if value is not None:
+                        widths[i] = max(widths[i], len(str(value)))
+            for col_num, width in enumerate(widths, 1):
+                worksheet.column_dimensions[get_column_letter(col_num)].width = width + 4
+            worksheet.freeze_panes = "A2"
+
+            border_style = Side(border_style="thin", color="000000")
+            border = Border(left=border_style, right=border_style, top=border_style, bottom=border_style)
+            header_font = Font(bold=True, color="FFFFFF", size=12)
+            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+            center_align = Alignment(horizontal="center", vertical="center")
+            left_align = Alignment(horizontal="left", vertical="center")
+
+            def styled_cell(value, header=False):
+                cell = WriteOnlyCell(worksheet, value=value)
+                cell.border = border
+                if header:
+                    cell.font = header_font
+                    cell.fill = header_fill
+                    cell.alignment = center_align
+                else:
+                    cell.alignment = left_align
+                return cell
+
+            worksheet.append([styled_cell(header, header=True) for header in headers])
+
+            total_rows = 0
+            for rows in itertools.chain([first_chunk], chunks):
+                for row in rows:
+                    worksheet.append([styled_cell(value) for value in row])
+                total_rows += len(rows)
+
+            worksheet.auto_filter.ref = f"A1:{get_column_letter(len(headers))}{total_rows + 1}"
+            workbook.save(filename)
+
+            if os.path.exists(filename):
+                return filename, None
+            else:
+                return None, "No se pudo crear el archivo"
+
+        except Exception as e:
+            return None, str(e)
+
     @staticmethod
     def _apply_excel_formatting(worksheet, df):
         """
@@ -107,6 +185,15 @@ class ExportManager:
                    "Código", "Stock", "Ubicación", "Estado"]
         return ExportManager.export_to_excel(data, headers, "inventario", "Inventario")
 
+    @staticmethod
+    def export_inventory_chunks(chunks):
+        """
+        Exportación de inventario leído por bloques desde la base de datos
+        """
+        headers = ["Nro", "Producto", "Marca", "Categoría",
+                   "Código", "Stock", "Ubicación", "Estado"]
+        return ExportManager.export_chunks_to_excel(chunks, headers, "inventario", "Inventario")
+
     @staticmethod
     def export_movements(data):
         """
@@ -116,6 +203,15 @@ class ExportManager:
                    "Cantidad", "Ubicación", "Responsable", "Referencia"]
         return ExportManager.export_to_excel(data, headers, "movimientos", "Movimientos")
 
+    @staticmethod
+    def export_movements_chunks(chunks):
+        """
+        Exportación de movimientos leídos por bloques desde la base de datos
+        """
+        headers = ["Nro", "Fecha", "Tipo", "Producto",
+                   "Cantidad", "Ubicación", "Responsable", "Referencia"]
+        return ExportManager.export_chunks_to_excel(chunks, headers, "movimientos", "Movimientos")
+
     @staticmethod
     def export_purchases(data):
         """
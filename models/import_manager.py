@@ -0,0 +1,115 @@
+import unicodedata
+
+import pandas as pd
+
+from models.export_manager import ExportManager
+
+
+class ImportManager:
+    # Encabezados aceptados (sin acentos ni mayúsculas) para cada columna
+    PRODUCT_COLUMNS = {
+        'codigo': ('codigo', 'cod'),
+        'nombre': ('producto', 'nombre'),
+        'marca': ('marca',),
+        'categoria': ('categoria',),
+        'ubicacion': ('ubicacion',),
+        'stock': ('stock', 'stock inicial', 'cantidad')
+    }
+
+    @staticmethod
+    def _normalize_header(header):
+        text = unicodedata.normalize("NFKD", str(header))
+        text = "".join(c for c in text if not unicodedata.combining(c))
+        return text.strip().rstrip(":").lower()
+
+    @staticmethod
+    def read_products_file(path):
+        """
+        Lee un archivo .xlsx/.xls/.csv de productos
+
+        Returns:
+            DataFrame con las columnas codigo, nombre, marca, categoria,
+            ubicacion y stock (texto); el índice es el número de fila del
+            archivo, para el reporte de rechazos
+        """
+        if path.lower().endswith(".csv"):
+            df = pd.read_csv(path, dtype=str, keep_default_na=False,
+                             sep=None, engine="python", encoding="utf-8-sig")
+        else:
+            df = pd.read_excel(path, dtype=str, keep_default_na=False)
+
+        aliases = {alias: column
+                   for column, names in ImportManager.PRODUCT_COLUMNS.items()
+                   for alias in names}
+        df = df.rename(columns=lambda h: aliases.get(ImportManager._normalize_header(h), h))
+
+        missing = [c for c in ImportManager.PRODUCT_COLUMNS if c not in df.columns]
+        # La ubicación es opcional, como en el formulario
+        missing = [c for c in missing if c != 'ubicacion']
+        if missing:
+            raise Exception(f"Faltan columnas en el archivo: {', '.join(missing)}")
+        if 'ubicacion' not in df.columns:
+            df['ubicacion'] = ""
+
+        df = df[list(ImportManager.PRODUCT_COLUMNS)].fillna("").astype(str)
+        df = df.apply(lambda col: col.str.strip())
+        # Fila 1 = encabezados
+        df.index = df.index + 2
+        return df
+
+    @staticmethod
+    def validate_products(df):
+        """
+        Valida todas las filas a la vez con las mismas reglas que el formulario
+        (ProductController._validate_product_data)
+
+        Returns:
+            tuple: (filas_validas, filas_rechazadas) - las rechazadas llevan
+            la columna 'motivo'
+        """
+        motivo = pd.Series("", index=df.index, dtype=object)
+
+        def reject(mask, reason):
+            motivo[mask & (motivo == "")] = reason
+
+        reject((df['codigo'] == "") | (df['nombre'] == "") | (df['stock'] == ""),
+               "Todos los campos deben estar llenos")
+        reject(~df['stock'].str.isdigit(), "El stock debe ser un número entero positivo")
+        reject(~df['codigo'].str.replace("-", "", regex=False).str.isalnum(),
+               "El código solo debe contener letras, números y guiones")
+        reject(~df['nombre'].str.replace(r"\s", "", regex=True).str.isalnum(),
+               "El nombre solo debe contener letras, números y espacios")
+        reject((df['marca'] == "") | (df['categoria'] == ""),
+               "La marca y la categoría son obligatorias")
+        reject(df['codigo'].str.lower().duplicated(keep="first"),
+               "Código repetido en el archivo")
+
+        valid = df[motivo == ""]
+        rejected = df[motivo != ""].assign(motivo=motivo[motivo != ""])
+        return valid, rejected
+
+    @staticmethod
+    def merge_rejected(df, rejected, extra):
+        """
+        Agrega a las filas rechazadas las que rechazó la base de datos
+
+        Args:
+            extra: lista de (fila, motivo)
+        """
+        if not extra:
+            return rejected
+        filas, motivos = zip(*extra)
+        more = df.loc[list(filas)].assign(motivo=list(motivos))
+        return pd.concat([rejected, more]).sort_index()
+
+    @staticmethod
+    def export_rejected_products(rejected):
+        """
+        Reporte Excel de las filas rechazadas en una importación
+        """
+        headers = ["Fila", "Código", "Producto", "Marca", "Categoría",
+                   "Ubicación", "Stock", "Motivo"]
+        data = [(fila,) + tuple(row) for fila, row in zip(
+            rejected.index,
+            rejected[list(ImportManager.PRODUCT_COLUMNS) + ['motivo']].itertuples(index=False))]
+        return ExportManager.export_to_excel(data, headers, "importacion_rechazados", "Rechazados")
@@ -0,0 +1,87 @@
+# models/inventory_snapshot.py
+import numpy as np
+
+
+class InventorySnapshot:
+    """Listado de inventario en columnas NumPy para filtrar y ordenar en memoria.
+
+    Se arma una vez por versión del catálogo de productos (ver
+    ProductCatalog.columns) con los productos activos. Categoría, marca y
+    estado se guardan como códigos enteros, así un filtro es una comparación
+    de arreglos; cada columna de la tabla tiene una clave de orden entera.
+    """
+
+    # Columnas de la tabla de inventario, en el orden de cada fila
+    COLUMNS = ("Nro", "Producto", "Marca", "Categoría", "Código", "Stock", "Ubicación", "Estado")
+
+    def __init__(self, products):
+        products = [p for p in products if p.activo]
+        self.size = len(products)
+        self.products = products
+
+        # Filas ya formateadas para la tabla (mismo formato que _format_table_data)
+        self.rows = [(
+            p.id_producto,
+            p.nombre,
+            p.marca or "N/A",
+            p.categoria or "N/A",
+            p.codigo,
+            p.stock or 0,
+            p.ubicacion or "N/A",
+            p.estado_stock or "disponible"
+        ) for p in products]
+
+        self.ids = np.fromiter((r[0] for r in self.rows), dtype=np.int64, count=self.size)
+        self.stock = np.fromiter((r[5] for r in self.rows), dtype=np.int64, count=self.size)
+
+        self._codes = {}
+        self._sort_keys = {"Nro": self.ids, "Stock": self.stock}
+        for position, column in ((1, "Producto"), (2, "Marca"), (3, "Categoría"),
+                                 (4, "Código"), (6, "Ubicación"), (7, "Estado")):
+            values = [r[position] for r in self.rows]
+            if column in ("Marca", "Categoría", "Estado"):
+                self._codes[column] = self._encode(values)
+            # Clave de orden: posición del valor entre los valores distintos ordenados
+            self._sort_keys[column] = self._encode([str(v).casefold() for v in values])[1]
+
+    @staticmethod
+    def _encode(values):
+        """(índice valor -> código, arreglo de códigos) con códigos en orden de valor"""
+        distinct = sorted(set(values))
+        index = {value: code for code, value in enumerate(distinct)}
+        codes = np.fromiter((index[v] for v in values), dtype=np.int32, count=len(values))
+        return index, codes
+
+    def filter(self, categoria=None, marca=None, estado=None):
+        """Posiciones de las filas que cumplen los filtros (None = todos)"""
+        mask = np.ones(self.size, dtype=bool)
+        for column, wanted in (("Categoría", categoria), ("Marca", marca), ("Estado", estado)):
+            if wanted is None:
+                continue
+            index, codes = self._codes[column]
+            code = index.get(wanted)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+            mask &= codes == code
+        return np.flatnonzero(mask)
+
+    def sort(self, positions, column=None, descending=False):
+        """Ordena posiciones por una columna de la tabla (desempate por nombre)"""
+        if column is None or column not in self._sort_keys:
+            return positions
+        # Las posiciones siguen el orden por nombre: se parte de ese orden
+        positions = np.sort(positions)
+        keys = self._sort_keys[column][positions]
+        # argsort estable: a igual clave se conserva el orden por nombre
+        order = np.argsort(-keys if descending else keys, kind="stable")
+        return positions[order]
+
+    def product(self, product_id):
+        """CatalogProduct con el que se armó la fila de ese producto (o None)"""
+        positions = np.flatnonzero(self.ids == product_id)
+        return self.products[positions[0]] if len(positions) else None
+
+    def take(self, positions):
+        """Filas de la tabla para esas posiciones"""
+        rows = self.rows
+        return [rows[i] for i in positions]
@@ -0,0 +1,118 @@
+# models/lookups.py
+import threading
+
+from database import get_connection
+
+# Tablas maestras pequeñas que alimentan los combobox de productos
+LOOKUP_TABLES = {
+    'marcas': 'id_marca',
+    'categorias': 'id_categoria',
+    'ubicaciones': 'id_ubicacion'
+}
+
+
+class LookupRegistry:
+    """Marcas, categorías y ubicaciones en memoria.
+
+    Guarda para cada tabla la lista (id, nombre, activo) ordenada por nombre
+    y los mapas nombre→id e id→nombre, así los formularios de productos no
+    consultan la base al abrirse ni al guardar. Se carga en el primer uso y
+    se recarga cuando alguien llama a invalidate() tras modificar una tabla
+    (Ajustes o el botón "+" del formulario de productos). Los cambios de
+    otras terminales los detecta ProductCatalog, que escucha los avisos de
+    esas mismas tablas y llama a invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+
+    def invalidate(self, table=None):
+        """Descarta una tabla (o todas) para recargarla en el próximo acceso"""
+        with self._lock:
+            if table is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(table, None)
+
+    def refresh(self, table=None):
+        """Recarga ya una tabla (o todas)"""
+        self.invalidate(table)
+        for name in ([table] if table else LOOKUP_TABLES):
+            self._get(name)
+
+    # ===== CONSULTAS =====
+
+    def options(self, table, include_ids=()):
+        """Pares (id, nombre) activos ordenados por nombre.
+
+        include_ids agrega esos ids aunque estén inactivos (la relación
+        actual de un producto que se está editando).
+        """
+        data = self._get(table)
+        return [(row_id, nombre) for row_id, nombre, activo in data['rows']
+                if activo or row_id in include_ids]
+
+    def id_by_name(self, table, name, active_only=True):
+        """Id por nombre exacto; None si no existe (o está inactivo)"""
+        data = self._get(table)
+        row_id = data['by_name'].get(name)
+        if row_id is None or (active_only and not data['active'][row_id]):
+            return None
+        return row_id
+
+    def name_by_id(self, table, row_id):
+        """Nombre por id (o None)"""
+        return self._get(table)['by_id'].get(row_id)
+
+    def is_active(self, table, row_id):
+        """Si el id existe y está activo"""
+        return self._get(table)['active'].get(row_id, False)
+
+    def has_active_flag(self, table):
+        """Si la tabla tiene la columna activo"""
+        return self._get(table)['has_activo']
+
+    # ===== CARGA =====
+
+    def _get(self, table):
+        # Fuera del bloqueo: el catálogo llama a invalidate() si hubo avisos.
+        # El import es perezoso porque catalog importa este módulo.
+        from models.catalog import product_catalog
+        product_catalog.check()
+        data = self._tables.get(table)
+        if data is None:
+            with self._lock:
+                data = self._tables.get(table)
+                if data is None:
+                    data = self._load(table)
+                    self._tables[table] = data
+        return data
+
+    @staticmethod
+    def _load(table):
+        id_column = LOOKUP_TABLES[table]
+        with get_connection() as conn, conn.cursor() as cursor:
+            # La columna activo se verifica una vez por carga, no en cada formulario
+            cursor.execute("""
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = %s AND column_name = 'activo'
+            """, (table,))
+            activo = "activo" if cursor.fetchone() else "TRUE"
+            cursor.execute(
+                f"SELECT {id_column}, nombre, {activo} FROM {table} ORDER BY nombre")
+            rows = cursor.fetchall()
+
+        by_name, by_id, active = {}, {}, {}
+        for row_id, nombre, is_active in rows:
+            by_id[row_id] = nombre
+            active[row_id] = is_active
+            # Con nombres repetidos gana el activo
+            if nombre not in by_name or is_active:
+                by_name[nombre] = row_id
+
+        return {'rows': rows, 'by_name': by_name, 'by_id': by_id, 'active': active,
+                'has_activo': activo == "activo"}
+
+
+lookups = LookupRegistry()
@@ -1,14 +1,62 @@
-from datetime import datetime
-from database import create_connection
+import sys
+from datetime import date, datetime
+from database import stream_query, bulk_insert
+from models.base_model import BaseModel
+from config import PAGINATION, MOVEMENT_PARTITIONS
 
 
-class MovementModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
+class MovementModel(BaseModel):
+    def get_movements_page(self, after=None, limit=None, movement_type="Todos",
+                           date_from=None, date_to=None):
+        """Obtener una página de movimientos, del más reciente al más antiguo.
 
-    def get_all_movements(self, movement_type="Todos", date_from=None, date_to=None):
-        """Obtiene todos los movimientos con filtros opcionales"""
+        Args:
+            after: cursor (fecha, id_movimiento) del último movimiento de la
+                página anterior, o None para la primera página
+            limit: tamaño de la página
+            movement_type, date_from, date_to: filtros como en stream_movements
+
+        Returns:
+            list: filas (id_movimiento, fecha, tipo, producto, cantidad,
+            ubicacion, responsable, referencia); la fecha es un datetime y el
+            formato lo pone la vista
+
+        Usa los índices (fecha, id_movimiento), así que cada página cuesta lo
+        mismo sin importar cuántas hubo antes.
+        """
+        limit = limit or PAGINATION['movements_page_size']
+        where, params = self._movements_filter(movement_type, date_from, date_to)
+        if after is not None:
+            where += " AND (m.fecha, m.id_movimiento) < (%s, %s)"
+            params += list(after)
+
+        self.cursor.execute(f"""
+            SELECT
+                m.id_movimiento,
+                m.fecha,
+                m.tipo,
+                p.nombre,
+                m.cantidad,
+                COALESCE(u.nombre, 'N/A'),
+                COALESCE(usr.nombre_completo, 'N/A'),
+                COALESCE(m.referencia, 'N/A')
+            FROM movimientos m
+            JOIN productos p ON m.id_producto = p.id_producto
+            LEFT JOIN ubicaciones u ON m.id_ubicacion = u.id_ubicacion
+            LEFT JOIN usuarios usr ON m.id_responsable = usr.id
+            WHERE 1=1{where}
+            ORDER BY m.fecha DESC, m.id_movimiento DESC
+            LIMIT %s
+        """, params + [limit])
+        return self.cursor.fetchall()
+
+    def stream_movements(self, movement_type="Todos", date_from=None, date_to=None, itersize=None):
+        """Genera los movimientos filtrados en bloques (cursor de servidor)"""
+        query, params = self._movements_query(movement_type, date_from, date_to)
+        return stream_query(query, params, itersize)
+
+    def _movements_query(self, movement_type="Todos", date_from=None, date_to=None):
+        """Arma la consulta de movimientos y sus parámetros"""
         query = """
             SELECT 
                 ROW_NUMBER() OVER (ORDER BY m.fecha DESC) as nro,
@@ -26,65 +74,360 @@ class MovementModel:
             WHERE 1=1
         """
 
+        where, params = self._movements_filter(movement_type, date_from, date_to)
+        query += where + " ORDER BY m.fecha DESC"
+        return query, params
+
+    def _movements_filter(self, movement_type="Todos", date_from=None, date_to=None):
+        """Condiciones (AND ...) y parámetros de los filtros de movimientos.
+
+        Las fechas se toman como días completos, igual que en el resumen
+        diario (_daily_filter), y se comparan contra m.fecha sin funciones
+        sobre la columna: así PostgreSQL descarta los meses (particiones) que
+        el filtro no toca.
+        """
+        where = ""
         params = []
 
         # Aplicar filtro de tipo
         if movement_type != "Todos":
-            query += " AND m.tipo = %s"
+            where += " AND m.tipo = %s"
             params.append(movement_type)
 
         # Aplicar filtros de fecha
         if date_from:
-            query += " AND m.fecha >= %s"
+            where += " AND m.fecha >= %s::DATE"
             params.append(date_from)
         if date_to:
-            query += " AND m.fecha <= %s"
+            where += " AND m.fecha < %s::DATE + 1"
             params.append(date_to)
 
-        query += " ORDER BY m.fecha DESC"
-
-        self.cursor.execute(query, params)
-        return self.cursor.fetchall()
+        return where, params
 
     def register_movement(self, id_producto, tipo, cantidad, id_ubicacion=None, id_responsable=None, referencia=None):
         """Registra un movimiento en la base de datos"""
         try:
-            # Obtener el nombre del producto para la referencia
+            self.register_movements(
+                [(id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia)])
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def register_movements(self, movements):
+        """Registra varios movimientos con un solo INSERT, sin hacer commit.
+
+        El commit (o rollback) queda a cargo del llamador, así los movimientos
+        entran en la misma transacción que la entrega o ingreso que los
+        origina (ver BaseModel(conn)).
+
+        Args:
+            movements: lista de tuplas (id_producto, tipo, cantidad,
+                id_ubicacion, id_responsable, referencia); con referencia
+                None se arma una automática con el nombre del producto
+
+        Returns:
+            int: movimientos registrados
+        """
+        movements = list(movements)
+        if not movements:
+            return 0
+
+        # Nombres de producto para las referencias automáticas, en una consulta
+        sin_referencia = {m[0] for m in movements if m[5] is None}
+        nombres = {}
+        if sin_referencia:
+            self.cursor.execute(
+                "SELECT id_producto, nombre FROM productos WHERE id_producto = ANY(%s)",
+                (list(sin_referencia),))
+            nombres = dict(self.cursor.fetchall())
+
+        # Responsables que existen, en una consulta; los demás quedan en NULL
+        responsables = {m[4] for m in movements if m[4] is not None}
+        validos = set()
+        if responsables:
             self.cursor.execute(
-                "SELECT nombre FROM productos WHERE id_producto = %s", (id_producto,))
-            producto_nombre = self.cursor.fetchone()[0]
+                "SELECT id FROM usuarios WHERE id = ANY(%s)", (list(responsables),))
+            validos = {row[0] for row in self.cursor.fetchall()}
 
-            # Determinar la referencia automática basada en el tipo de movimiento
+        ahora = datetime.now()
+        rows = []
+        for id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia in movements:
             if referencia is None:
+                producto_nombre = nombres.get(id_producto)
+                # Determinar la referencia automática basada en el tipo de movimiento
                 if tipo == "Entrada":
                     referencia = f"Entrada de stock - {producto_nombre}"
                 elif tipo == "Salida":
                     referencia = f"Salida de stock - {producto_nombre}"
                 elif tipo == "Nuevo":
                     referencia = f"Producto nuevo - {producto_nombre}"
-
-            # Validar que el responsable exista si se proporciona
-            if id_responsable is not None:
-                self.cursor.execute(
-                    "SELECT id FROM usuarios WHERE id = %s", (id_responsable,))
-                if not self.cursor.fetchone():
-                    id_responsable = None
-
-            self.cursor.execute("""
-                INSERT INTO movimientos (
-                    id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
+            rows.append((
                 id_producto,
                 tipo,
                 cantidad,
                 id_ubicacion,
-                id_responsable,
+                id_responsable if id_responsable in validos else None,
                 referencia,
-                datetime.now()
+                ahora
             ))
+
+        bulk_insert(self.cursor, "movimientos",
+                    ("id_producto", "tipo", "cantidad", "id_ubicacion",
+                     "id_responsable", "referencia", "fecha"), rows)
+        return len(rows)
+
+    # ===== ESTADÍSTICAS (resumen diario) =====
+
+    def get_movement_statistics(self, movement_type="Todos", date_from=None, date_to=None,
+                                product_id=None):
+        """Totales de movimientos desde el resumen diario (movimientos_diarios).
+
+        Cuesta según los días del rango, no según la cantidad de movimientos.
+        Cuenta lo mismo que muestra el listado: días completos y sin los
+        meses archivados.
+
+        Returns:
+            dict: total_movimientos, total_entradas, total_salidas, balance
+        """
+        where, params = self._daily_filter(movement_type, date_from, date_to, product_id)
+        self.cursor.execute(f"""
+            SELECT
+                COALESCE(SUM(d.movimientos), 0),
+                COALESCE(SUM(d.cantidad) FILTER (WHERE d.tipo = 'Entrada'), 0),
+                COALESCE(SUM(d.cantidad) FILTER (WHERE d.tipo = 'Salida'), 0)
+            FROM movimientos_diarios d
+            WHERE 1=1{where}
+        """, params)
+        total, entradas, salidas = self.cursor.fetchone()
+        return {
+            'total_movimientos': total,
+            'total_entradas': entradas,
+            'total_salidas': salidas,
+            'balance': entradas - salidas
+        }
+
+    def _daily_filter(self, movement_type="Todos", date_from=None, date_to=None, product_id=None):
+        """Condiciones (AND ...) y parámetros sobre movimientos_diarios.
+
+        Los meses archivados siguen en el resumen (ver get_stock_at) pero se
+        excluyen, porque el listado ya no los muestra.
+        """
+        where = """ AND NOT EXISTS (
+            SELECT 1 FROM movimientos_archivados a
+            WHERE a.mes = date_trunc('month', d.dia)::DATE
+        )"""
+        params = []
+        if movement_type != "Todos":
+            where += " AND d.tipo = %s"
+            params.append(movement_type)
+        if date_from:
+            where += " AND d.dia >= %s::DATE"
+            params.append(date_from)
+        if date_to:
+            where += " AND d.dia <= %s::DATE"
+            params.append(date_to)
+        if product_id is not None:
+            where += " AND d.id_producto = %s"
+            params.append(product_id)
+        return where, params
+
+    # ===== STOCK A UNA FECHA =====
+
+    def ensure_stock_snapshots(self):
+        """Crear las fotos de stock de fin de mes que falten (al iniciar)"""
+        try:
+            self.cursor.execute("SELECT crear_instantaneas_stock()")
+            created = self.cursor.fetchone()[0]
+            self.conn.commit()
+            return created
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def get_stock_at(self, timestamp, product_id=None):
+        """Stock según el libro de movimientos en un instante dado.
+
+        Parte de la foto de fin de mes anterior (stock_instantaneas), suma el
+        resumen diario de los días siguientes y los movimientos del día de
+        timestamp hasta esa hora: a lo sumo un mes de días por producto.
+
+        Args:
+            timestamp: datetime (o date: se toma el final de ese día)
+            product_id: un producto, o None para todo el catálogo
+
+        Returns:
+            list: (id_producto, codigo, nombre, stock) ordenados por nombre,
+            solo productos con movimientos o stock hasta esa fecha
+        """
+        if not isinstance(timestamp, datetime):
+            timestamp = datetime.combine(timestamp, datetime.max.time())
+        dia = timestamp.date()
+
+        # El día de timestamp se lee de movimientos: su mes tiene que estar en línea
+        self.cursor.execute(
+            "SELECT 1 FROM movimientos_archivados WHERE mes = %s", (dia.replace(day=1),))
+        if self.cursor.fetchone():
+            raise Exception(f"Los movimientos de {dia:%m/%Y} están archivados: restaure ese mes")
+
+        producto = " AND id_producto = %(producto)s" if product_id is not None else ""
+        self.cursor.execute(f"""
+            WITH base AS (
+                SELECT COALESCE(MAX(dia), '-infinity'::DATE) AS dia
+                FROM stock_instantaneas
+                WHERE dia < %(dia)s
+            ), foto AS (
+                SELECT id_producto, stock
+                FROM stock_instantaneas
+                WHERE dia = (SELECT dia FROM base){producto}
+            ), dias AS (
+                SELECT id_producto,
+                       SUM(CASE tipo WHEN 'Entrada' THEN cantidad
+                                     WHEN 'Salida' THEN -cantidad ELSE 0 END) AS neto
+                FROM movimientos_diarios
+                WHERE dia > (SELECT dia FROM base) AND dia < %(dia)s{producto}
+                GROUP BY id_producto
+            ), ultimo_dia AS (
+                SELECT id_producto,
+                       SUM(CASE tipo WHEN 'Entrada' THEN cantidad
+                                     WHEN 'Salida' THEN -cantidad ELSE 0 END) AS neto
+                FROM movimientos
+                WHERE fecha >= %(dia)s AND fecha <= %(instante)s{producto}
+                GROUP BY id_producto
+            )
+            SELECT p.id_producto, p.codigo, p.nombre,
+                   (COALESCE(f.stock, 0) + COALESCE(d.neto, 0) + COALESCE(u.neto, 0))::INTEGER
+            FROM productos p
+            LEFT JOIN foto f ON f.id_producto = p.id_producto
+            LEFT JOIN dias d ON d.id_producto = p.id_producto
+            LEFT JOIN ultimo_dia u ON u.id_producto = p.id_producto
+            WHERE (f.id_producto IS NOT NULL OR d.id_producto IS NOT NULL
+                   OR u.id_producto IS NOT NULL)
+            ORDER BY p.nombre, p.id_producto
+        """, {'dia': dia, 'instante': timestamp, 'producto': product_id})
+        return self.cursor.fetchall()
+
+    # ===== PARTICIONES Y ARCHIVO =====
+
+    def ensure_partitions(self, months_ahead=None):
+        """Crear las particiones del mes actual y de los próximos (al iniciar)"""
+        months_ahead = MOVEMENT_PARTITIONS['months_ahead'] if months_ahead is None else months_ahead
+        try:
+            self.cursor.execute("SELECT crear_particiones_movimientos(%s)", (months_ahead,))
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def get_partitions(self):
+        """Meses del historial, adjuntos y archivados.
+
+        Returns:
+            list: (mes, archivado, filas) del más reciente al más antiguo; en
+            los meses adjuntos las filas son la estimación de las estadísticas
+        """
+        self.cursor.execute("""
+            SELECT to_date(substring(c.relname FROM 13), 'YYYY_MM') AS mes,
+                   FALSE AS archivado,
+                   GREATEST(c.reltuples, 0)::BIGINT AS filas
+            FROM pg_inherits h
+            JOIN pg_class c ON c.oid = h.inhrelid
+            WHERE h.inhparent = 'movimientos'::regclass
+              AND c.relname ~ '^movimientos_[0-9]{4}_[0-9]{2}$'
+            UNION ALL
+            SELECT mes, TRUE, filas FROM movimientos_archivados
+            ORDER BY mes DESC
+        """)
+        return self.cursor.fetchall()
+
+    # Esquema de los meses archivados (migración 0017)
+    ARCHIVE_SCHEMA = "archivo_movimientos"
+
+    @staticmethod
+    def _partition_name(mes):
+        return f"movimientos_{mes:%Y_%m}"
+
+    def archive_partition(self, mes):
+        """Desprender un mes del historial y moverlo al esquema de archivo.
+
+        La tabla del mes sigue en la base (no se borra ni sale del servidor),
+        pero deja de formar parte de movimientos. Solo se archivan meses con
+        más de MOVEMENT_PARTITIONS['keep_months'] de antigüedad.
+
+        Returns:
+            str: tabla donde quedó el mes
+        """
+        mes = date(mes.year, mes.month, 1)
+        hoy = date.today()
+        meses = (hoy.year - mes.year) * 12 + hoy.month - mes.month
+        if meses <= MOVEMENT_PARTITIONS['keep_months']:
+            raise Exception(
+                f"Solo se archivan meses con más de {MOVEMENT_PARTITIONS['keep_months']} meses de antigüedad")
+
+        nombre = self._partition_name(mes)
+        archivo = f"{self.ARCHIVE_SCHEMA}.{nombre}"
+        try:
+            self.cursor.execute(f"ALTER TABLE movimientos DETACH PARTITION {nombre}")
+            self.cursor.execute(f"SELECT COUNT(*) FROM {nombre}")
+            filas = self.cursor.fetchone()[0]
+            self.cursor.execute(f"ALTER TABLE {nombre} SET SCHEMA {self.ARCHIVE_SCHEMA}")
+            self.cursor.execute("""
+                INSERT INTO movimientos_archivados (mes, archivo, filas) VALUES (%s, %s, %s)
+                ON CONFLICT (mes) DO UPDATE
+                SET archivo = EXCLUDED.archivo, filas = EXCLUDED.filas, archivado_en = NOW()
+            """, (mes, archivo, filas))
+            self.conn.commit()
+            return archivo
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def restore_partition(self, mes):
+        """Volver a adjuntar un mes archivado, sacándolo del esquema de archivo.
+
+        Los movimientos de ese mes que quedaron en movimientos_fuera_de_particion
+        (ver migración 0014) se suman a la partición antes de adjuntarla.
+        """
+        mes = date(mes.year, mes.month, 1)
+        hasta = date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        nombre = self._partition_name(mes)
+        try:
+            self.cursor.execute(
+                "SELECT archivo FROM movimientos_archivados WHERE mes = %s FOR UPDATE", (mes,))
+            row = self.cursor.fetchone()
+            if row is None:
+                raise Exception("Ese mes no está archivado")
+
+            # La partición vuelve al esquema de la tabla movimientos
+            self.cursor.execute("""
+                SELECT relnamespace::regnamespace::TEXT FROM pg_class
+                WHERE oid = 'movimientos'::regclass
+            """)
+            esquema = self.cursor.fetchone()[0]
+            self.cursor.execute(f"ALTER TABLE {row[0]} SET SCHEMA {esquema}")
+
+            self.cursor.execute("SELECT to_regclass('movimientos_fuera_de_particion') IS NOT NULL")
+            if self.cursor.fetchone()[0]:
+                self.cursor.execute(f"""
+                    WITH movidos AS (
+                        DELETE FROM movimientos_fuera_de_particion
+                        WHERE fecha >= %s AND fecha < %s
+                        RETURNING *
+                    )
+                    INSERT INTO {nombre} SELECT * FROM movidos
+                """, (mes, hasta))
+
+            # Con el CHECK del rango, ATTACH no necesita recorrer la tabla para validarla
+            self.cursor.execute(
+                f"ALTER TABLE {nombre} ADD CONSTRAINT {nombre}_rango "
+                f"CHECK (fecha >= %s AND fecha < %s)", (mes, hasta))
+            self.cursor.execute(
+                f"ALTER TABLE movimientos ATTACH PARTITION {nombre} FOR VALUES FROM (%s) TO (%s)",
+                (mes, hasta))
+            self.cursor.execute(f"ALTER TABLE {nombre} DROP CONSTRAINT {nombre}_rango")
+            self.cursor.execute("DELETE FROM movimientos_archivados WHERE mes = %s", (mes,))
             self.conn.commit()
-            return True
         except Exception as e:
             self.conn.rollback()
             raise e
@@ -95,3 +438,40 @@ class MovementModel:
             "SELECT nombre FROM productos WHERE id_producto = %s", (product_id,))
         result = self.cursor.fetchone()
         return result[0] if result else None
+
+
+def parse_timestamp(text):
+    """Fecha u hora escrita por el usuario: datetime, o date si no trae hora"""
+    text = text.strip()
+    for fmt in ("%d/%m/%Y %H:%M", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            pass
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Fecha inválida: {text} (use DD/MM/AAAA o DD/MM/AAAA HH:MM)")
+
+
+if __name__ == "__main__":
+    # Uso: python -m models.movimientos_models "DD/MM/AAAA [HH:MM]" [código]
+    if len(sys.argv) < 2:
+        print('Uso: python -m models.movimientos_models "DD/MM/AAAA [HH:MM]" [código]')
+        sys.exit(1)
+
+    from models.catalog import product_catalog
+
+    instante = parse_timestamp(sys.argv[1])
+    product_id = None
+    if len(sys.argv) > 2:
+        producto = product_catalog.by_code(sys.argv[2])
+        if producto is None:
+            print(f"No existe el producto con código {sys.argv[2]}")
+            sys.exit(1)
+        product_id = producto.id_producto
+
+    for _, codigo, nombre, stock in MovementModel.call(MovementModel.get_stock_at, instante, product_id):
+        print(f"{codigo:<15} {nombre:<40} {stock:>8}")
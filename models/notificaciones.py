@@ -1,13 +1,9 @@
 from tkinter import ttk, messagebox
 import tkinter as tk
-from database import create_connection
+from database import get_connection
 from helpers import clear_frame
 from views.base_view import BaseView
 
-# Conexión a PostgreSQL
-conn = create_connection()
-cursor = conn.cursor()
-
 
 class NotificationManager(BaseView):
     def __init__(self, app):
@@ -20,15 +16,16 @@ class NotificationManager(BaseView):
     def check_low_stock(self):
         """Verifica productos con stock bajo y actualiza las notificaciones"""
         try:
-            cursor.execute("""
-                SELECT p.id_producto, p.nombre, i.stock, c.nombre as categoria
-                FROM productos p
-                JOIN inventario i ON p.id_producto = i.id_producto
-                LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
-                WHERE i.estado_stock = 'stock bajo' AND p.activo = TRUE
-                ORDER BY i.stock ASC
-            """)
-            low_stock_items = cursor.fetchall()
+            with get_connection() as conn, conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT p.id_producto, p.nombre, i.stock, c.nombre as categoria
+                    FROM productos p
+                    JOIN inventario_producto i ON p.id_producto = i.id_producto
+                    LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
+                    WHERE i.estado_stock = 'stock bajo' AND p.activo = TRUE
+                    ORDER BY i.stock ASC
+                """)
+                low_stock_items = cursor.fetchall()
 
             self.notifications = []
             for item in low_stock_items:
@@ -44,7 +41,6 @@ class NotificationManager(BaseView):
 
         except Exception as e:
             print(f"Error al verificar stock bajo: {e}")
-            conn.rollback()
         finally:
             # Programar la próxima verificación en 5 minutos (300000 ms)
             self.app.after(300000, self.check_low_stock)
@@ -1,115 +1,171 @@
-from database import create_connection
-
-
-class ProductModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+from database import stream_query, bulk_insert, copy_rows
+from models.base_model import BaseModel
+from models.catalog import product_catalog
+from models.lookups import lookups, LOOKUP_TABLES
+from config import STOCK_THRESHOLDS, PAGINATION, SEARCH
+
+# Totales de un producto en todas sus ubicaciones, con las mismas columnas
+# que la vista inventario_producto (migración 0007). Como LATERAL se calcula
+# solo para los productos de la consulta usando el índice único
+# (id_producto, ubicación); unir la vista agrupa todo el inventario.
+INVENTARIO_POR_PRODUCTO = """
+    LEFT JOIN LATERAL (
+        SELECT SUM(inv.stock)::INTEGER AS stock,
+               calcular_estado_stock(
+                   SUM(inv.stock)::INTEGER,
+                   MIN(inv.estado_stock) FILTER (
+                       WHERE inv.estado_stock NOT IN ('agotado', 'stock bajo', 'disponible'))
+               ) AS estado_stock,
+               CASE WHEN COUNT(*) = 1 THEN MIN(inv.id_ubicacion) END AS id_ubicacion,
+               CASE WHEN COUNT(*) = 1 THEN MIN(u.nombre)
+                    ELSE 'Varias (' || COUNT(*) || ')' END AS ubicacion,
+               COUNT(*)::INTEGER AS ubicaciones
+        FROM inventario inv
+        LEFT JOIN ubicaciones u ON u.id_ubicacion = inv.id_ubicacion
+        WHERE inv.id_producto = p.id_producto
+        GROUP BY inv.id_producto
+    ) i ON TRUE"""
+
+
+class ProductModel(BaseModel):
     def get_id_by_name(self, table, name):
         """Obtener ID por nombre de una tabla relacionada SOLO SI ESTÁ ACTIVO"""
-        id_column = {
-            'marcas': 'id_marca',
-            'categorias': 'id_categoria',
-            'ubicaciones': 'id_ubicacion'
-        }[table]
-
         try:
-            self.cursor.execute(
-                f"SELECT {id_column} FROM {table} WHERE nombre = %s AND activo = TRUE", (name,))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
+            return lookups.id_by_name(table, name)
         except Exception as e:
             print(f"Error getting ID by name: {e}")
             return None
 
-    def get_products(self, extra_where="", params=()):
-        """Obtener todos los productos con filtros opcionales"""
-        query = """
+    def get_products_page(self, after=None, limit=None, extra_where="", params=()):
+        """Obtener una página de productos ordenada por (nombre, id_producto).
+
+        Args:
+            after: cursor (nombre, id_producto) del último producto de la página
+                anterior, o None para la primera página
+            limit: tamaño de la página
+            extra_where, params: condiciones (AND ...) y parámetros de _products_query
+
+        Usa el índice (nombre, id_producto) de productos activos, así que
+        cada página cuesta lo mismo sin importar cuántas hubo antes.
+        """
+        limit = limit or PAGINATION['products_page_size']
+        params = tuple(params)
+        query = self._products_base_query() + extra_where
+        if after is not None:
+            query += " AND (p.nombre, p.id_producto) > (%s, %s)"
+            params += tuple(after)
+        query += " ORDER BY p.nombre ASC, p.id_producto ASC LIMIT %s"
+        params += (limit,)
+
+        try:
+            self.cursor.execute(query, params)
+            return self.cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting products page: {e}")
+            self.conn.rollback()
+            return []
+
+    def search_products(self, term, extra_where="", params=(), limit=None):
+        """Buscar productos activos por nombre o código, ordenados por relevancia.
+
+        No distingue acentos ni mayúsculas y usa los índices de trigramas.
+        Primero van las coincidencias exactas de código, luego los códigos y
+        nombres que empiezan con el término y al final el resto por similitud.
+        """
+        limit = limit or SEARCH['limit']
+        term = term.lower()
+        contains = self.like_pattern(term)
+        prefix = self.like_pattern(term, contains=False)
+
+        # Los parámetros van directo en cada expresión (no en una CTE) para
+        # que el planificador los vea como constantes y use los índices GIN
+        query = self._products_base_query() + """
+        AND (
+            lower(f_unaccent(p.nombre)) LIKE f_unaccent(%s)
+            OR lower(p.codigo) LIKE %s
+            OR lower(f_unaccent(p.nombre)) %% f_unaccent(%s)
+        )
+        """ + extra_where + """
+        ORDER BY
+            (lower(p.codigo) = %s) DESC,
+            (lower(p.codigo) LIKE %s) DESC,
+            (lower(f_unaccent(p.nombre)) LIKE f_unaccent(%s)) DESC,
+            similarity(lower(f_unaccent(p.nombre)), f_unaccent(%s)) DESC,
+            p.nombre ASC
+        LIMIT %s
+        """
+        params = ((contains, contains, term) + tuple(params)
+                  + (term, prefix, prefix, term, limit))
+
+        try:
+            self.cursor.execute(query, params)
+            return self.cursor.fetchall()
+        except Exception as e:
+            print(f"Error searching products: {e}")
+            self.conn.rollback()
+            return []
+
+    @staticmethod
+    def like_pattern(term, contains=True):
+        """Patrón LIKE que toma el término como texto literal (comodines escapados)"""
+        literal = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"%{literal}%" if contains else f"{literal}%"
+
+    def stream_products(self, extra_where="", params=(), itersize=None):
+        """Generar los productos en bloques (cursor de servidor)"""
+        return stream_query(self._products_query(extra_where), params, itersize)
+
+    def _products_query(self, extra_where=""):
+        """Consulta del listado de productos con filtros y orden"""
+        return (self._products_base_query() + extra_where
+                + " ORDER BY p.nombre ASC, p.id_producto ASC")
+
+    def _products_base_query(self):
+        """Consulta base del listado de productos (sin orden).
+
+        Stock, estado y ubicación son los totales de todas las ubicaciones
+        del producto (INVENTARIO_POR_PRODUCTO).
+        """
+        return """
         SELECT 
             p.id_producto, p.codigo, p.nombre, 
             m.nombre as marca, 
             c.nombre as categoria, 
             i.stock, 
-            u.nombre as ubicacion, 
+            i.ubicacion, 
             i.estado_stock
         FROM productos p
         LEFT JOIN marcas m ON p.id_marca = m.id_marca
-        LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
-        LEFT JOIN inventario i ON p.id_producto = i.id_producto
-        LEFT JOIN ubicaciones u ON i.id_ubicacion = u.id_ubicacion
+        LEFT JOIN categorias c ON p.id_categoria = c.id_categoria""" + INVENTARIO_POR_PRODUCTO + """
         WHERE p.activo = TRUE
-        """ + extra_where + " ORDER BY p.nombre ASC"
+        """
 
+    def get_combobox_data(self, table, include_ids=()):
+        """Obtener datos para comboboxes - SOLO ACTIVOS (más los ids de include_ids)"""
         try:
-            self.cursor.execute(query, params)
-            return self.cursor.fetchall()
+            return lookups.options(table, include_ids)
         except Exception as e:
-            print(f"Error getting products: {e}")
+            print(f"Error al cargar datos: {e}")
             return []
 
-    def get_combobox_data(self, table):
-        """Obtener datos para comboboxes - SOLO ACTIVOS"""
-        try:
-            id_column = {
-                'ubicaciones': 'id_ubicacion',
-                'categorias': 'id_categoria',
-                'marcas': 'id_marca'
-            }[table]
-
-            # Verificar si la tabla tiene columna 'activo'
-            self.cursor.execute(f"""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = %s AND column_name = 'activo'
-            """, (table,))
-            has_activo_column = self.cursor.fetchone()
-
-            if has_activo_column:
-                query = f"SELECT {id_column}, nombre FROM {table} WHERE activo = TRUE ORDER BY nombre"
-            else:
-                query = f"SELECT {id_column}, nombre FROM {table} ORDER BY nombre"
+    def sync_stock_threshold(self, umbral=None):
+        """Publicar en la base de datos el umbral de stock bajo de config.py.
 
-            self.cursor.execute(query)
-            return self.cursor.fetchall()
+        Solo escribe si el valor cambió; en ese caso el trigger de
+        parametros_inventario recalcula los estados afectados.
+        """
+        umbral = STOCK_THRESHOLDS['stock_bajo'] if umbral is None else umbral
+        try:
+            self.cursor.execute("""
+                INSERT INTO parametros_inventario (clave, valor)
+                VALUES ('umbral_stock_bajo', %s)
+                ON CONFLICT (clave) DO UPDATE SET valor = EXCLUDED.valor
+                WHERE parametros_inventario.valor <> EXCLUDED.valor
+            """, (umbral,))
+            self.conn.commit()
         except Exception as e:
-            print(f"Error al cargar datos: {e}")
+            print(f"Error syncing stock threshold: {e}")
             self.conn.rollback()
-            return []
-
-    def update_product_stock_status(self):
-        """Actualizar estado de stock de productos"""
-        stock_updates = []
-        inventario_data = self.get_products()
-
-        for item in inventario_data:
-            stock = item[5] if item[5] else 0
-            estado = item[7] if item[7] else "disponible"
-
-            if stock == 0 and estado != "agotado":
-                estado = "agotado"
-                stock_updates.append((estado, item[0]))
-            elif stock <= 10 and estado != "stock bajo":
-                estado = "stock bajo"
-                stock_updates.append((estado, item[0]))
-
-        if stock_updates:
-            for estado, id_producto in stock_updates:
-                try:
-                    self.cursor.execute(
-                        "UPDATE inventario SET estado_stock = %s WHERE id_producto = %s",
-                        (estado, id_producto))
-                except Exception as e:
-                    print(f"Error updating stock status: {e}")
-                    continue
-
-            try:
-                self.conn.commit()
-            except Exception as e:
-                print(f"Error committing stock updates: {e}")
-                self.conn.rollback()
-
-        return inventario_data
 
     def get_product_data(self, product_id):
         """Obtener datos de un producto específico"""
@@ -118,7 +174,14 @@ class ProductModel:
                 SELECT p.id_producto, p.codigo, p.nombre, p.id_marca, p.id_categoria,
                        i.stock, i.id_ubicacion, i.estado_stock
                 FROM productos p
-                LEFT JOIN inventario i ON p.id_producto = i.id_producto
+                LEFT JOIN LATERAL (
+                    -- Ubicación principal: la de más stock
+                    SELECT stock, id_ubicacion, estado_stock
+                    FROM inventario
+                    WHERE id_producto = p.id_producto
+                    ORDER BY stock DESC, id_inventario
+                    LIMIT 1
+                ) i ON TRUE
                 WHERE p.id_producto = %s
             """, (product_id,))
             return self.cursor.fetchone()
@@ -126,109 +189,128 @@ class ProductModel:
             print(f"Error getting product data: {e}")
             return None
 
-    def get_ubicacion_id(self, product_id):
-        """Obtener ID de ubicación de un producto"""
-        try:
-            self.cursor.execute(
-                "SELECT id_ubicacion FROM inventario WHERE id_producto = %s", (product_id,))
-            result = self.cursor.fetchone()
-            return result[0] if result else None
-        except Exception as e:
-            print(f"Error getting ubicacion ID: {e}")
-            return None
+    def get_product_form_data(self, product_id):
+        """Datos de un producto para el formulario, desde el catálogo en memoria.
 
-    def get_old_stock(self, product_id):
-        """Obtener stock anterior de un producto"""
+        Misma forma que get_product_data; si el producto aún no está en el
+        catálogo se consulta la base.
+        """
         try:
-            self.cursor.execute(
-                "SELECT stock FROM inventario WHERE id_producto = %s", (product_id,))
-            result = self.cursor.fetchone()
-            return result[0] if result else 0
+            product = product_catalog.get(int(product_id))
         except Exception as e:
-            print(f"Error getting old stock: {e}")
-            return 0
-
-    def save_product(self, product_data, product_id=None):
-        """Guardar o actualizar un producto"""
+            print(f"Error reading product catalog: {e}")
+            product = None
+        # Con varias ubicaciones el formulario edita la principal: leerla de la base
+        if product is None or product.ubicaciones > 1:
+            return self.get_product_data(product_id)
+        return (product.id_producto, product.codigo, product.nombre, product.id_marca,
+                product.id_categoria, product.stock, product.id_ubicacion,
+                product.estado_stock)
+
+    def save_product(self, product_data, product_id=None, id_responsable=None):
+        """Guardar o actualizar un producto junto con su movimiento de stock.
+
+        Una sola sentencia escribe producto, inventario y movimiento, y
+        devuelve el stock anterior leído en la misma instantánea, así la
+        diferencia registrada es siempre la correcta. Al editar, stock y
+        ubicación son los de la ubicación principal del producto (la de más
+        stock); el resto se mueve con transfer_stock. Si se elige una
+        ubicación donde el producto ya tiene stock, la fila principal se suma
+        a esa.
+
+        Returns:
+            tuple: (id_producto, stock_anterior, stock_nuevo)
+        """
         try:
             if product_id:
-                # Actualizar producto existente
-                query = """
-                UPDATE productos 
-                SET codigo = %s, nombre = %s, id_marca = %s, id_categoria = %s
-                WHERE id_producto = %s
-                """
-                self.cursor.execute(query, (
-                    product_data['codigo'],
-                    product_data['nombre'],
-                    product_data['marca_id'],
-                    product_data['categoria_id'],
-                    product_id
-                ))
-
-                # Verificar si existe en inventario
-                self.cursor.execute(
-                    "SELECT id_inventario FROM inventario WHERE id_producto = %s", (product_id,))
-                inventario_existe = self.cursor.fetchone()
-
-                if inventario_existe:
-                    # Actualizar inventario
-                    self.cursor.execute("""
-                        UPDATE inventario 
-                        SET stock = %s, id_ubicacion = %s, estado_stock = %s
-                        WHERE id_producto = %s
-                    """, (
-                        product_data['stock'],
-                        product_data['ubicacion_id'],
-                        product_data['estado'],
-                        product_id
-                    ))
-                else:
-                    # Insertar en inventario
-                    self.cursor.execute("""
-                        INSERT INTO inventario 
-                        (id_producto, id_ubicacion, stock, estado_stock)
-                        VALUES (%s, %s, %s, %s)
-                    """, (
-                        product_id,
-                        product_data['ubicacion_id'],
-                        product_data['stock'],
-                        product_data['estado']
-                    ))
-
-                self.conn.commit()
-                return product_id
-
+                # Actualizar producto existente; el inventario se crea si falta.
+                # Se escribe con ON CONFLICT sobre (producto, ubicación): la
+                # ubicación elegida puede tener ya otra fila del producto.
+                self.cursor.execute("""
+                    WITH prod AS (
+                        UPDATE productos
+                        SET codigo = %(codigo)s, nombre = %(nombre)s,
+                            id_marca = %(marca_id)s, id_categoria = %(categoria_id)s
+                        WHERE id_producto = %(id)s
+                        RETURNING id_producto
+                    ), anterior AS (
+                        -- Fila principal (la de más stock, la que muestra el formulario)
+                        SELECT id_inventario, stock FROM inventario
+                        WHERE id_producto = %(id)s
+                        ORDER BY stock DESC, id_inventario
+                        LIMIT 1
+                        FOR UPDATE
+                    ), movida AS (
+                        -- Si cambia la ubicación, la fila principal se funde en la
+                        -- de la ubicación elegida (se crea si no existe)
+                        DELETE FROM inventario i
+                        USING anterior a
+                        WHERE i.id_inventario = a.id_inventario
+                          AND COALESCE(i.id_ubicacion, 0) <> COALESCE(%(ubicacion_id)s, 0)
+                        RETURNING i.id_inventario
+                    ), destino AS (
+                        SELECT stock FROM inventario
+                        WHERE id_producto = %(id)s
+                          AND COALESCE(id_ubicacion, 0) = COALESCE(%(ubicacion_id)s, 0)
+                        FOR UPDATE
+                    ), inv AS (
+                        INSERT INTO inventario (id_producto, id_ubicacion, stock, estado_stock)
+                        SELECT id_producto, %(ubicacion_id)s,
+                               %(stock)s + CASE WHEN EXISTS (SELECT 1 FROM movida)
+                                                THEN COALESCE((SELECT stock FROM destino), 0)
+                                                ELSE 0 END,
+                               %(estado)s
+                        FROM prod
+                        ON CONFLICT (id_producto, COALESCE(id_ubicacion, 0)) DO UPDATE
+                        SET stock = EXCLUDED.stock,
+                            estado_stock = EXCLUDED.estado_stock
+                        RETURNING id_producto, id_ubicacion
+                    ), mov AS (
+                        INSERT INTO movimientos (
+                            id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
+                        )
+                        SELECT inv.id_producto,
+                               CASE WHEN %(stock)s > COALESCE(a.stock, 0) THEN 'Entrada' ELSE 'Salida' END,
+                               ABS(%(stock)s - COALESCE(a.stock, 0)), inv.id_ubicacion,
+                               (SELECT id FROM usuarios WHERE id = %(responsable)s),
+                               'Edición de stock inicial', NOW()
+                        FROM inv
+                        LEFT JOIN anterior a ON TRUE
+                        WHERE %(stock)s <> COALESCE(a.stock, 0)
+                    )
+                    SELECT inv.id_producto, COALESCE((SELECT stock FROM anterior), 0), %(stock)s
+                    FROM inv
+                """, dict(product_data, id=product_id, responsable=id_responsable))
             else:
-                # Insertar nuevo producto
-                query = """
-                INSERT INTO productos 
-                (codigo, nombre, id_marca, id_categoria)
-                VALUES (%s, %s, %s, %s) RETURNING id_producto
-                """
-                self.cursor.execute(query, (
-                    product_data['codigo'],
-                    product_data['nombre'],
-                    product_data['marca_id'],
-                    product_data['categoria_id']
-                ))
-
-                new_product_id = self.cursor.fetchone()[0]
-
-                # Insertar en inventario
+                # Insertar nuevo producto con su inventario y movimiento de alta
                 self.cursor.execute("""
-                    INSERT INTO inventario 
-                    (id_producto, id_ubicacion, stock, estado_stock)
-                    VALUES (%s, %s, %s, %s)
-                """, (
-                    new_product_id,
-                    product_data['ubicacion_id'],
-                    product_data['stock'],
-                    product_data['estado']
-                ))
-
-                self.conn.commit()
-                return new_product_id
+                    WITH prod AS (
+                        INSERT INTO productos (codigo, nombre, id_marca, id_categoria)
+                        VALUES (%(codigo)s, %(nombre)s, %(marca_id)s, %(categoria_id)s)
+                        RETURNING id_producto
+                    ), inv AS (
+                        INSERT INTO inventario (id_producto, id_ubicacion, stock, estado_stock)
+                        SELECT id_producto, %(ubicacion_id)s, %(stock)s, %(estado)s FROM prod
+                        RETURNING id_producto, id_ubicacion, stock
+                    ), mov AS (
+                        INSERT INTO movimientos (
+                            id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
+                        )
+                        SELECT id_producto, 'Entrada', stock, id_ubicacion,
+                               (SELECT id FROM usuarios WHERE id = %(responsable)s),
+                               'Producto nuevo', NOW()
+                        FROM inv
+                    )
+                    SELECT id_producto, 0, stock FROM inv
+                """, dict(product_data, responsable=id_responsable))
+
+            result = self.cursor.fetchone()
+            if result is None:
+                raise Exception("Producto no encontrado")
+
+            self.conn.commit()
+            product_catalog.invalidate()
+            return result
 
         except Exception as e:
             self.conn.rollback()
@@ -241,23 +323,434 @@ class ProductModel:
                 "UPDATE productos SET activo = FALSE WHERE id_producto = %s",
                 (product_id,))
             self.conn.commit()
+            product_catalog.invalidate()
             return True
         except Exception as e:
             self.conn.rollback()
             raise e
 
-    def add_stock(self, product_id, quantity):
-        """Agregar stock a un producto"""
+    def add_stock_batch(self, items, id_responsable=None, referencia="Entrada de stock"):
+        """Agregar stock a varios productos en una sola transacción.
+
+        Args:
+            items: lista de (id_producto, cantidad); los productos repetidos se suman
+            id_responsable: usuario que queda en los movimientos
+            referencia: referencia de los movimientos de entrada
+
+        Una sentencia suma el stock de todos los productos en su ubicación
+        principal (la de más stock) y registra sus movimientos con esa ubicación.
+
+        Returns:
+            list: ids de los productos actualizados (los que no tienen fila de
+            inventario no se actualizan)
+        """
+        totales = {}
+        for product_id, quantity in items:
+            totales[int(product_id)] = totales.get(int(product_id), 0) + int(quantity)
+        if not totales:
+            return []
+
+        try:
+            self.cursor.execute("""
+                WITH v AS (
+                    SELECT * FROM unnest(%s::int[], %s::int[]) AS v(id_producto, cantidad)
+                ), destino AS (
+                    SELECT DISTINCT ON (i.id_producto) i.id_inventario, v.cantidad
+                    FROM v
+                    JOIN inventario i ON i.id_producto = v.id_producto
+                    ORDER BY i.id_producto, i.stock DESC, i.id_inventario
+                ), upd AS (
+                    UPDATE inventario i
+                    SET stock = i.stock + d.cantidad
+                    FROM destino d
+                    WHERE i.id_inventario = d.id_inventario
+                    RETURNING i.id_producto, i.id_ubicacion, d.cantidad
+                )
+                INSERT INTO movimientos (
+                    id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
+                )
+                SELECT id_producto, 'Entrada', cantidad, id_ubicacion,
+                       (SELECT id FROM usuarios WHERE id = %s), %s, NOW()
+                FROM upd
+                RETURNING id_producto
+            """, (list(totales), list(totales.values()), id_responsable, referencia))
+            updated = [row[0] for row in self.cursor.fetchall()]
+            self.conn.commit()
+            product_catalog.invalidate()
+            return updated
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def update_products_batch(self, changes):
+        """Guardar en una transacción las ediciones de la tabla de inventario.
+
+        Cada fila solo se actualiza si las columnas que se editaron siguen
+        teniendo el valor que se leyó (nadie las cambió desde otra terminal);
+        las demás quedan como conflicto y no se tocan. Las filas con una
+        marca o categoría inexistente o inactiva (id None) se rechazan, como
+        en la importación, y también las que toman un código que ya usa otro
+        producto (o que se repite en el lote): así un código duplicado no
+        hace fallar todo el lote.
+
+        Args:
+            changes: lista de (id_producto, antes, despues); antes y despues
+                son dicts con las columnas editadas (codigo, nombre,
+                id_marca, id_categoria)
+
+        Returns:
+            tuple: (ids actualizados, ids en conflicto,
+            [(id_producto, motivo), ...] rechazados)
+        """
+        rejected = []
+        try:
+            # La marca y la categoría se validan en la misma transacción (el
+            # registro en memoria puede estar atrasado) y quedan bloqueadas
+            # para que nadie las desactive antes del commit
+            activos = {
+                column: self._lock_active_ids(
+                    table, {despues[column] for _, _, despues in changes
+                            if despues.get(column) is not None})
+                for column, table in (("id_marca", "marcas"), ("id_categoria", "categorias"))
+            }
+            codigos = [despues["codigo"] for _, _, despues in changes if despues.get("codigo")]
+            repetidos = {codigo for codigo in codigos if codigos.count(codigo) > 1}
+            codigo_usado = self._taken_code_ids(
+                [(product_id, despues["codigo"]) for product_id, _, despues in changes
+                 if despues.get("codigo")])
+            valid = []
+            for change in changes:
+                despues = change[2]
+                errores = []
+                if "id_marca" in despues and despues["id_marca"] not in activos["id_marca"]:
+                    errores.append("Marca")
+                if "id_categoria" in despues and despues["id_categoria"] not in activos["id_categoria"]:
+                    errores.append("Categoría")
+                if errores:
+                    rejected.append((change[0], f"{', '.join(errores)} inexistente o inactiva"))
+                elif change[0] in codigo_usado or despues.get("codigo") in repetidos:
+                    rejected.append((change[0], f"El código {despues['codigo']} ya está en uso"))
+                else:
+                    valid.append(change)
+            changes = valid
+            if not changes:
+                self.conn.rollback()
+                return [], [], rejected
+
+            columns = ("codigo", "nombre", "id_marca", "id_categoria")
+            ids = [product_id for product_id, _, _ in changes]
+            nuevos = [[despues.get(col) for _, _, despues in changes] for col in columns]
+            # El valor leído solo cuenta en las columnas editadas
+            leidos = [[antes.get(col) if col in despues else None for _, antes, despues in changes]
+                      for col in columns]
+
+            self.cursor.execute("""
+                WITH v AS (
+                    SELECT * FROM unnest(
+                        %s::int[], %s::text[], %s::text[], %s::int[], %s::int[],
+                        %s::text[], %s::text[], %s::int[], %s::int[]
+                    ) AS v(id_producto, codigo, nombre, id_marca, id_categoria,
+                           codigo_antes, nombre_antes, id_marca_antes, id_categoria_antes)
+                )
+                UPDATE productos p
+                SET codigo = COALESCE(v.codigo, p.codigo),
+                    nombre = COALESCE(v.nombre, p.nombre),
+                    id_marca = COALESCE(v.id_marca, p.id_marca),
+                    id_categoria = COALESCE(v.id_categoria, p.id_categoria)
+                FROM v
+                WHERE p.id_producto = v.id_producto
+                  AND (v.codigo IS NULL OR p.codigo IS NOT DISTINCT FROM v.codigo_antes)
+                  AND (v.nombre IS NULL OR p.nombre IS NOT DISTINCT FROM v.nombre_antes)
+                  AND (v.id_marca IS NULL OR p.id_marca IS NOT DISTINCT FROM v.id_marca_antes)
+                  AND (v.id_categoria IS NULL
+                       OR p.id_categoria IS NOT DISTINCT FROM v.id_categoria_antes)
+                RETURNING p.id_producto
+            """, [ids] + nuevos + leidos)
+            updated = [row[0] for row in self.cursor.fetchall()]
+            self.conn.commit()
+            product_catalog.invalidate()
+
+            updated_set = set(updated)
+            conflicts = [product_id for product_id in ids if product_id not in updated_set]
+            return updated, conflicts, rejected
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def _taken_code_ids(self, pairs):
+        """Ids de los pares (id_producto, codigo) cuyo código ya usa otro producto"""
+        if not pairs:
+            return set()
+        self.cursor.execute("""
+            SELECT v.id_producto
+            FROM unnest(%s::int[], %s::text[]) AS v(id_producto, codigo)
+            WHERE EXISTS (
+                SELECT 1 FROM productos p
+                WHERE p.codigo = v.codigo AND p.id_producto <> v.id_producto
+            )
+        """, ([product_id for product_id, _ in pairs], [codigo for _, codigo in pairs]))
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def _lock_active_ids(self, table, ids):
+        """Ids de la tabla maestra que existen y están activos, bloqueados (FOR SHARE)"""
+        if not ids:
+            return set()
+        id_column = LOOKUP_TABLES[table]
+        activo = " AND activo" if lookups.has_active_flag(table) else ""
+        self.cursor.execute(
+            f"SELECT {id_column} FROM {table} WHERE {id_column} = ANY(%s){activo} FOR SHARE",
+            (list(ids),))
+        return {row[0] for row in self.cursor.fetchall()}
+
+    def set_product_image(self, product_id, data, image_hash):
+        """Asignar una imagen a un producto.
+
+        La imagen se guarda una sola vez por contenido (image_hash); la
+        anterior del producto se borra si ningún otro producto la usa.
+        """
         try:
             self.cursor.execute(
-                "UPDATE inventario SET stock = stock + %s WHERE id_producto = %s",
-                (int(quantity), product_id))
+                "SELECT hash FROM imagenes_producto WHERE id_producto = %s FOR UPDATE",
+                (product_id,))
+            row = self.cursor.fetchone()
+            anterior = row[0] if row else None
+
+            self.cursor.execute("""
+                INSERT INTO imagenes (hash, datos) VALUES (%s, %s)
+                ON CONFLICT (hash) DO NOTHING
+            """, (image_hash, data))
+            self.cursor.execute("""
+                INSERT INTO imagenes_producto (id_producto, hash) VALUES (%s, %s)
+                ON CONFLICT (id_producto) DO UPDATE SET hash = EXCLUDED.hash
+            """, (product_id, image_hash))
+
+            if anterior and anterior != image_hash:
+                self.cursor.execute("""
+                    DELETE FROM imagenes
+                    WHERE hash = %s
+                      AND NOT EXISTS (SELECT 1 FROM imagenes_producto WHERE hash = %s)
+                """, (anterior, anterior))
+
+            self.conn.commit()
+            product_catalog.invalidate()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def get_product_locations(self, product_id):
+        """Ubicaciones con inventario de un producto: (id_ubicacion, nombre, stock)"""
+        try:
+            self.cursor.execute("""
+                SELECT i.id_ubicacion, COALESCE(u.nombre, 'Sin ubicación'), i.stock
+                FROM inventario i
+                LEFT JOIN ubicaciones u ON i.id_ubicacion = u.id_ubicacion
+                WHERE i.id_producto = %s
+                ORDER BY i.stock DESC, u.nombre
+            """, (product_id,))
+            return self.cursor.fetchall()
+        except Exception as e:
+            print(f"Error getting product locations: {e}")
+            self.conn.rollback()
+            return []
+
+    def transfer_stock(self, product_id, from_location, to_location, quantity,
+                       id_responsable=None):
+        """Mover stock de un producto entre dos ubicaciones.
+
+        Una sola sentencia descuenta del origen (solo si alcanza), suma en el
+        destino (creando su fila si no existe) y registra la salida y la
+        entrada como movimientos pareados.
+        """
+        if from_location == to_location:
+            raise Exception("La ubicación de origen y destino deben ser distintas")
+
+        params = {
+            'id': product_id, 'desde': from_location, 'hacia': to_location,
+            'cantidad': int(quantity), 'responsable': id_responsable
+        }
+        try:
+            self.cursor.execute("""
+                WITH origen AS (
+                    UPDATE inventario
+                    SET stock = stock - %(cantidad)s
+                    WHERE id_producto = %(id)s
+                      AND id_ubicacion IS NOT DISTINCT FROM %(desde)s
+                      AND stock >= %(cantidad)s
+                    RETURNING id_producto
+                ), destino AS (
+                    INSERT INTO inventario (id_producto, id_ubicacion, stock)
+                    SELECT id_producto, %(hacia)s, %(cantidad)s FROM origen
+                    ON CONFLICT (id_producto, COALESCE(id_ubicacion, 0)) DO UPDATE
+                    SET stock = inventario.stock + EXCLUDED.stock
+                    RETURNING id_producto
+                ), nombres AS (
+                    SELECT (SELECT nombre FROM ubicaciones WHERE id_ubicacion = %(desde)s) AS desde,
+                           (SELECT nombre FROM ubicaciones WHERE id_ubicacion = %(hacia)s) AS hacia,
+                           (SELECT id FROM usuarios WHERE id = %(responsable)s) AS responsable
+                )
+                INSERT INTO movimientos (
+                    id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
+                )
+                SELECT d.id_producto, m.tipo, %(cantidad)s, m.id_ubicacion, n.responsable,
+                       m.referencia, NOW()
+                FROM destino d
+                CROSS JOIN nombres n
+                CROSS JOIN LATERAL (VALUES
+                    ('Salida', %(desde)s::INTEGER,
+                     'Transferencia a ' || COALESCE(n.hacia, 'sin ubicación')),
+                    ('Entrada', %(hacia)s::INTEGER,
+                     'Transferencia desde ' || COALESCE(n.desde, 'sin ubicación'))
+                ) AS m(tipo, id_ubicacion, referencia)
+            """, params)
+            if self.cursor.rowcount == 0:
+                raise Exception("No hay stock suficiente en la ubicación de origen")
+
             self.conn.commit()
+            product_catalog.invalidate()
             return True
         except Exception as e:
             self.conn.rollback()
             raise e
 
+    def import_products(self, rows, id_responsable=None):
+        """Importar muchos productos en una sola transacción.
+
+        Args:
+            rows: tuplas (fila, codigo, nombre, marca, categoria, ubicacion, stock)
+                ya validadas; fila es el número de fila del archivo
+            id_responsable: usuario que queda en los movimientos de apertura
+
+        Las marcas, categorías y ubicaciones que no existen se crean; las
+        inactivas y los códigos ya registrados se rechazan. Las filas van por
+        COPY a una tabla temporal y una sola sentencia inserta productos,
+        inventario y movimientos de apertura.
+
+        Returns:
+            tuple: (cantidad_importada, [(fila, motivo), ...] rechazadas)
+        """
+        rows = list(rows)
+        rejected = []
+        if not rows:
+            return 0, rejected
+
+        try:
+            # Códigos que ya existen (activos o no)
+            self.cursor.execute("""
+                SELECT c.codigo
+                FROM unnest(%s::text[]) AS c(codigo)
+                JOIN productos p ON lower(p.codigo) = c.codigo
+            """, ([r[1].lower() for r in rows],))
+            existing = {row[0] for row in self.cursor.fetchall()}
+            if existing:
+                rejected += [(r[0], "El código ya existe") for r in rows
+                             if r[1].lower() in existing]
+                rows = [r for r in rows if r[1].lower() not in existing]
+
+            # Ids de las tablas maestras, creando los que falten
+            ids = {}
+            for table, position in (('marcas', 3), ('categorias', 4), ('ubicaciones', 5)):
+                ids[table] = self._resolve_master_ids(
+                    table, {r[position] for r in rows if r[position]})
+
+            staged = []
+            for r in rows:
+                marca_id = ids['marcas'].get(r[3])
+                categoria_id = ids['categorias'].get(r[4])
+                ubicacion_id = ids['ubicaciones'].get(r[5]) if r[5] else None
+                errores = []
+                if marca_id is None:
+                    errores.append("Marca")
+                if categoria_id is None:
+                    errores.append("Categoría")
+                if ubicacion_id is None and r[5]:
+                    errores.append("Ubicación")
+                if errores:
+                    rejected.append((r[0], f"{', '.join(errores)} inactiva"))
+                    continue
+                staged.append((r[1], r[2], marca_id, categoria_id, ubicacion_id, int(r[6])))
+
+            if not staged:
+                self.conn.rollback()
+                return 0, rejected
+
+            self.cursor.execute("""
+                CREATE TEMP TABLE importacion_productos (
+                    codigo TEXT, nombre TEXT, id_marca INTEGER, id_categoria INTEGER,
+                    id_ubicacion INTEGER, stock INTEGER
+                ) ON COMMIT DROP
+            """)
+            copy_rows(self.cursor, "importacion_productos",
+                      ("codigo", "nombre", "id_marca", "id_categoria", "id_ubicacion", "stock"),
+                      staged)
+
+            if id_responsable is not None:
+                self.cursor.execute("SELECT id FROM usuarios WHERE id = %s", (id_responsable,))
+                if not self.cursor.fetchone():
+                    id_responsable = None
+
+            # El estado de stock lo calcula el trigger de inventario
+            self.cursor.execute("""
+                WITH nuevos AS (
+                    INSERT INTO productos (codigo, nombre, id_marca, id_categoria)
+                    SELECT codigo, nombre, id_marca, id_categoria
+                    FROM importacion_productos
+                    RETURNING id_producto, codigo
+                ), inv AS (
+                    INSERT INTO inventario (id_producto, id_ubicacion, stock)
+                    SELECT n.id_producto, t.id_ubicacion, t.stock
+                    FROM nuevos n
+                    JOIN importacion_productos t ON t.codigo = n.codigo
+                    RETURNING id_producto, id_ubicacion, stock
+                )
+                INSERT INTO movimientos (
+                    id_producto, tipo, cantidad, id_ubicacion, id_responsable, referencia, fecha
+                )
+                SELECT id_producto, 'Entrada', stock, id_ubicacion, %s,
+                       'Importación de productos', NOW()
+                FROM inv
+            """, (id_responsable,))
+            imported = self.cursor.rowcount
+
+            self.conn.commit()
+            product_catalog.invalidate()
+            lookups.invalidate()
+            return imported, rejected
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def _resolve_master_ids(self, table, names):
+        """Mapa nombre -> id de una tabla maestra (None si está inactivo).
+
+        Los nombres que no existen se insertan todos en una sentencia.
+        """
+        if not names:
+            return {}
+        id_column = {
+            'ubicaciones': 'id_ubicacion',
+            'categorias': 'id_categoria',
+            'marcas': 'id_marca'
+        }[table]
+
+        self.cursor.execute(
+            f"SELECT {id_column}, nombre, activo FROM {table} WHERE nombre = ANY(%s)",
+            (list(names),))
+        result = {}
+        for row_id, nombre, activo in self.cursor.fetchall():
+            # Con nombres repetidos gana el activo
+            if activo:
+                result[nombre] = row_id
+            else:
+                result.setdefault(nombre, None)
+
+        missing = sorted(names - set(result))
+        for row_id, nombre in bulk_insert(self.cursor, table, ("nombre",),
+                                          [(name,) for name in missing],
+                                          returning=f"{id_column}, nombre"):
+            result[nombre] = row_id
+        return result
+
     def add_new_value(self, table, value):
         """Agregar nuevo valor a una tabla relacionada"""
         try:
@@ -274,6 +767,7 @@ class ProductModel:
 
             result = self.cursor.fetchone()
             self.conn.commit()
+            lookups.invalidate(table)
             return result
         except Exception as e:
             self.conn.rollback()
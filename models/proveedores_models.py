@@ -1,11 +1,8 @@
-from database import create_connection
+from models.base_model import BaseModel
+from models.catalog import product_catalog
 
 
-class SupplierModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+class SupplierModel(BaseModel):
     def get_all_suppliers(self, category_filter="Todas", rating_filter="Todas", price_filter="Todos"):
         """Obtiene todos los proveedores con filtros opcionales"""
         query = """
@@ -151,18 +148,14 @@ class SupplierModel:
 
     def get_available_products(self, supplier_id):
         """Obtiene productos disponibles para agregar al proveedor"""
-        self.cursor.execute("""
-            SELECT p.id_producto, p.nombre, c.nombre
-            FROM productos p
-            JOIN categorias c ON p.id_categoria = c.id_categoria
-            WHERE p.activo = TRUE
-            AND p.id_producto NOT IN (
-                SELECT id_producto FROM proveedor_producto
-                WHERE id_proveedor = %s
-            )
-            ORDER BY p.nombre
-        """, (supplier_id,))
-        return self.cursor.fetchall()
+        # Solo se consulta la relación con el proveedor; los productos salen del catálogo
+        self.cursor.execute(
+            "SELECT id_producto FROM proveedor_producto WHERE id_proveedor = %s",
+            (supplier_id,))
+        assigned = {row[0] for row in self.cursor.fetchall()}
+        return [(p.id_producto, p.nombre, p.categoria)
+                for p in product_catalog.products()
+                if p.id_categoria is not None and p.id_producto not in assigned]
 
     def add_product_to_supplier(self, supplier_id, product_id):
         """Agrega un producto al proveedor"""
@@ -187,7 +180,4 @@ class SupplierModel:
 
     def get_product_id_by_name(self, product_name):
         """Obtiene el ID de un producto por nombre"""
-        self.cursor.execute(
-            "SELECT id_producto FROM productos WHERE nombre = %s", (product_name,))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        return product_catalog.id_by_name(product_name)
@@ -1,50 +1,60 @@
 # models/settings_models.py
 import psycopg2
-from database import create_connection
+from database import stream_query
+from models.base_model import BaseModel
+from models.catalog import product_catalog
+from models.lookups import lookups
 
 
-class SettingsModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+class SettingsModel(BaseModel):
     def get_all_data(self, table_name):
         """Obtiene todos los datos de una tabla (incluyendo inactivos)"""
         try:
-            if table_name == "solicitantes":
-                query = """
-                SELECT s.id_solicitante, s.cedula, s.nombre, d.nombre as departamento,
-                       CASE WHEN s.activo THEN 'Sí' ELSE 'No' END as activo
-                FROM solicitantes s
-                LEFT JOIN departamentos d ON s.id_departamento = d.id_departamento
-                """
-            elif table_name == "productos":
-                query = """
-                SELECT p.id_producto, p.codigo, p.nombre, m.nombre as marca, c.nombre as categoria, 
-                       CASE WHEN p.activo THEN 'Sí' ELSE 'No' END as activo
-                FROM productos p
-                LEFT JOIN marcas m ON p.id_marca = m.id_marca
-                LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
-                """
-            elif table_name == "usuarios":
-                query = "SELECT id, nombre_completo, email, usuario, rol, CASE WHEN activo THEN 'Sí' ELSE 'No' END as activo FROM usuarios"
-            else:
-                # Para tablas maestras simples, agregar columna activo si no existe
-                try:
-                    self.cursor.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name='{table_name}' AND column_name='activo'")
-                    has_activo = self.cursor.fetchone()
-                    if has_activo:
-                        query = f"SELECT *, CASE WHEN activo THEN 'Sí' ELSE 'No' END as activo FROM {table_name}"
-                    else:
-                        query = f"SELECT * FROM {table_name}"
-                except:
-                    query = f"SELECT * FROM {table_name}"
-
-            self.cursor.execute(query)
+            self.cursor.execute(self._all_data_query(table_name))
             return self.cursor.fetchall()
         except Exception as e:
             raise Exception(f"Error al obtener datos: {str(e)}")
 
+    def stream_all_data(self, table_name, itersize=None):
+        """Genera todos los datos de una tabla en bloques (cursor de servidor)"""
+        try:
+            query = self._all_data_query(table_name)
+        except Exception as e:
+            raise Exception(f"Error al obtener datos: {str(e)}")
+        return stream_query(query, None, itersize)
+
+    def _all_data_query(self, table_name):
+        """Arma la consulta de get_all_data para una tabla"""
+        if table_name == "solicitantes":
+            query = """
+            SELECT s.id_solicitante, s.cedula, s.nombre, d.nombre as departamento,
+                   CASE WHEN s.activo THEN 'Sí' ELSE 'No' END as activo
+            FROM solicitantes s
+            LEFT JOIN departamentos d ON s.id_departamento = d.id_departamento
+            """
+        elif table_name == "productos":
+            query = """
+            SELECT p.id_producto, p.codigo, p.nombre, m.nombre as marca, c.nombre as categoria,
+                   CASE WHEN p.activo THEN 'Sí' ELSE 'No' END as activo
+            FROM productos p
+            LEFT JOIN marcas m ON p.id_marca = m.id_marca
+            LEFT JOIN categorias c ON p.id_categoria = c.id_categoria
+            """
+        elif table_name == "usuarios":
+            query = "SELECT id, nombre_completo, email, usuario, rol, CASE WHEN activo THEN 'Sí' ELSE 'No' END as activo FROM usuarios"
+        else:
+            # Para tablas maestras simples, agregar columna activo si no existe
+            try:
+                self.cursor.execute(f"SELECT column_name FROM information_schema.columns WHERE table_name='{table_name}' AND column_name='activo'")
+                has_activo = self.cursor.fetchone()
+                if has_activo:
+                    query = f"SELECT *, CASE WHEN activo THEN 'Sí' ELSE 'No' END as activo FROM {table_name}"
+                else:
+                    query = f"SELECT * FROM {table_name}"
+            except:
+                query = f"SELECT * FROM {table_name}"
+        return query
+
     def get_active_data(self, table_name):
         """Obtiene solo los datos activos para combobox"""
         try:
@@ -125,6 +135,8 @@ class SettingsModel:
             query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
             self.cursor.execute(query, values)
             self.conn.commit()
+            product_catalog.invalidate()
+            lookups.invalidate(table_name)
             return True
         except psycopg2.Error as e:
             self.conn.rollback()
@@ -137,6 +149,8 @@ class SettingsModel:
             query = f"UPDATE {table_name} SET {set_clause} WHERE {id_column} = %s"
             self.cursor.execute(query, values + [item_id])
             self.conn.commit()
+            product_catalog.invalidate()
+            lookups.invalidate(table_name)
             return True
         except psycopg2.Error as e:
             self.conn.rollback()
@@ -153,6 +167,8 @@ class SettingsModel:
                 query = f"UPDATE {table_name} SET activo = FALSE WHERE {id_column} = %s"
                 self.cursor.execute(query, (item_id,))
                 self.conn.commit()
+                product_catalog.invalidate()
+                lookups.invalidate(table_name)
                 return True
             else:
                 # Si no tiene columna activo, no podemos hacer soft delete
@@ -173,6 +189,8 @@ class SettingsModel:
                 query = f"UPDATE {table_name} SET activo = TRUE WHERE {id_column} = %s"
                 self.cursor.execute(query, (item_id,))
                 self.conn.commit()
+                product_catalog.invalidate()
+                lookups.invalidate(table_name)
                 return True
             else:
                 return False
@@ -187,6 +205,8 @@ class SettingsModel:
             query = f"DELETE FROM {table_name} WHERE {id_column} = %s"
             self.cursor.execute(query, (item_id,))
             self.conn.commit()
+            product_catalog.invalidate()
+            lookups.invalidate(table_name)
             return True
         except psycopg2.IntegrityError as e:
             self.conn.rollback()
@@ -201,7 +221,4 @@ class SettingsModel:
 
     def close_connection(self):
         """Cierra la conexión a la base de datos"""
-        if hasattr(self, 'cursor'):
-            self.cursor.close()
-        if hasattr(self, 'conn'):
-            self.conn.close()
\ No newline at end of file
+        self.close()
\ No newline at end of file
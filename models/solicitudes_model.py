@@ -1,11 +1,10 @@
-from database import create_connection
+from database import bulk_insert
+from models.base_model import BaseModel
+from models.catalog import product_catalog
+from models.product_model import INVENTARIO_POR_PRODUCTO
 
 
-class SolicitudesModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+class SolicitudesModel(BaseModel):
     def obtener_departamentos(self):
         """Obtener todos los departamentos"""
         try:
@@ -38,12 +37,8 @@ class SolicitudesModel:
     def obtener_productos_por_categoria(self, categoria_id):
         """Obtener productos por categoría"""
         try:
-            self.cursor.execute("""
-                SELECT id_producto, nombre 
-                FROM productos 
-                WHERE id_categoria = %s AND activo = TRUE
-            """, (categoria_id,))
-            return self.cursor.fetchall()
+            return [(p.id_producto, p.nombre)
+                    for p in product_catalog.by_category(categoria_id)]
         except Exception as e:
             print(f"Error al obtener productos: {e}")
             return []
@@ -60,11 +55,10 @@ class SolicitudesModel:
                     SELECT 
                         p.id_producto,
                         COALESCE(i.stock, 0) AS stock,
-                        COALESCE(u.nombre, 'N/A') AS ubicacion,
+                        COALESCE(i.ubicacion, 'N/A') AS ubicacion,
                         COALESCE(i.estado_stock, 'disponible') AS estado_stock
                     FROM productos p
-                    LEFT JOIN inventario i ON p.id_producto = i.id_producto
-                    LEFT JOIN ubicaciones u ON i.id_ubicacion = u.id_ubicacion
+                    LEFT JOIN inventario_producto i ON p.id_producto = i.id_producto
                     WHERE p.id_producto = %s
                 """, (product_id,))
                 return self.cursor.fetchone()
@@ -79,28 +73,26 @@ class SolicitudesModel:
                         SELECT 
                             p.id_producto,
                             COALESCE(i.stock, 0) AS stock,
-                            COALESCE(u.nombre, 'N/A') AS ubicacion,
+                            COALESCE(i.ubicacion, 'N/A') AS ubicacion,
                             COALESCE(i.estado_stock, 'disponible') AS estado_stock
                         FROM productos p
-                        LEFT JOIN inventario i ON p.id_producto = i.id_producto
-                        LEFT JOIN ubicaciones u ON i.id_ubicacion = u.id_ubicacion
+                        LEFT JOIN inventario_producto i ON p.id_producto = i.id_producto
                         WHERE p.id_producto = %s
                     """, (product_id,))
                     result = self.cursor.fetchone()
                     if result:
                         return result
 
-                # Si no se obtuvo id, buscar por nombre (case-insensitive)
+                # Si no se obtuvo id, buscar por nombre (case-insensitive);
+                # con la vista se agruparía todo el inventario antes de filtrar
                 nombre = producto_identificador.strip()
                 self.cursor.execute("""
                     SELECT 
                         p.id_producto,
                         COALESCE(i.stock, 0) AS stock,
-                        COALESCE(u.nombre, 'N/A') AS ubicacion,
+                        COALESCE(i.ubicacion, 'N/A') AS ubicacion,
                         COALESCE(i.estado_stock, 'disponible') AS estado_stock
-                    FROM productos p
-                    LEFT JOIN inventario i ON p.id_producto = i.id_producto
-                    LEFT JOIN ubicaciones u ON i.id_ubicacion = u.id_ubicacion
+                    FROM productos p""" + INVENTARIO_POR_PRODUCTO + """
                     WHERE p.nombre ILIKE %s
                     LIMIT 1
                 """, (nombre,))
@@ -172,29 +164,61 @@ class SolicitudesModel:
             self.conn.rollback()
             return None
 
-    def registrar_detalle_solicitud(self, detalle_data):
-        """Registrar detalle de solicitud"""
+    def registrar_detalles_solicitud(self, detalles):
+        """Registrar todos los detalles de una solicitud en un solo viaje.
+
+        Args:
+            detalles: lista de tuplas (id_solicitud, id_producto, cantidad)
+        """
         try:
-            self.cursor.execute("""
-                INSERT INTO detalle_solicitud 
-                (id_solicitud, id_producto, cantidad)
-                VALUES (%s, %s, %s)
-            """, detalle_data)
+            bulk_insert(self.cursor, "detalle_solicitud",
+                        ("id_solicitud", "id_producto", "cantidad"), detalles)
         except Exception as e:
-            print(f"Error al registrar detalle de solicitud: {e}")
+            print(f"Error al registrar detalles de solicitud: {e}")
             self.conn.rollback()
+            raise
+
+    def actualizar_inventario_lote(self, salidas):
+        """Descontar del inventario varias salidas en una sola sentencia.
 
-    def actualizar_inventario(self, producto_id, cantidad):
-        """Actualizar inventario después de una salida"""
+        Un producto puede tener stock en varias ubicaciones: se descuenta
+        primero de la que más tiene y lo que falte de las siguientes; si no
+        alcanza, el resto queda en negativo en la última.
+
+        Args:
+            salidas: lista de tuplas (id_producto, cantidad)
+        """
+        if not salidas:
+            return
+        productos, cantidades = zip(*salidas)
         try:
             self.cursor.execute("""
-                UPDATE inventario 
-                SET stock = stock - %s
-                WHERE id_producto = %s
-            """, (cantidad, producto_id))
+                WITH v AS (
+                    SELECT id_producto, SUM(cantidad)::INTEGER AS cantidad
+                    FROM unnest(%s::int[], %s::int[]) AS v(id_producto, cantidad)
+                    GROUP BY id_producto
+                ), filas AS (
+                    -- antes: stock de las ubicaciones que se descuentan primero
+                    SELECT i.id_inventario, v.cantidad,
+                           SUM(i.stock) OVER w - i.stock AS antes,
+                           ROW_NUMBER() OVER w = COUNT(*) OVER (PARTITION BY i.id_producto) AS ultima
+                    FROM v
+                    JOIN inventario i ON i.id_producto = v.id_producto
+                    WINDOW w AS (PARTITION BY i.id_producto ORDER BY i.stock DESC, i.id_inventario)
+                )
+                UPDATE inventario i
+                SET stock = i.stock - CASE
+                    WHEN f.ultima THEN f.cantidad - f.antes
+                    ELSE LEAST(GREATEST(i.stock, 0), f.cantidad - f.antes)
+                END
+                FROM filas f
+                WHERE i.id_inventario = f.id_inventario
+                  AND f.cantidad > f.antes
+            """, (list(productos), list(cantidades)))
         except Exception as e:
             print(f"Error al actualizar inventario: {e}")
             self.conn.rollback()
+            raise
 
     def obtener_detalles_solicitud(self, solicitud_id):
         """Obtener detalles completos de una solicitud"""
@@ -270,12 +294,9 @@ class SolicitudesModel:
     def commit(self):
         """Confirmar transacción"""
         self.conn.commit()
+        # Las entregas descuentan inventario
+        product_catalog.invalidate()
 
     def rollback(self):
         """Revertir transacción"""
         self.conn.rollback()
-
-    def close(self):
-        """Cerrar conexión"""
-        self.cursor.close()
-        self.conn.close()
\ No newline at end of file
@@ -0,0 +1,152 @@
+# models/thumbnails.py
+import base64
+import hashlib
+import io
+import os
+import tkinter as tk
+from collections import OrderedDict
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow es opcional: sin él no se muestran miniaturas
+    Image = None
+
+from database import get_connection
+from db_executor import DBExecutor
+from config import THUMBNAILS
+
+
+class ThumbnailCache:
+    """Miniaturas de las imágenes de productos para las tablas.
+
+    Tres niveles: PhotoImage en memoria (LRU de THUMBNAILS['memory_items']),
+    PNG en disco nombrado por el hash del contenido y el tamaño (una imagen
+    nueva tiene otro hash, así que nunca hay que invalidarlo) y la imagen
+    original en la tabla imagenes. Leer, decodificar y achicar corre en un
+    pool propio de hilos; el PhotoImage se crea en el hilo de Tk.
+    """
+
+    def __init__(self, app, size=None):
+        self.app = app
+        self.size = size or THUMBNAILS['size']
+        self._images = OrderedDict()
+        self._waiting = {}
+        self._executor = None
+
+    @property
+    def available(self):
+        """Si se pueden generar miniaturas (Pillow instalado)"""
+        return Image is not None
+
+    @staticmethod
+    def content_hash(data):
+        """Hash con el que se guarda una imagen (tabla imagenes y caché en disco)"""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def check_image(data):
+        """Verifica que los bytes sean una imagen legible (si hay Pillow)"""
+        if Image is None:
+            return
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except Exception:
+            raise Exception("El archivo no es una imagen válida")
+
+    # ===== PEDIDOS (hilo de Tk) =====
+
+    def request(self, image_hash, callback):
+        """Llama callback(PhotoImage) en el hilo de Tk cuando la miniatura esté lista.
+
+        Quien muestre la imagen debe volver a pedirla al necesitarla: una
+        miniatura que sale del LRU deja de existir en Tk.
+        """
+        if not image_hash or not self.available:
+            return
+
+        image = self._images.get(image_hash)
+        if image is not None:
+            self._images.move_to_end(image_hash)
+            callback(image)
+            return
+
+        callbacks = self._waiting.get(image_hash)
+        if callbacks is not None:
+            callbacks.append(callback)
+            return
+        self._waiting[image_hash] = [callback]
+
+        self._get_executor().submit(
+            self._render, image_hash,
+            on_success=lambda png: self._on_rendered(image_hash, png),
+            on_error=lambda e: self._on_failed(image_hash, e),
+            channel="miniaturas", replace=False)
+
+    def cancel_pending(self):
+        """Descarta los pedidos aún no entregados (filas que dejaron de verse)"""
+        if self._executor is not None:
+            self._executor.cancel("miniaturas")
+        self._waiting.clear()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            # Pool aparte: decodificar imágenes no debe demorar las consultas
+            self._executor = DBExecutor(self.app, max_workers=THUMBNAILS['workers'],
+                                        show_busy=False)
+        return self._executor
+
+    def _on_rendered(self, image_hash, png):
+        image = tk.PhotoImage(master=self.app, data=base64.b64encode(png))
+        self._images[image_hash] = image
+        while len(self._images) > THUMBNAILS['memory_items']:
+            self._images.popitem(last=False)
+
+        for callback in self._waiting.pop(image_hash, ()):
+            callback(image)
+
+    def _on_failed(self, image_hash, error):
+        self._waiting.pop(image_hash, None)
+        print(f"Error al generar miniatura {image_hash}: {error}")
+
+    # ===== GENERACIÓN (hilos del pool) =====
+
+    def _cache_path(self, image_hash):
+        return os.path.join(THUMBNAILS['cache_dir'], f"{image_hash}_{self.size}.png")
+
+    def _render(self, image_hash):
+        """PNG de la miniatura: del caché en disco o generada desde la base"""
+        path = self._cache_path(image_hash)
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        with get_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT datos FROM imagenes WHERE hash = %s", (image_hash,))
+            row = cursor.fetchone()
+        if row is None:
+            raise Exception("La imagen no existe")
+
+        with Image.open(io.BytesIO(row[0])) as image:
+            # En JPEG decodifica directamente a una escala cercana al tamaño final
+            image.draft("RGB", (self.size, self.size))
+            image = image.convert("RGBA")
+            image.thumbnail((self.size, self.size))
+            buffer = io.BytesIO()
+            image.save(buffer, "PNG")
+        png = buffer.getvalue()
+
+        # Escritura atómica: otro hilo o terminal puede estar leyendo el mismo archivo
+        os.makedirs(THUMBNAILS['cache_dir'], exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{id(buffer)}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(png)
+        os.replace(temp_path, path)
+        return png
@@ -1,13 +1,9 @@
 # models/user_model.py
 import hashlib
-from database import create_connection
+from models.base_model import BaseModel
 
 
-class UserModel:
-    def __init__(self):
-        self.conn = create_connection()
-        self.cursor = self.conn.cursor()
-
+class UserModel(BaseModel):
     def find_user_by_username(self, username):
         """Busca un usuario por nombre de usuario"""
         try:
@@ -77,7 +73,4 @@ class UserModel:
 
     def close_connection(self):
         """Cierra la conexión a la base de datos"""
-        if self.cursor:
-            self.cursor.close()
-        if self.conn:
-            self.conn.close()
+        self.close()
@@ -1,6 +1,7 @@
 # views/base_view.py
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
+from db_executor import run_stream
 
 class BaseView:
     def __init__(self, frame, app):
@@ -237,7 +238,37 @@ class BaseView:
         tree.delete(*tree.get_children())
         for row in data:
             tree.insert("", "end", values=row)
-    
+
+    def refresh_table_chunks(self, tree, chunks, on_error=None):
+        """Actualiza una tabla a medida que llegan bloques de filas.
+
+        El generador (y su cursor de servidor) se recorre en el DBExecutor;
+        al hilo de Tk solo llegan los bloques para insertarlos. Una recarga
+        nueva sobre la misma tabla cancela la anterior. Si la lectura falla
+        se pasa el error a on_error(excepción), o se muestra en un mensaje.
+        """
+        tree.delete(*tree.get_children())
+        channel = f"tabla{tree}"
+
+        def insert_rows(rows):
+            try:
+                for row in rows:
+                    tree.insert("", "end", values=row)
+            except tk.TclError:
+                # La tabla fue destruida (cambio de pantalla): dejar de leer
+                executor = getattr(self.app, 'db_executor', None)
+                if executor is not None:
+                    executor.cancel(channel)
+
+        def show_error(e):
+            if on_error:
+                on_error(e)
+            else:
+                messagebox.showerror("Error", f"Error al cargar datos: {e}")
+
+        run_stream(self.app, lambda: iter(chunks), on_chunk=insert_rows,
+                   on_error=show_error, channel=channel)
+
     def get_selected_table_item(self, tree):
         """Obtiene el item seleccionado en una tabla"""
         selected_item = tree.selection()
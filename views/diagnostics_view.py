@@ -0,0 +1,84 @@
+import tkinter as tk
+from tkinter import ttk
+from views.base_view import BaseView
+from database import get_query_stats, reset_query_stats
+from config import QUERY_STATS
+
+
+class DiagnosticsView(BaseView):
+    def __init__(self, app):
+        super().__init__(None, app)
+        self.tree = None
+        self.window = None
+        self.detail_label = None
+        self.stats = []
+
+    def show(self):
+        """Muestra la ventana de diagnóstico de consultas SQL"""
+        self.window = tk.Toplevel(self.app)
+        self.window.title("Diagnóstico de consultas")
+        self.window.geometry("1100x520")
+        self.window.configure(bg=self.bg_color)
+
+        main_frame = self.create_main_container(self.window)
+        main_frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+        top_frame = self.create_section_frame(main_frame)
+        top_frame.pack(fill="x", pady=(0, 5))
+
+        tk.Label(top_frame,
+                 text=f"Umbral de consulta lenta: {QUERY_STATS['slow_query_ms']} ms",
+                 font=self.label_font, bg=self.bg_color, fg=self.fg_color).pack(side="left")
+
+        actions = [
+            ("🔄 Actualizar", self.refresh),
+            ("🧹 Reiniciar", self.reset)
+        ]
+        btn_frame, _ = self.create_action_buttons(top_frame, actions)
+        btn_frame.pack(side="right")
+
+        columns = ("Consulta", "Llamadas", "Total ms", "Prom. ms",
+                   "p50 ms", "p95 ms", "Máx. ms", "Filas", "Origen")
+        col_widths = [330, 70, 80, 70, 70, 70, 70, 70, 250]
+        table_frame, self.tree = self.create_table(main_frame, columns, col_widths, height=18)
+        table_frame.pack(fill="both", expand=True)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.show_detail())
+
+        self.detail_label = tk.Label(main_frame, text="", justify="left", anchor="w",
+                                     wraplength=1050, font=self.entry_font,
+                                     bg=self.bg_color, fg=self.fg_color)
+        self.detail_label.pack(fill="x", pady=(5, 0))
+
+        self.refresh()
+        return self.window
+
+    def refresh(self):
+        """Recarga las estadísticas en la tabla"""
+        self.stats = get_query_stats()
+        self.tree.delete(*self.tree.get_children())
+        for i, stat in enumerate(self.stats):
+            self.tree.insert("", "end", iid=str(i), values=(
+                stat['query'][:120],
+                stat['count'],
+                f"{stat['total_ms']:.1f}",
+                f"{stat['avg_ms']:.1f}",
+                f"{stat['p50_ms']:.1f}",
+                f"{stat['p95_ms']:.1f}",
+                f"{stat['max_ms']:.1f}",
+                stat['rows'],
+                stat['last_callsite']
+            ))
+
+    def reset(self):
+        """Reinicia las estadísticas"""
+        reset_query_stats()
+        self.refresh()
+
+    def show_detail(self):
+        """Muestra la consulta completa y todos sus orígenes"""
+        selected = self.tree.selection()
+        if not selected:
+            return
+        stat = self.stats[int(selected[0])]
+        self.detail_label.config(
+            text=f"{stat['query']}\n\nOrígenes: {', '.join(stat['callsites'])}")
@@ -1,4 +1,5 @@
 import tkinter as tk
+from datetime import date
 from tkinter import ttk, messagebox
 from views.base_view import BaseView
 
@@ -47,6 +48,17 @@ class MovementView(BaseView):
         ttk.Button(filter_frame, text="📤 Exportar",
                 command=self.on_export).pack(side="left", padx=5)
 
+        ttk.Button(filter_frame, text="🗄️ Archivo",
+                command=self.on_archive).pack(side="left", padx=5)
+
+        ttk.Button(filter_frame, text="📅 Stock a fecha",
+                command=self.on_stock_at).pack(side="left", padx=5)
+
+        # Totales de los filtros actuales
+        self.summary_label = tk.Label(self.frame, text="", anchor="w",
+                bg=self.bg_color, fg=self.fg_color, font=self.label_font)
+        self.summary_label.pack(fill="x", padx=15)
+
         # Tabla de movimientos usando el método de BaseView
         columns = ("Nro", "Fecha", "Tipo", "Producto", "Cantidad",
                 "Ubicación", "Responsable", "Referencia")
@@ -60,6 +72,10 @@ class MovementView(BaseView):
         )
         table_frame.pack(fill="both", expand=True, padx=10, pady=(5, 10))
 
+        # Pedir la página siguiente al acercarse al final de la tabla
+        scrollbar = next(w for w in table_frame.winfo_children() if isinstance(w, ttk.Scrollbar))
+        self.tree.configure(yscrollcommand=lambda first, last: self._on_tree_scroll(scrollbar, first, last))
+
     def get_filter_values(self):
         """Obtiene los valores actuales de los filtros"""
         return {
@@ -79,9 +95,123 @@ class MovementView(BaseView):
         if self.controller:
             self.controller.export_movements()
 
+    def show_summary(self, stats):
+        """Muestra los totales de movimientos de los filtros actuales"""
+        self.summary_label.config(text=(
+            f"Movimientos: {stats['total_movimientos']}   "
+            f"Entradas: {stats['total_entradas']}   "
+            f"Salidas: {stats['total_salidas']}   "
+            f"Balance: {stats['balance']}"))
+
+    def on_stock_at(self):
+        """Callback para la consulta de stock a una fecha"""
+        if self.controller:
+            self.controller.show_stock_at()
+
+    def show_stock_at_window(self):
+        """Ventana de stock a una fecha: fecha, código opcional y resultados"""
+        window = self.create_modal_window(self.app, "Stock a una fecha", "620x520")
+
+        main_frame = self.create_form_frame(window, "Stock a una fecha")
+        main_frame.pack(fill="both", expand=True, padx=16, pady=12)
+
+        form_frame = tk.Frame(main_frame, bg=self.bg_color)
+        form_frame.pack(fill="x", pady=(0, 10))
+        tk.Label(form_frame, text="Fecha (DD/MM/AAAA [HH:MM]):", font=self.form_label_font,
+                bg=self.bg_color, fg=self.fg_color).grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        fecha_entry = ttk.Entry(form_frame, width=18, font=self.form_entry_font)
+        fecha_entry.grid(row=0, column=1, sticky="w", padx=5, pady=2)
+        fecha_entry.insert(0, date.today().strftime("%d/%m/%Y"))
+        tk.Label(form_frame, text="Código (opcional):", font=self.form_label_font,
+                bg=self.bg_color, fg=self.fg_color).grid(row=1, column=0, sticky="w", padx=5, pady=2)
+        codigo_entry = ttk.Entry(form_frame, width=18, font=self.form_entry_font)
+        codigo_entry.grid(row=1, column=1, sticky="w", padx=5, pady=2)
+        consultar_btn = ttk.Button(form_frame, text="Consultar", style="Accent.TButton")
+        consultar_btn.grid(row=0, column=2, rowspan=2, padx=10)
+
+        table_frame, tree = self.create_table(
+            main_frame, ("Código", "Producto", "Stock"), [120, 300, 80], height=14)
+        table_frame.pack(fill="both", expand=True)
+
+        fecha_entry.focus_set()
+        self.center_window(window)
+        return window, {'fecha': fecha_entry, 'codigo': codigo_entry,
+                        'consultar': consultar_btn, 'tree': tree}
+
+    def fill_stock_at_table(self, tree, rows):
+        """Pintar el resultado de stock a una fecha (id, código, nombre, stock)"""
+        if tree.winfo_exists():
+            self.refresh_table_data(tree, [row[1:] for row in rows])
+
+    def on_archive(self):
+        """Callback para la ventana de archivo del historial"""
+        if self.controller:
+            self.controller.show_archive()
+
+    def show_archive_window(self):
+        """Ventana con los meses del historial (adjuntos y archivados)"""
+        window = self.create_modal_window(self.app, "Archivo de movimientos", "520x460")
+
+        main_frame = self.create_form_frame(window, "Meses del historial")
+        main_frame.pack(fill="both", expand=True, padx=16, pady=12)
+
+        table_frame, tree = self.create_table(
+            main_frame, ("Mes", "Estado", "Movimientos"), [120, 120, 120], height=14)
+        table_frame.pack(fill="both", expand=True)
+
+        btn_frame = tk.Frame(main_frame, bg=self.bg_color)
+        btn_frame.pack(fill="x", pady=(10, 0))
+        archive_btn = ttk.Button(btn_frame, text="🗄️ Archivar")
+        archive_btn.pack(side="left", padx=5)
+        restore_btn = ttk.Button(btn_frame, text="♻️ Restaurar")
+        restore_btn.pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="Cerrar", command=window.destroy).pack(side="right", padx=5)
+
+        self.center_window(window)
+        return window, {'tree': tree, 'archivar': archive_btn, 'restaurar': restore_btn}
+
+    def fill_archive_table(self, tree, partitions):
+        """Pintar los meses (mes, archivado, filas)"""
+        if not tree.winfo_exists():
+            return
+        tree.delete(*tree.get_children())
+        for mes, archivado, filas in partitions:
+            tree.insert("", "end", iid=mes.isoformat(), values=(
+                mes.strftime("%m/%Y"),
+                "Archivado" if archivado else "En línea",
+                filas if archivado else f"~{filas}"
+            ))
+
+    def get_selected_month(self, tree):
+        """Mes seleccionado en la ventana de archivo (o None)"""
+        selected = tree.selection()
+        return date.fromisoformat(selected[0]) if selected else None
+
+    def confirm(self, message):
+        """Pide confirmación al usuario"""
+        return messagebox.askyesno("Confirmar", message)
+
     def refresh_table(self, data):
-        """Actualiza la tabla con nuevos datos"""
-        self.refresh_table_data(self.tree, data)
+        """Actualiza la tabla con la primera página de movimientos"""
+        self.tree.delete(*self.tree.get_children())
+        self.append_rows(data)
+
+    def append_rows(self, data):
+        """Agrega filas al final de la tabla (página siguiente).
+
+        Las filas vienen como (id_movimiento, fecha, ...): el número de fila
+        y el formato de la fecha se ponen aquí.
+        """
+        start = len(self.tree.get_children()) + 1
+        for nro, row in enumerate(data, start=start):
+            fecha = row[1].strftime("%d/%m/%Y %H:%M") if row[1] else "N/A"
+            self.tree.insert("", "end", values=(nro, fecha) + tuple(row[2:]))
+
+    def _on_tree_scroll(self, scrollbar, first, last):
+        """Mover la barra de scroll y cargar más filas cerca del final"""
+        scrollbar.set(first, last)
+        if float(last) >= 0.9 and self.controller:
+            self.controller.load_next_page()
 
     def get_table_data(self):
         """Obtiene todos los datos actuales de la tabla"""
@@ -1,11 +1,20 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 from views.base_view import BaseView
+from config import SEARCH, THUMBNAILS
 
 class ProductView(BaseView):
     def __init__(self, frame, app):
         super().__init__(frame, app)
         self.controller = None
+        self._search_job = None
+
+        # Edición en la tabla: el controlador comparte su conjunto de cambios
+        # (id -> {columna: valor}) para pintar las filas editadas
+        self.edit_mode = False
+        self.pending_edits = {}
+        self._cell_editor = None
+        self._thumb_job = None
 
     def set_controller(self, controller):
         """Establecer el controlador para esta vista"""
@@ -27,11 +36,29 @@ class ProductView(BaseView):
             ("✏️ Editar", self.controller.edit_selected_product),
             ("🗑️ Eliminar", self.controller.delete_selected_product),
             ("📥 Agregar Stock", self.controller.show_add_stock_form),
-            ("📤 Exportar", self.controller.export_inventory)
+            ("🔁 Transferir", self.controller.show_transfer_form),
+            ("📦 Entrada múltiple", self.controller.show_stock_intake),
+            ("🔫 Modo escáner", self.controller.show_scan_mode),
+            ("🖼️ Imagen", self.controller.set_product_image),
+            ("📤 Exportar", self.controller.export_inventory),
+            ("📂 Importar", self.controller.import_products)
         ]
         button_frame, action_buttons = self.create_action_buttons(top_frame, actions)
         button_frame.pack(side="left", pady=(0, 5))
 
+        # Edición en la tabla
+        edit_frame = tk.Frame(top_frame, bg=self.bg_color)
+        edit_frame.pack(side="right", pady=(0, 5))
+        self.edit_mode_btn = ttk.Button(edit_frame, text="📝 Editar en tabla",
+                                        command=self.controller.toggle_edit_mode)
+        self.edit_mode_btn.pack(side="left", padx=2)
+        self.save_edits_btn = ttk.Button(edit_frame, text="💾 Guardar cambios (0)", style="Accent.TButton",
+                                         command=self.controller.save_edits, state="disabled")
+        self.save_edits_btn.pack(side="left", padx=2)
+        self.discard_edits_btn = ttk.Button(edit_frame, text="↩️ Descartar",
+                                            command=self.controller.discard_edits, state="disabled")
+        self.discard_edits_btn.pack(side="left", padx=2)
+
         # --- FRAME DE FILTROS ---
         filtros_frame = tk.LabelFrame(main_container, text="Filtros", font=self.label_font, bg=self.bg_color, fg=self.fg_color)
         filtros_frame.pack(fill="x", padx=10, pady=(5, 5))
@@ -43,7 +70,7 @@ class ProductView(BaseView):
                 font=self.label_font, bg=self.bg_color, fg=self.fg_color).pack(side="left", padx=5)
         self.search_entry = ttk.Entry(buscador_frame, width=30, font=self.entry_font)
         self.search_entry.pack(side="left", padx=5)
-        self.search_entry.bind("<KeyRelease>", lambda e: self.controller.search_products())
+        self.search_entry.bind("<KeyRelease>", lambda e: self._schedule_search())
 
         # --- FILA 2: COMBOBOX Y BOTÓN ---
         filtros_inner_frame = tk.Frame(filtros_frame, bg=self.bg_color)
@@ -70,6 +97,10 @@ class ProductView(BaseView):
         )
         estado_frame.pack(side="left", padx=5)
 
+        # Los filtros se aplican en memoria: no hace falta esperar al botón
+        for combo in (self.categoria_combo, self.marca_combo, self.estado_combo):
+            combo.bind("<<ComboboxSelected>>", lambda e: self.controller.apply_filters())
+
         # Botón aplicar filtros
         self.apply_btn = ttk.Button(filtros_inner_frame, text="Aplicar Filtros", style="Accent.TButton",
                                   command=self.controller.apply_filters)
@@ -82,8 +113,52 @@ class ProductView(BaseView):
         table_frame, self.tree = self.create_table(main_container, columns, col_widths, height=15)
         table_frame.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
+        self.tree.tag_configure("editado", background="#fff3cd")
+
+        # Miniaturas en la columna del árbol (solo si hay Pillow)
+        thumbnails = getattr(self.app, 'thumbnails', None)
+        if thumbnails is not None and thumbnails.available:
+            ttk.Style().configure("Miniaturas.Treeview", rowheight=THUMBNAILS['size'] + 6)
+            self.tree.configure(show="tree headings", style="Miniaturas.Treeview")
+            self.tree.column("#0", width=THUMBNAILS['size'] + 12,
+                             minwidth=THUMBNAILS['size'] + 12, stretch=False)
+            self.tree.bind("<Configure>", lambda e: self._schedule_thumbnails())
+        self.tree.bind("<Double-1>", self._on_tree_double_click)
+
+        # Ordenar en memoria al hacer clic en un encabezado
+        for col in columns:
+            self.tree.heading(col, command=lambda c=col: self.controller.sort_by(c))
+
+        # Pedir la página siguiente al acercarse al final de la tabla
+        scrollbar = next(w for w in table_frame.winfo_children() if isinstance(w, ttk.Scrollbar))
+        self.tree.configure(yscrollcommand=lambda first, last: self._on_tree_scroll(scrollbar, first, last))
+
         return self
 
+    def _schedule_search(self):
+        """Buscar cuando el usuario deja de escribir (no en cada tecla)"""
+        if self._search_job is not None:
+            self.search_entry.after_cancel(self._search_job)
+        self._search_job = self.search_entry.after(SEARCH['debounce_ms'], self._run_search)
+
+    def _run_search(self):
+        self._search_job = None
+        self.controller.search_products()
+
+    def ask_import_file(self):
+        """Pedir el archivo de productos a importar"""
+        return filedialog.askopenfilename(
+            parent=self.app,
+            title="Importar productos",
+            filetypes=[("Excel o CSV", "*.xlsx *.xls *.csv"), ("Todos los archivos", "*.*")])
+
+    def ask_image_file(self):
+        """Pedir la imagen de un producto"""
+        return filedialog.askopenfilename(
+            parent=self.app,
+            title="Imagen del producto",
+            filetypes=[("Imágenes", "*.png *.jpg *.jpeg *.gif *.bmp *.webp"), ("Todos los archivos", "*.*")])
+
     def get_search_term(self):
         """Obtener término de búsqueda"""
         return self.search_entry.get().strip()
@@ -98,11 +173,152 @@ class ProductView(BaseView):
 
     def refresh_table(self, data):
         """Refrescar tabla con nuevos datos"""
+        self._close_cell_editor()
         self.tree.delete(*self.tree.get_children())
         for i, item in enumerate(data, start=1):
-            # Reemplaza el primer elemento por el número de fila
-            fila = (i,) + item[1:]
-            self.tree.insert("", "end", values=fila, tags=(item[0],))
+            self._insert_row(i, item)
+        self._schedule_thumbnails()
+
+    def append_rows(self, data):
+        """Agregar filas al final de la tabla (página siguiente)"""
+        start = len(self.tree.get_children()) + 1
+        for i, item in enumerate(data, start=start):
+            self._insert_row(i, item)
+        self._schedule_thumbnails()
+
+    def _insert_row(self, number, item):
+        """Insertar una fila; las ediciones pendientes se muestran sobre los datos leídos"""
+        # Reemplaza el primer elemento por el número de fila
+        fila = (number,) + tuple(item[1:])
+        tags = (item[0],)
+        edits = self.pending_edits.get(item[0])
+        if edits:
+            columns = self.tree["columns"]
+            fila = tuple(edits.get(col, value) for col, value in zip(columns, fila))
+            tags += ("editado",)
+        self.tree.insert("", "end", values=fila, tags=tags)
+
+    # ===== MINIATURAS =====
+
+    def _schedule_thumbnails(self):
+        """Pedir las miniaturas de las filas visibles cuando el scroll se detiene"""
+        thumbnails = getattr(self.app, 'thumbnails', None)
+        if thumbnails is None or not thumbnails.available:
+            return
+        if self._thumb_job is not None:
+            self.tree.after_cancel(self._thumb_job)
+        self._thumb_job = self.tree.after(THUMBNAILS['debounce_ms'], self._load_visible_thumbnails)
+
+    def _load_visible_thumbnails(self):
+        self._thumb_job = None
+        if not self.tree.winfo_exists():
+            return
+        items = self.tree.get_children()
+        if not items:
+            return
+
+        first, last = self.tree.yview()
+        start = int(first * len(items))
+        end = min(len(items), int(last * len(items)) + 1)
+
+        thumbnails = self.app.thumbnails
+        # Lo pedido para filas que ya no se ven deja de interesar
+        thumbnails.cancel_pending()
+        for item in items[start:end]:
+            image_hash = self.controller.image_hash(self.tree.item(item, "tags")[0])
+            if image_hash:
+                thumbnails.request(
+                    image_hash, lambda image, item=item: self._set_row_image(item, image))
+
+    def _set_row_image(self, item, image):
+        if self.tree.winfo_exists() and self.tree.exists(item):
+            self.tree.item(item, image=image)
+
+    # ===== EDICIÓN EN LA TABLA =====
+
+    def set_edit_mode(self, enabled):
+        """Activar o desactivar la edición de celdas con doble clic"""
+        self._close_cell_editor()
+        self.edit_mode = enabled
+        self.edit_mode_btn.configure(text="✔️ Terminar edición" if enabled else "📝 Editar en tabla")
+        self.set_pending_count(len(self.pending_edits))
+
+    def set_pending_count(self, count):
+        """Mostrar cuántos productos tienen cambios sin guardar"""
+        state = "normal" if self.edit_mode and count else "disabled"
+        self.save_edits_btn.configure(text=f"💾 Guardar cambios ({count})", state=state)
+        self.discard_edits_btn.configure(state=state)
+
+    def set_saving(self, saving):
+        """Bloquear la edición mientras se guardan los cambios"""
+        self._close_cell_editor()
+        state = "disabled" if saving else "normal"
+        for button in (self.edit_mode_btn, self.save_edits_btn, self.discard_edits_btn):
+            button.configure(state=state)
+        if not saving:
+            self.set_pending_count(len(self.pending_edits))
+
+    def _on_tree_double_click(self, event):
+        """En modo edición, abrir un editor sobre la celda"""
+        if not self.edit_mode or self.tree.identify_region(event.x, event.y) != "cell":
+            return
+        item = self.tree.identify_row(event.y)
+        column_id = self.tree.identify_column(event.x)
+        if not item or not column_id:
+            return
+        column = self.tree["columns"][int(column_id[1:]) - 1]
+        options = self.controller.edit_options(column)
+        if options is None:
+            return
+
+        self._close_cell_editor()
+        x, y, width, height = self.tree.bbox(item, column_id)
+        value = self.tree.set(item, column)
+        if options:
+            editor = ttk.Combobox(self.tree, values=options, state="readonly", font=self.entry_font)
+            editor.set(value)
+            editor.bind("<<ComboboxSelected>>", lambda e: self._commit_cell_edit())
+        else:
+            editor = ttk.Entry(self.tree, font=self.entry_font)
+            editor.insert(0, value)
+            editor.select_range(0, "end")
+            editor.bind("<FocusOut>", lambda e: self._commit_cell_edit())
+        editor.bind("<Return>", lambda e: self._commit_cell_edit())
+        editor.bind("<KP_Enter>", lambda e: self._commit_cell_edit())
+        editor.bind("<Escape>", lambda e: self._close_cell_editor())
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        self._cell_editor = (editor, item, column, value)
+
+    def _commit_cell_edit(self):
+        """Pasar el valor del editor al conjunto de cambios del controlador"""
+        if self._cell_editor is None:
+            return
+        editor, item, column, old_value = self._cell_editor
+        value = editor.get().strip()
+        # Se cierra antes de validar: un messagebox quita el foco y volvería a llamar
+        self._close_cell_editor()
+        if value == str(old_value):
+            return
+
+        product_id = self.tree.item(item, "tags")[0]
+        if self.controller.edit_cell(product_id, column, value):
+            self.tree.set(item, column, value)
+            tags = (product_id, "editado") if int(product_id) in self.pending_edits else (product_id,)
+            self.tree.item(item, tags=tags)
+
+    def _close_cell_editor(self):
+        if self._cell_editor is not None:
+            editor = self._cell_editor[0]
+            self._cell_editor = None
+            editor.destroy()
+
+    def _on_tree_scroll(self, scrollbar, first, last):
+        """Mover la barra de scroll y cargar más filas cerca del final"""
+        scrollbar.set(first, last)
+        self._schedule_thumbnails()
+        if float(last) >= 0.9 and self.controller:
+            self.controller.load_next_page()
 
     def get_selected_product(self):
         """Obtener producto seleccionado"""
@@ -195,6 +411,159 @@ class ProductView(BaseView):
 
         return form_window, qty_entry, add_btn
 
+    def show_transfer_form(self, product_name, origenes, destinos):
+        """Mostrar formulario para transferir stock entre ubicaciones
+
+        Args:
+            origenes: lista de (id_ubicacion, nombre, stock) del producto
+            destinos: lista de (id_ubicacion, nombre)
+        """
+        form_window = self.create_modal_window(self.app, f"Transferir Stock - {product_name}")
+
+        main_frame = self.create_form_frame(form_window, "Transferir Stock")
+        main_frame.pack(fill="both", expand=True, padx=16, pady=12)
+
+        tk.Label(main_frame, text=f"Producto: {product_name}",
+                font=self.form_label_font, bg=self.bg_color, fg=self.fg_color).pack(anchor="w")
+
+        widgets = {}
+        for key, label, values in (
+                ("origen", "Desde:", [f"{nombre} ({stock})" for _, nombre, stock in origenes]),
+                ("destino", "Hacia:", [nombre for _, nombre in destinos])):
+            tk.Label(main_frame, text=label, font=self.form_label_font,
+                    bg=self.bg_color, fg=self.fg_color).pack(anchor="w", pady=(10, 0))
+            combo = ttk.Combobox(main_frame, values=values, state="readonly", font=self.form_entry_font)
+            combo.pack(fill="x", pady=5, ipady=3)
+            widgets[key] = combo
+        if origenes:
+            widgets["origen"].current(0)
+
+        tk.Label(main_frame, text="Cantidad:", font=self.form_label_font,
+                bg=self.bg_color, fg=self.fg_color).pack(anchor="w", pady=(10, 0))
+        widgets["cantidad"] = ttk.Entry(main_frame, font=self.form_entry_font)
+        widgets["cantidad"].pack(fill="x", pady=5, ipady=3)
+
+        btn_frame, transfer_btn, cancel_btn = self.create_form_buttons(main_frame)
+        btn_frame.pack(fill="x", pady=15)
+        transfer_btn.configure(text="Transferir")
+        cancel_btn.configure(command=form_window.destroy)
+        widgets["transferir"] = transfer_btn
+
+        self.center_window(form_window)
+
+        return form_window, widgets
+
+    def show_stock_intake_form(self, product_options):
+        """Mostrar pantalla de entrada de stock de varios productos"""
+        form_window = self.create_modal_window(self.app, "Entrada de stock", "760x520")
+
+        main_frame = self.create_form_frame(form_window, "Entrada de stock")
+        main_frame.pack(fill="both", expand=True, padx=16, pady=12)
+
+        # Fila para agregar productos a la entrada
+        add_frame = self.create_section_frame(main_frame)
+        add_frame.pack(fill="x", pady=(0, 8))
+        tk.Label(add_frame, text="Producto:", font=self.label_font,
+                 bg=self.bg_color, fg=self.fg_color).pack(side="left", padx=(0, 5))
+        product_combo = ttk.Combobox(add_frame, values=product_options, width=40,
+                                     font=self.entry_font)
+        product_combo.pack(side="left", padx=5)
+        tk.Label(add_frame, text="Cantidad:", font=self.label_font,
+                 bg=self.bg_color, fg=self.fg_color).pack(side="left", padx=(10, 5))
+        qty_entry = ttk.Entry(add_frame, width=8, font=self.entry_font)
+        qty_entry.pack(side="left", padx=5)
+        add_btn = ttk.Button(add_frame, text="➕ Agregar")
+        add_btn.pack(side="left", padx=5)
+
+        # Productos pendientes de registrar
+        columns = ("Código", "Producto", "Stock actual", "Cantidad")
+        table_frame, tree = self.create_table(main_frame, columns, [120, 330, 100, 100], height=12)
+        table_frame.pack(fill="both", expand=True)
+
+        btn_frame = self.create_section_frame(main_frame)
+        btn_frame.pack(fill="x", pady=(10, 0))
+        remove_btn = ttk.Button(btn_frame, text="🗑️ Quitar seleccionados")
+        remove_btn.pack(side="left")
+        cancel_btn = ttk.Button(btn_frame, text="Cancelar", command=form_window.destroy)
+        cancel_btn.pack(side="right", padx=(10, 0))
+        save_btn = ttk.Button(btn_frame, text="Registrar entrada")
+        save_btn.pack(side="right")
+
+        product_combo.focus_set()
+
+        return form_window, {
+            'producto': product_combo,
+            'cantidad': qty_entry,
+            'tabla': tree,
+            'agregar': add_btn,
+            'quitar': remove_btn,
+            'registrar': save_btn
+        }
+
+    def show_scan_form(self):
+        """Mostrar pantalla de entrada de stock con lector de códigos de barras"""
+        form_window = self.create_modal_window(self.app, "Modo escáner", "760x560")
+
+        main_frame = self.create_form_frame(form_window, "Entrada por escáner")
+        main_frame.pack(fill="both", expand=True, padx=16, pady=12)
+
+        # El lector escribe el código y un Enter en este campo
+        scan_frame = self.create_section_frame(main_frame)
+        scan_frame.pack(fill="x", pady=(0, 8))
+        tk.Label(scan_frame, text="Código:", font=self.form_label_font,
+                 bg=self.bg_color, fg=self.fg_color).pack(side="left", padx=(0, 5))
+        code_entry = ttk.Entry(scan_frame, width=30, font=self.form_entry_font)
+        code_entry.pack(side="left", padx=5, ipady=3)
+        tk.Label(scan_frame, text="Cantidad por lectura:", font=self.label_font,
+                 bg=self.bg_color, fg=self.fg_color).pack(side="left", padx=(15, 5))
+        qty_spin = ttk.Spinbox(scan_frame, from_=1, to=9999, width=6, font=self.entry_font)
+        qty_spin.set(1)
+        qty_spin.pack(side="left", padx=5)
+
+        status_label = tk.Label(main_frame, text="Escanee un código para comenzar",
+                                anchor="w", font=self.label_font,
+                                bg=self.bg_color, fg=self.fg_color)
+        status_label.pack(fill="x", pady=(0, 8))
+
+        # Lecturas pendientes de registrar, con su conteo acumulado
+        columns = ("Código", "Producto", "Stock actual", "Cantidad")
+        table_frame, tree = self.create_table(main_frame, columns, [120, 330, 100, 100], height=12)
+        table_frame.pack(fill="both", expand=True)
+
+        btn_frame = self.create_section_frame(main_frame)
+        btn_frame.pack(fill="x", pady=(10, 0))
+        remove_btn = ttk.Button(btn_frame, text="🗑️ Quitar seleccionados")
+        remove_btn.pack(side="left")
+        close_btn = ttk.Button(btn_frame, text="Cerrar")
+        close_btn.pack(side="right", padx=(10, 0))
+        save_btn = ttk.Button(btn_frame, text="Registrar entrada")
+        save_btn.pack(side="right")
+
+        code_entry.focus_set()
+
+        return form_window, {
+            'codigo': code_entry,
+            'cantidad': qty_spin,
+            'estado': status_label,
+            'tabla': tree,
+            'quitar': remove_btn,
+            'cerrar': close_btn,
+            'registrar': save_btn
+        }
+
+    def set_scan_status(self, label, text, error=False):
+        """Mostrar el resultado de la última lectura"""
+        label.configure(text=text, fg="#dc2626" if error else self.fg_color)
+
+    def set_intake_row(self, tree, product_id, values):
+        """Insertar o actualizar la fila de un producto en la entrada"""
+        iid = str(product_id)
+        if tree.exists(iid):
+            tree.item(iid, values=values)
+        else:
+            tree.insert("", "end", iid=iid, values=values)
+        tree.see(iid)
+
     def show_new_value_form(self, table):
         """Mostrar formulario para agregar nuevo valor a tabla relacionada"""
         form_window = self.create_modal_window(
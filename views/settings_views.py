@@ -96,6 +96,10 @@ class SettingsView(BaseView):
         """Carga datos en el Treeview"""
         self.refresh_table_data(tree, data)
 
+    def load_table_chunks(self, tree, chunks, on_error=None):
+        """Carga datos en el Treeview a medida que llegan los bloques"""
+        self.refresh_table_chunks(tree, chunks, on_error)
+
     def create_settings_dialog(self, title, fields_config, current_data=None):
         """Crea un diálogo para agregar/editar items en settings"""
         dialog = self.create_modal_window(self.app, title, "400x400")
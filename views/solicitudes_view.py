@@ -377,6 +377,10 @@ class SolicitudesView(BaseView):
         qty_entry = ttk.Entry(detail_frame, width=5, font=self.form_entry_font)
         qty_entry.grid(row=0, column=7, padx=5, pady=2, sticky="ew")
 
+        # Miniatura del producto seleccionado
+        imagen_label = tk.Label(detail_frame, bg=self.bg_color)
+        imagen_label.grid(row=0, column=8, padx=5, pady=2)
+
         # Botones para agregar/quitar productos
         btn_frame = tk.Frame(product_frame, bg=self.bg_color)
         btn_frame.pack(fill="x", pady=5)
@@ -431,6 +435,7 @@ class SolicitudesView(BaseView):
             'estado_label': estado_label,
             'stock_label': stock_label,
             'ubicacion_label': ubicacion_label,
+            'imagen_label': imagen_label,
             'output_tree': output_tree,
             'qty_entry': qty_entry,
             'selected_category': selected_category,
@@ -443,6 +448,22 @@ class SolicitudesView(BaseView):
         stock_label.config(text=str(stock))
         ubicacion_label.config(text=ubicacion)
 
+    def mostrar_miniatura(self, label, image_hash):
+        """Mostrar en label la miniatura de una imagen (o nada si no tiene)"""
+        label.configure(image="")
+        label.image_hash = image_hash
+        thumbnails = getattr(self.app, 'thumbnails', None)
+        if not image_hash or thumbnails is None:
+            return
+
+        def mostrar(image):
+            # Puede llegar tarde: solo si sigue seleccionado el mismo producto
+            if label.winfo_exists() and label.image_hash == image_hash:
+                label.configure(image=image)
+                label.image = image
+
+        thumbnails.request(image_hash, mostrar)
+
     def cargar_categorias_combo(self, categorias, category_combo):
         """Cargar categorías en el combobox"""
         category_combo['values'] = [c[1] for c in categorias]